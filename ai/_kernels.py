@@ -0,0 +1,382 @@
+import math
+
+import numpy as np
+
+from core._njit import njit, prange
+
+# Tail-value indicator kernels. Each takes raw float64 arrays (oldest bar
+# first) and returns the value a pandas rolling computation would produce
+# at the last bar, or NaN when there is not enough history.
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # full per-bar series; the first bar has no previous close
+    tr = high - low
+    if len(close) > 1:
+        prev_close = close[:-1]
+        np.maximum(tr[1:], np.abs(high[1:] - prev_close), out=tr[1:])
+        np.maximum(tr[1:], np.abs(low[1:] - prev_close), out=tr[1:])
+    return tr
+
+
+@njit(cache=True)
+def _tr_dm(high, low, close, i):
+    if i == 0:
+        return high[0] - low[0], 0.0, 0.0
+    tr = max(
+        high[i] - low[i],
+        abs(high[i] - close[i - 1]),
+        abs(low[i] - close[i - 1]),
+    )
+    up = high[i] - high[i - 1]
+    down = low[i - 1] - low[i]
+    plus_dm = up if (up > down and up > 0.0) else 0.0
+    minus_dm = down if (down > plus_dm and down > 0.0) else 0.0
+    return tr, plus_dm, minus_dm
+
+
+@njit(cache=True)
+def sma_last(x, period):
+    n = x.shape[0]
+    if period <= 0 or n < period:
+        return np.nan
+    total = 0.0
+    for i in range(n - period, n):
+        total += x[i]
+    return total / period
+
+
+@njit(cache=True)
+def rsi_last(close, period):
+    n = close.shape[0]
+    if period <= 0 or n < period:
+        return np.nan
+    gain_sum = 0.0
+    loss_sum = 0.0
+    # the first bar has no delta and counts as a zero gain/loss
+    for i in range(max(1, n - period), n):
+        delta = close[i] - close[i - 1]
+        if delta > 0.0:
+            gain_sum += delta
+        elif delta < 0.0:
+            loss_sum -= delta
+    if loss_sum == 0.0:
+        return 100.0
+    rs = gain_sum / loss_sum
+    return 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(cache=True)
+def atr_last(high, low, close, period):
+    n = close.shape[0]
+    if period <= 0 or n < period:
+        return np.nan
+    tr_sum = 0.0
+    for i in range(n - period, n):
+        tr, _, _ = _tr_dm(high, low, close, i)
+        tr_sum += tr
+    return tr_sum / period
+
+
+@njit(cache=True)
+def adx_last(high, low, close, period):
+    n = close.shape[0]
+    first = n - 2 * period + 1
+    if period <= 0 or first < 0:
+        return np.nan
+
+    tr_sum = 0.0
+    plus_sum = 0.0
+    minus_sum = 0.0
+    dx_sum = 0.0
+    for i in range(first, n):
+        tr, plus_dm, minus_dm = _tr_dm(high, low, close, i)
+        tr_sum += tr
+        plus_sum += plus_dm
+        minus_sum += minus_dm
+        if i - period >= first:
+            tr, plus_dm, minus_dm = _tr_dm(high, low, close, i - period)
+            tr_sum -= tr
+            plus_sum -= plus_dm
+            minus_sum -= minus_dm
+        if i >= first + period - 1:
+            di_sum = plus_sum + minus_sum
+            if tr_sum <= 0.0 or di_sum <= 0.0:
+                return np.nan
+            dx_sum += abs(plus_sum - minus_sum) / di_sum * 100.0
+    return dx_sum / period
+
+
+@njit(cache=True)
+def rolling_var_last(x, window):
+    n = x.shape[0]
+    if window < 2 or n < window:
+        return np.nan
+    mean = 0.0
+    for i in range(n - window, n):
+        mean += x[i]
+    mean /= window
+    ssd = 0.0
+    for i in range(n - window, n):
+        d = x[i] - mean
+        ssd += d * d
+    return ssd / (window - 1)
+
+
+@njit(cache=True)
+def rolling_std_last(x, window):
+    return math.sqrt(rolling_var_last(x, window))
+
+
+@njit(cache=True)
+def returns_std_last(close, window):
+    n = close.shape[0]
+    if window < 2 or n < window + 1:
+        return np.nan
+    mean = 0.0
+    for i in range(n - window, n):
+        mean += close[i] / close[i - 1] - 1.0
+    mean /= window
+    ssd = 0.0
+    for i in range(n - window, n):
+        d = close[i] / close[i - 1] - 1.0 - mean
+        ssd += d * d
+    return math.sqrt(ssd / (window - 1))
+
+
+@njit(parallel=True, cache=True)
+def forest_predict_proba(X, roots, feature, threshold, left, right, value):
+    # X is float32 like sklearn's tree input; leaves have left == -1 and
+    # hold normalized class probabilities, averaged over the trees.
+    n = X.shape[0]
+    n_trees = roots.shape[0]
+    n_classes = value.shape[1]
+    out = np.zeros((n, n_classes))
+    for r in prange(n):
+        for t in range(n_trees):
+            node = roots[t]
+            while left[node] != -1:
+                if X[r, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            for c in range(n_classes):
+                out[r, c] += value[node, c]
+        for c in range(n_classes):
+            out[r, c] /= n_trees
+    return out
+
+
+@njit(cache=True)
+def rolling_var_series(x, window):
+    # Full rolling sample variance (ddof=1) in one pass with add/remove
+    # Welford updates; a window containing NaN yields NaN, as in pandas.
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        value = x[i]
+        if not np.isnan(value):
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+        if i >= window:
+            old = x[i - window]
+            if not np.isnan(old):
+                count -= 1
+                if count == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = old - mean
+                    mean -= delta / count
+                    m2 -= delta * (old - mean)
+        if count == window and window > 1:
+            out[i] = max(m2, 0.0) / (window - 1)
+    return out
+
+
+# Streaming indicators for ai.indicators.IndicatorStream, with the ta
+# library's definitions. The state is one float64 vector (slots below)
+# followed by a ring of the last BB_WINDOW closes, so a copy of it is a
+# complete snapshot.
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+ADX_WINDOW = 14
+BB_WINDOW = 20
+BB_DEV = 2.0
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGN = 9
+
+IND_BARS = 0
+IND_PREV_HIGH = 1
+IND_PREV_LOW = 2
+IND_PREV_CLOSE = 3
+IND_EMA20 = 4
+IND_EMA50 = 5
+IND_EMA200 = 6
+IND_EMA_FAST = 7
+IND_EMA_SLOW = 8
+IND_SIGNAL = 9
+IND_MACD_BARS = 10
+IND_AVG_GAIN = 11
+IND_AVG_LOSS = 12
+IND_ATR = 13
+IND_TR_SUM = 14
+IND_PLUS_SUM = 15
+IND_MINUS_SUM = 16
+IND_DX_SUM = 17
+IND_ADX = 18
+IND_RING = 19
+IND_STATE_SIZE = IND_RING + BB_WINDOW
+# values written per candle, in ai.indicators.INDICATOR_COLUMNS order
+IND_NUM_VALUES = 10
+
+
+@njit(cache=True)
+def _ema_step(prev, x, span, first):
+    if first:
+        return x
+    return prev + 2.0 / (span + 1) * (x - prev)
+
+
+@njit(cache=True)
+def _indicator_step(state, high, low, close, out):
+    i = int(state[IND_BARS])
+    first = i == 0
+
+    ema20 = _ema_step(state[IND_EMA20], close, 20, first)
+    ema50 = _ema_step(state[IND_EMA50], close, 50, first)
+    ema200 = _ema_step(state[IND_EMA200], close, 200, first)
+    ema_fast = _ema_step(state[IND_EMA_FAST], close, MACD_FAST, first)
+    ema_slow = _ema_step(state[IND_EMA_SLOW], close, MACD_SLOW, first)
+
+    # MACD exists from bar MACD_SLOW - 1; its signal EMA seeds there
+    macd = np.nan
+    signal = state[IND_SIGNAL]
+    macd_bars = int(state[IND_MACD_BARS])
+    if i >= MACD_SLOW - 1:
+        macd = ema_fast - ema_slow
+        signal = _ema_step(signal, macd, MACD_SIGN, macd_bars == 0)
+        macd_bars += 1
+
+    delta = 0.0 if first else close - state[IND_PREV_CLOSE]
+    gain = max(delta, 0.0)
+    loss = max(-delta, 0.0)
+    if first:
+        avg_gain = gain
+        avg_loss = loss
+    else:
+        avg_gain = state[IND_AVG_GAIN] + (gain - state[IND_AVG_GAIN]) / RSI_WINDOW
+        avg_loss = state[IND_AVG_LOSS] + (loss - state[IND_AVG_LOSS]) / RSI_WINDOW
+    rsi = np.nan
+    if i >= RSI_WINDOW - 1:
+        rsi = 100.0 if avg_loss == 0.0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    state[IND_RING + i % BB_WINDOW] = close
+    bb_upper = np.nan
+    bb_lower = np.nan
+    if i >= BB_WINDOW - 1:
+        mean = 0.0
+        for k in range(BB_WINDOW):
+            mean += state[IND_RING + k]
+        mean /= BB_WINDOW
+        ssd = 0.0
+        for k in range(BB_WINDOW):
+            d = state[IND_RING + k] - mean
+            ssd += d * d
+        std = math.sqrt(ssd / BB_WINDOW)
+        bb_upper = mean + BB_DEV * std
+        bb_lower = mean - BB_DEV * std
+
+    if first:
+        tr = high - low
+        plus_dm = 0.0
+        minus_dm = 0.0
+    else:
+        prev_close = state[IND_PREV_CLOSE]
+        tr = max(high, prev_close) - min(low, prev_close)
+        up = high - state[IND_PREV_HIGH]
+        down = state[IND_PREV_LOW] - low
+        plus_dm = up if (up > down and up > 0.0) else 0.0
+        minus_dm = down if (down > up and down > 0.0) else 0.0
+
+    atr = state[IND_ATR]
+    if i < ATR_WINDOW:
+        atr += tr / ATR_WINDOW
+    else:
+        atr = (atr * (ATR_WINDOW - 1) + tr) / ATR_WINDOW
+
+    # ADX sums bars 1..window first (bar 0 has no direction), then
+    # Wilder-smooths them and averages DX from bar 2 * window - 1
+    tr_sum = state[IND_TR_SUM]
+    plus_sum = state[IND_PLUS_SUM]
+    minus_sum = state[IND_MINUS_SUM]
+    if 1 <= i <= ADX_WINDOW:
+        tr_sum += tr
+        plus_sum += plus_dm
+        minus_sum += minus_dm
+    elif i > ADX_WINDOW:
+        tr_sum += tr - tr_sum / ADX_WINDOW
+        plus_sum += plus_dm - plus_sum / ADX_WINDOW
+        minus_sum += minus_dm - minus_sum / ADX_WINDOW
+    dx_sum = state[IND_DX_SUM]
+    adx_value = state[IND_ADX]
+    adx = np.nan
+    if i >= ADX_WINDOW:
+        plus_di = 100.0 * plus_sum / tr_sum if tr_sum != 0.0 else 0.0
+        minus_di = 100.0 * minus_sum / tr_sum if tr_sum != 0.0 else 0.0
+        di_sum = plus_di + minus_di
+        dx = 100.0 * abs(plus_di - minus_di) / di_sum if di_sum != 0.0 else 0.0
+        if i < 2 * ADX_WINDOW - 1:
+            dx_sum += dx
+        else:
+            if i == 2 * ADX_WINDOW - 1:
+                adx_value = (dx_sum + dx) / ADX_WINDOW
+            else:
+                adx_value = (adx_value * (ADX_WINDOW - 1) + dx) / ADX_WINDOW
+            adx = adx_value
+
+    state[IND_BARS] = i + 1
+    state[IND_PREV_HIGH] = high
+    state[IND_PREV_LOW] = low
+    state[IND_PREV_CLOSE] = close
+    state[IND_EMA20] = ema20
+    state[IND_EMA50] = ema50
+    state[IND_EMA200] = ema200
+    state[IND_EMA_FAST] = ema_fast
+    state[IND_EMA_SLOW] = ema_slow
+    state[IND_SIGNAL] = signal
+    state[IND_MACD_BARS] = macd_bars
+    state[IND_AVG_GAIN] = avg_gain
+    state[IND_AVG_LOSS] = avg_loss
+    state[IND_ATR] = atr
+    state[IND_TR_SUM] = tr_sum
+    state[IND_PLUS_SUM] = plus_sum
+    state[IND_MINUS_SUM] = minus_sum
+    state[IND_DX_SUM] = dx_sum
+    state[IND_ADX] = adx_value
+
+    out[0] = ema20 if i >= 19 else np.nan
+    out[1] = ema50 if i >= 49 else np.nan
+    out[2] = ema200 if i >= 199 else np.nan
+    out[3] = rsi
+    out[4] = macd
+    out[5] = signal if macd_bars >= MACD_SIGN else np.nan
+    out[6] = bb_upper
+    out[7] = bb_lower
+    out[8] = atr if i >= ATR_WINDOW - 1 else np.nan
+    out[9] = adx
+
+
+# compiled for this signature at import, so the live loop never waits on
+# the JIT
+@njit("void(float64[::1], float64[::1], float64[::1], float64[::1], float64[:, ::1])", cache=True)
+def indicator_fold(state, high, low, close, out):
+    # folds the candles into state in place; out gets one row per candle
+    for j in range(close.shape[0]):
+        _indicator_step(state, high[j], low[j], close[j], out[j])
@@ -0,0 +1,63 @@
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+from ai._kernels import IND_NUM_VALUES, IND_STATE_SIZE, indicator_fold
+
+# Streaming versions of the indicators the live loop stores and exports,
+# with the ta library's definitions (EMA seeded at the first close, Wilder
+# RSI/ATR/ADX, population-std Bollinger bands). Each closed candle is one
+# O(1) update instead of recomputing the whole window.
+
+INDICATOR_COLUMNS = (
+    "ema20", "ema50", "ema200", "rsi", "macd", "macd_signal",
+    "bb_upper", "bb_lower", "atr", "adx",
+)
+
+
+class IndicatorStream:
+    # Feeds the candle window the live loop refetches each tick into the
+    # indicator state. Candles newer than the last folded-in one are added,
+    # except the newest, which may still be forming and is evaluated on a
+    # throwaway copy. A window that no longer reaches back to the last
+    # folded-in candle (first call, or a gap) is replayed from scratch.
+    def __init__(self, keep: int = 50) -> None:
+        self._state = np.zeros(IND_STATE_SIZE)
+        self._last_ts: Optional[int] = None
+        self._recent: Deque[Tuple[float, ...]] = deque(maxlen=keep - 1)
+
+    def update(
+        self, ts: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray
+    ) -> List[Tuple[float, ...]]:
+        # returns (timestamp ms, *INDICATOR_COLUMNS) rows for the last
+        # `keep` candles, oldest first
+        n = len(ts)
+        if n == 0:
+            return []
+        ts = np.asarray(ts, dtype=np.int64)
+        if self._last_ts is None or ts[0] > self._last_ts or ts[-1] <= self._last_ts:
+            self._state = np.zeros(IND_STATE_SIZE)
+            self._last_ts = None
+            self._recent.clear()
+            start = 0
+        else:
+            start = int(np.searchsorted(ts, self._last_ts, side="right"))
+
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        low = np.ascontiguousarray(low, dtype=np.float64)
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        if start < n - 1:
+            out = np.empty((n - 1 - start, IND_NUM_VALUES))
+            indicator_fold(
+                self._state, high[start:n - 1], low[start:n - 1], close[start:n - 1], out
+            )
+            self._recent.extend(
+                (t, *values) for t, values in zip(ts[start:n - 1].tolist(), out.tolist())
+            )
+            self._last_ts = int(ts[n - 2])
+
+        state = self._state.copy()
+        out = np.empty((1, IND_NUM_VALUES))
+        indicator_fold(state, high[-1:], low[-1:], close[-1:], out)
+        return [*self._recent, (int(ts[-1]), *out[0].tolist())]
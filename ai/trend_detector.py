@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional
 import numpy as np
 import pandas as pd
 
+from ai._kernels import adx_last, rsi_last, sma_last, true_range
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,57 +56,82 @@ class TrendDetector:
     def last_signal(self) -> Optional[TrendSignal]:
         return self._last_signal
 
-    def _compute_rsi(self, close: pd.Series) -> float:
-        delta = close.diff()
-        gain = delta.where(delta > 0, 0.0)
-        loss = (-delta).where(delta < 0, 0.0)
+    @property
+    def ma_fast_period(self) -> int:
+        return self._ma_fast_period
 
-        avg_gain = gain.rolling(self._rsi_period).mean()
-        avg_loss = loss.rolling(self._rsi_period).mean()
+    @property
+    def ma_slow_period(self) -> int:
+        return self._ma_slow_period
 
-        last_avg_gain = avg_gain.iloc[-1]
-        last_avg_loss = avg_loss.iloc[-1]
+    @property
+    def rsi_period(self) -> int:
+        return self._rsi_period
 
-        if last_avg_loss == 0:
-            return 100.0
-        rs = last_avg_gain / last_avg_loss
-        return 100.0 - (100.0 / (1.0 + rs))
+    @property
+    def adx_period(self) -> int:
+        return self._adx_period
+
+    def _compute_rsi(self, close: np.ndarray) -> float:
+        return float(rsi_last(close, self._rsi_period))
+
+    def _compute_adx(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> float:
+        return float(adx_last(high, low, close, self._adx_period))
+
+    def indicator_series(
+        self, high: np.ndarray, low: np.ndarray, close: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        # Full-history counterparts of the values analyze_arrays() reads at
+        # the last bar, for callers that need them at many bars at once.
+        high_s = pd.Series(high)
+        low_s = pd.Series(low)
+        close_s = pd.Series(close)
+
+        delta = close_s.diff()
+        gain = delta.where(delta > 0, 0.0).rolling(self._rsi_period).mean()
+        loss = (-delta).where(delta < 0, 0.0).rolling(self._rsi_period).mean()
+        rsi = (100.0 - 100.0 / (1.0 + gain / loss)).where(loss != 0, 100.0)
+        rsi = rsi.where(loss.notna())
 
-    def _compute_adx(self, df: pd.DataFrame) -> float:
-        high = df["high"].astype(float)
-        low = df["low"].astype(float)
-        close = df["close"].astype(float)
         period = self._adx_period
-
-        plus_dm = high.diff()
-        minus_dm = -low.diff()
-
+        plus_dm = high_s.diff()
+        minus_dm = -low_s.diff()
         plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0.0)
         minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0.0)
-
-        tr = pd.concat([
-            high - low,
-            (high - close.shift(1)).abs(),
-            (low - close.shift(1)).abs(),
-        ], axis=1).max(axis=1)
-
-        atr = tr.rolling(period).mean()
+        atr = pd.Series(true_range(high, low, close)).rolling(period).mean()
         plus_di = 100 * (plus_dm.rolling(period).mean() / atr)
         minus_di = 100 * (minus_dm.rolling(period).mean() / atr)
-
         dx = (plus_di - minus_di).abs() / (plus_di + minus_di) * 100
         adx = dx.rolling(period).mean()
 
-        last_val = adx.iloc[-1]
-        return float(last_val) if not np.isnan(last_val) else 0.0
+        return {
+            "ma_fast": close_s.rolling(self._ma_fast_period).mean().to_numpy(),
+            "ma_slow": close_s.rolling(self._ma_slow_period).mean().to_numpy(),
+            "rsi": rsi.to_numpy(),
+            "adx": adx.to_numpy(),
+        }
 
     def analyze(self, df: pd.DataFrame) -> TrendSignal:
-        close = df["close"].astype(float)
+        return self.analyze_arrays(
+            df["high"].to_numpy(dtype=np.float64),
+            df["low"].to_numpy(dtype=np.float64),
+            df["close"].to_numpy(dtype=np.float64),
+        )
 
-        ma_fast = close.rolling(self._ma_fast_period).mean().iloc[-1]
-        ma_slow = close.rolling(self._ma_slow_period).mean().iloc[-1]
+    def analyze_arrays(
+        self, high: np.ndarray, low: np.ndarray, close: np.ndarray
+    ) -> TrendSignal:
+        ma_fast = float(sma_last(close, self._ma_fast_period))
+        ma_slow = float(sma_last(close, self._ma_slow_period))
         rsi = self._compute_rsi(close)
-        adx = self._compute_adx(df)
+        adx = self._compute_adx(high, low, close)
+        return self.analyze_scalar(ma_fast, ma_slow, rsi, adx)
+
+    def analyze_scalar(
+        self, ma_fast: float, ma_slow: float, rsi: float, adx: float
+    ) -> TrendSignal:
+        if np.isnan(adx):
+            adx = 0.0
 
         if ma_fast > ma_slow:
             base_trend = "BULLISH"
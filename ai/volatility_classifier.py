@@ -10,6 +10,18 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
+from ai._kernels import (
+    atr_last,
+    forest_predict_proba,
+    returns_std_last,
+    rolling_std_last,
+    rolling_var_last,
+    rolling_var_series,
+    sma_last,
+    true_range,
+)
+from core._njit import NUMBA_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,35 +34,116 @@ class VolatilityRegime(str, Enum):
 REGIME_LABELS = {0: VolatilityRegime.LOW, 1: VolatilityRegime.MEDIUM, 2: VolatilityRegime.HIGH}
 REGIME_TO_INT = {v: k for k, v in REGIME_LABELS.items()}
 
+FEATURE_COLUMNS = (
+    "atr_14", "bb_width", "variance_5m", "variance_1h",
+    "returns_std", "range_pct",
+)
 
-def compute_features(df: pd.DataFrame) -> pd.DataFrame:
-    features = pd.DataFrame(index=df.index)
-
-    high = df["high"].astype(float)
-    low = df["low"].astype(float)
-    close = df["close"].astype(float)
 
-    tr = pd.concat([
-        high - low,
-        (high - close.shift(1)).abs(),
-        (low - close.shift(1)).abs(),
-    ], axis=1).max(axis=1)
-    features["atr_14"] = tr.rolling(14).mean()
+def _rolling_var(x: np.ndarray, window: int) -> np.ndarray:
+    if NUMBA_AVAILABLE:
+        return rolling_var_series(x, window)
+    return pd.Series(x).rolling(window).var().to_numpy()
 
-    sma_20 = close.rolling(20).mean()
-    std_20 = close.rolling(20).std()
-    features["bb_width"] = (2 * std_20) / sma_20
 
-    features["variance_5m"] = close.rolling(12).var()
+def compute_feature_matrix(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> np.ndarray:
+    # One row per candle in FEATURE_COLUMNS order; rows without enough
+    # history are NaN.
+    tr = pd.Series(true_range(high, low, close))
+    sma_20 = pd.Series(close).rolling(20).mean().to_numpy()
+    std_20 = np.sqrt(_rolling_var(close, 20))
 
-    features["variance_1h"] = close.rolling(12 * 12).var()
+    returns = np.empty_like(close)
+    returns[:1] = np.nan
+    returns[1:] = close[1:] / close[:-1] - 1
 
-    features["returns_std"] = close.pct_change().rolling(24).std()
+    return np.column_stack([
+        tr.rolling(14).mean().to_numpy(),
+        (2 * std_20) / sma_20,
+        _rolling_var(close, 12),
+        _rolling_var(close, 12 * 12),
+        np.sqrt(_rolling_var(returns, 24)),
+        (high - low) / close * 100,
+    ])
 
-    features["range_pct"] = (high - low) / close * 100
 
-    features = features.dropna()
-    return features
+def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+    matrix = compute_feature_matrix(
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+    )
+    features = pd.DataFrame(matrix, index=df.index, columns=list(FEATURE_COLUMNS))
+    return features.dropna()
+
+
+# candles compute_last_features() needs: the longest window is the 1h
+# variance of 12 * 12 closes
+FEATURE_HISTORY = 12 * 12
+
+
+def compute_last_features(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> Optional[np.ndarray]:
+    # Same values as the last row of compute_features(), without building
+    # the full rolling series. Returns None when history is too short.
+    if len(close) == 0:
+        return None
+    row = np.array([
+        atr_last(high, low, close, 14),
+        2 * rolling_std_last(close, 20) / sma_last(close, 20),
+        rolling_var_last(close, 12),
+        rolling_var_last(close, 12 * 12),
+        returns_std_last(close, 24),
+        (high[-1] - low[-1]) / close[-1] * 100,
+    ], dtype=np.float64)
+    if np.isnan(row).any():
+        return None
+    return row
+
+
+def _float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    # Largest float32 <= each threshold: for float32 inputs x, x <= t32
+    # exactly when x <= t, so splits match sklearn's float64 thresholds.
+    t32 = threshold.astype(np.float32)
+    above = t32 > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def _flatten_forest(model: RandomForestClassifier) -> Tuple[np.ndarray, ...]:
+    # Concatenate the fitted trees into flat node arrays for
+    # forest_predict_proba(); child indices are offset per tree. Node
+    # arrays are 32-bit to halve what the traversal pulls through cache.
+    roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        is_leaf = left == -1
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+
+        roots.append(offset)
+        features.append(np.maximum(tree.feature, 0).astype(np.int32))
+        thresholds.append(_float32_thresholds(tree.threshold))
+        lefts.append(np.where(is_leaf, -1, left + offset))
+        rights.append(np.where(is_leaf, -1, right + offset))
+        values.append(value / normalizer)
+        offset += tree.node_count
+
+    return (
+        np.array(roots, dtype=np.int32),
+        np.concatenate(features),
+        np.concatenate(thresholds),
+        np.concatenate(lefts),
+        np.concatenate(rights),
+        np.concatenate(values),
+    )
 
 
 def label_regimes(features: pd.DataFrame) -> pd.Series:
@@ -65,13 +158,19 @@ def label_regimes(features: pd.DataFrame) -> pd.Series:
 
 
 class VolatilityClassifier:
-    def __init__(self, model_path: str = "models/volatility_model.joblib") -> None:
+    def __init__(
+        self,
+        model_path: str = "models/volatility_model.joblib",
+        reuse_tolerance: float = 0.01,
+    ) -> None:
         self._model_path = model_path
         self._model: Optional[RandomForestClassifier] = None
-        self._feature_cols = [
-            "atr_14", "bb_width", "variance_5m", "variance_1h",
-            "returns_std", "range_pct",
-        ]
+        self._forest: Optional[Tuple[np.ndarray, ...]] = None
+        # predict_features() reuses the last result while every feature is
+        # within this relative distance of the ones it was computed from
+        self._reuse_tolerance = reuse_tolerance
+        self._prev_features: Optional[np.ndarray] = None
+        self._feature_cols = list(FEATURE_COLUMNS)
         self._last_prediction: Optional[VolatilityRegime] = None
         self._last_confidence: float = 0.0
 
@@ -90,12 +189,22 @@ class VolatilityClassifier:
             return False
         try:
             self._model = joblib.load(path)
+            self._forest = None
+            self._prev_features = None
+            self._warm_up()
             logger.info("Volatility model loaded from %s", self._model_path)
             return True
         except Exception:
             logger.exception("Failed to load model")
             return False
 
+    def _warm_up(self) -> None:
+        # Compiles (or loads from numba's cache) the kernels the live
+        # prediction uses and flattens the forest now, so the first tick
+        # doesn't pay for it.
+        ones = np.ones(FEATURE_HISTORY)
+        self._predict_proba(compute_last_features(ones, ones, ones).reshape(1, -1))
+
     def train(
         self,
         df: pd.DataFrame,
@@ -106,7 +215,8 @@ class VolatilityClassifier:
         features = compute_features(df)
         labels = label_regimes(features)
 
-        X = features[self._feature_cols].values
+        # sklearn fits trees on float32 input anyway
+        X = features[self._feature_cols].to_numpy(dtype=np.float32)
         y = labels.values
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -122,6 +232,8 @@ class VolatilityClassifier:
             n_jobs=-1,
         )
         self._model.fit(X_train, y_train)
+        self._forest = None
+        self._prev_features = None
 
         y_pred = self._model.predict(X_test)
         report = classification_report(y_test, y_pred, output_dict=True)
@@ -135,30 +247,86 @@ class VolatilityClassifier:
         return {"accuracy": accuracy, "report": report}
 
     def predict(self, df: pd.DataFrame) -> Tuple[VolatilityRegime, float]:
+        return self.predict_arrays(
+            df["high"].to_numpy(dtype=np.float64),
+            df["low"].to_numpy(dtype=np.float64),
+            df["close"].to_numpy(dtype=np.float64),
+        )
+
+    def predict_arrays(
+        self, high: np.ndarray, low: np.ndarray, close: np.ndarray
+    ) -> Tuple[VolatilityRegime, float]:
+        features = None
+        if self._model is not None:
+            features = compute_last_features(high, low, close)
+        return self.predict_features(features)
+
+    def predict_features(
+        self, features: Optional[np.ndarray]
+    ) -> Tuple[VolatilityRegime, float]:
         if self._model is None:
             logger.warning("Model not loaded, defaulting to MEDIUM")
             self._last_prediction = VolatilityRegime.MEDIUM
             self._last_confidence = 0.0
             return VolatilityRegime.MEDIUM, 0.0
 
-        features = compute_features(df)
-        if features.empty:
+        if features is None or np.isnan(features).any():
+            self._prev_features = None
             self._last_prediction = VolatilityRegime.MEDIUM
             self._last_confidence = 0.0
             return VolatilityRegime.MEDIUM, 0.0
 
-        last_row = features[self._feature_cols].iloc[[-1]].values
-        pred = self._model.predict(last_row)[0]
-        proba = self._model.predict_proba(last_row)[0]
-        confidence = float(proba[pred])
+        prev = self._prev_features
+        if prev is not None and np.all(
+            np.abs(features - prev) <= self._reuse_tolerance * np.abs(prev)
+        ):
+            return self._last_prediction, self._last_confidence
+
+        proba = self._predict_proba(features.reshape(1, -1))[0]
+        best = int(proba.argmax())
+        pred = self._model.classes_[best]
+        confidence = float(proba[best])
 
         regime = REGIME_LABELS.get(pred, VolatilityRegime.MEDIUM)
         self._last_prediction = regime
         self._last_confidence = confidence
+        self._prev_features = np.array(features, dtype=np.float64)
 
         logger.info("Volatility prediction: %s (confidence=%.3f)", regime.value, confidence)
         return regime, confidence
 
+    def predict_batch(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Regime labels (REGIME_LABELS keys) and confidences for each row of
+        # a compute_feature_matrix() array in one model call. Rows with
+        # missing features, or every row when no model is loaded, get
+        # MEDIUM with 0.0 confidence, as predict() does.
+        n = len(features)
+        labels = np.full(n, REGIME_TO_INT[VolatilityRegime.MEDIUM], dtype=np.int64)
+        confidence = np.zeros(n, dtype=np.float64)
+        if self._model is None:
+            logger.warning("Model not loaded, defaulting to MEDIUM")
+            return labels, confidence
+
+        valid = ~np.isnan(features).any(axis=1)
+        if not valid.any():
+            return labels, confidence
+
+        proba = self._predict_proba(features[valid])
+        best = proba.argmax(axis=1)
+        labels[valid] = self._model.classes_[best]
+        confidence[valid] = proba[np.arange(len(best)), best]
+        return labels, confidence
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if NUMBA_AVAILABLE:
+            if self._forest is None:
+                self._forest = _flatten_forest(self._model)
+            return forest_predict_proba(
+                np.ascontiguousarray(X, dtype=np.float32), *self._forest
+            )
+        # an interpreted tree walk would be far slower than sklearn's
+        return self._model.predict_proba(X)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "regime": self._last_prediction.value if self._last_prediction else None,
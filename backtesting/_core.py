@@ -0,0 +1,216 @@
+import numpy as np
+
+from core._njit import njit
+
+# Compiled candle loop for BacktestEngine.run. It simulates candles until
+# the grid has to be (re)calculated, then hands control back to Python so
+# GridEngine stays the single source of level prices and rounding.
+
+# run_core() exit codes
+DONE = 0
+RECALIBRATE = 1
+EMERGENCY_STOP = 2
+
+# slots of the float64 account array
+CAPITAL = 0
+BTC_HELD = 1
+PEAK_CAPITAL = 2
+TOTAL_FEES = 3
+DAILY_PNL = 4
+
+# slots of the int64 counters array
+EQUITY_IDX = 0
+N_BUYS = 1
+N_SELLS = 2
+N_TRADES = 3
+N_FILLED = 4
+DAILY_ORDERS = 5
+HALTED = 6
+NUM_COUNTERS = 7
+
+# rows of the (column-major) trade log, one column per trade
+TRADE_FIELDS = (
+    "buy_price", "sell_price", "amount", "profit_usdt", "fee_usdt", "net_profit_usdt",
+)
+TRADE_BUY_PRICE = 0
+TRADE_SELL_PRICE = 1
+TRADE_AMOUNT = 2
+TRADE_PROFIT = 3
+TRADE_FEE = 4
+TRADE_NET = 5
+
+
+class SimBook:
+    # Open simulated orders as fixed-capacity, price-sorted (ascending)
+    # arrays. Each buy carries its precomputed counter sell (NaN if none).
+    def __init__(self, capacity: int) -> None:
+        self.buy_price = np.zeros(capacity, dtype=np.float64)
+        self.buy_amount = np.zeros(capacity, dtype=np.float64)
+        self.buy_index = np.zeros(capacity, dtype=np.int64)
+        self.counter_price = np.zeros(capacity, dtype=np.float64)
+        self.counter_amount = np.zeros(capacity, dtype=np.float64)
+        self.sell_price = np.zeros(capacity, dtype=np.float64)
+        self.sell_amount = np.zeros(capacity, dtype=np.float64)
+        self.filled = np.zeros(capacity, dtype=np.int64)
+
+
+@njit(cache=True)
+def insert_buy(book_price, book_amount, book_index, book_cprice, book_camount,
+               n, price, amount, index, counter_price, counter_amount):
+    pos = n
+    while pos > 0 and book_price[pos - 1] > price:
+        book_price[pos] = book_price[pos - 1]
+        book_amount[pos] = book_amount[pos - 1]
+        book_index[pos] = book_index[pos - 1]
+        book_cprice[pos] = book_cprice[pos - 1]
+        book_camount[pos] = book_camount[pos - 1]
+        pos -= 1
+    book_price[pos] = price
+    book_amount[pos] = amount
+    book_index[pos] = index
+    book_cprice[pos] = counter_price
+    book_camount[pos] = counter_amount
+    return n + 1
+
+
+@njit(cache=True)
+def insert_sell(book_price, book_amount, n, price, amount):
+    pos = n
+    while pos > 0 and book_price[pos - 1] > price:
+        book_price[pos] = book_price[pos - 1]
+        book_amount[pos] = book_amount[pos - 1]
+        pos -= 1
+    book_price[pos] = price
+    book_amount[pos] = amount
+    return n + 1
+
+
+@njit(cache=True)
+def _risk_halt(acct, daily_orders, initial_capital, limits):
+    # Mirrors RiskManager.evaluate for the actions that stop trading:
+    # 0 = trade, 1 = PAUSE, 2 = EMERGENCY_STOP. limits holds max drawdown,
+    # emergency stop loss, max capital deployed (all %), daily loss cap and
+    # max orders per day.
+    peak = acct[PEAK_CAPITAL]
+    drawdown = 0.0
+    if peak > 0:
+        drawdown = (peak - acct[CAPITAL]) / peak * 100
+    if drawdown >= limits[1]:
+        return 2
+    if drawdown >= limits[0]:
+        return 1
+    deployed = 0.0
+    if initial_capital > 0:
+        deployed = max(0.0, (initial_capital - acct[CAPITAL]) / initial_capital * 100)
+    if deployed >= limits[2]:
+        return 1
+    if acct[DAILY_PNL] <= -limits[3]:
+        return 1
+    if daily_orders >= limits[4]:
+        return 1
+    return 0
+
+
+@njit(cache=True)
+def _check_fills(low, high, acct, counters, fee_pct, slippage_pct, spacing,
+                 buy_price, buy_amount, buy_index, counter_price, counter_amount,
+                 sell_price, sell_amount, trades, filled):
+    # buys fill when low <= price: the tail of the ascending book
+    n_buys = counters[N_BUYS]
+    k = n_buys
+    while k > 0 and buy_price[k - 1] >= low:
+        k -= 1
+    for j in range(k, n_buys):
+        amount = buy_amount[j]
+        fill_price = buy_price[j] * (1 + slippage_pct / 100)
+        fee = fill_price * amount * fee_pct / 100
+        acct[CAPITAL] -= fill_price * amount + fee
+        acct[BTC_HELD] += amount
+        acct[TOTAL_FEES] += fee
+        filled[counters[N_FILLED]] = buy_index[j]
+        counters[N_FILLED] += 1
+        # the counter sell can still fill on this candle
+        if not np.isnan(counter_price[j]):
+            counters[N_SELLS] = insert_sell(
+                sell_price, sell_amount, counters[N_SELLS],
+                counter_price[j], counter_amount[j],
+            )
+    counters[N_BUYS] = k
+
+    # sells fill when high >= price: the head of the ascending book
+    n_sells = counters[N_SELLS]
+    m = 0
+    while m < n_sells and sell_price[m] <= high:
+        m += 1
+    for j in range(m):
+        amount = sell_amount[j]
+        fill_price = sell_price[j] * (1 - slippage_pct / 100)
+        fee = fill_price * amount * fee_pct / 100
+        revenue = fill_price * amount - fee
+        profit = revenue - sell_price[j] * amount
+        acct[CAPITAL] += revenue
+        acct[BTC_HELD] -= amount
+        acct[TOTAL_FEES] += fee
+        acct[DAILY_PNL] += profit
+
+        t = counters[N_TRADES]
+        trades[TRADE_BUY_PRICE, t] = sell_price[j] - spacing
+        trades[TRADE_SELL_PRICE, t] = fill_price
+        trades[TRADE_AMOUNT, t] = amount
+        trades[TRADE_PROFIT, t] = profit
+        trades[TRADE_FEE, t] = fee
+        trades[TRADE_NET, t] = profit - fee
+        counters[N_TRADES] = t + 1
+    if m > 0:
+        for j in range(m, n_sells):
+            sell_price[j - m] = sell_price[j]
+            sell_amount[j - m] = sell_amount[j]
+        counters[N_SELLS] = n_sells - m
+
+
+@njit(cache=True)
+def run_core(start, end, resume, close, high, low, day_change, paused,
+             acct, counters, equity, initial_capital, limits, fee_pct,
+             slippage_pct, recalib_every, drift_pct, center, spacing,
+             buy_price, buy_amount, buy_index, counter_price, counter_amount,
+             sell_price, sell_amount, trades, filled):
+    # Simulates candles [start, end). With resume set, candle `start` was
+    # already checked and its grid just recalculated, so it goes straight
+    # to the fill check. Returns (exit code, candle index).
+    for i in range(start, end):
+        price = close[i]
+        if not (resume and i == start):
+            if day_change[i]:
+                acct[DAILY_PNL] = 0.0
+                counters[DAILY_ORDERS] = 0
+
+            halt = _risk_halt(acct, counters[DAILY_ORDERS], initial_capital, limits)
+            if halt != 0:
+                counters[HALTED] += 1
+                equity[counters[EQUITY_IDX]] = acct[CAPITAL] + acct[BTC_HELD] * price
+                counters[EQUITY_IDX] += 1
+                if halt == 2:
+                    return EMERGENCY_STOP, i
+                continue
+
+            if paused[i]:
+                equity[counters[EQUITY_IDX]] = acct[CAPITAL] + acct[BTC_HELD] * price
+                counters[EQUITY_IDX] += 1
+                continue
+
+            if (np.isnan(center) or i % recalib_every == 0
+                    or abs(price - center) / center * 100 > drift_pct):
+                return RECALIBRATE, i
+
+        _check_fills(
+            low[i], high[i], acct, counters, fee_pct, slippage_pct, spacing,
+            buy_price, buy_amount, buy_index, counter_price, counter_amount,
+            sell_price, sell_amount, trades, filled,
+        )
+
+        value = acct[CAPITAL] + acct[BTC_HELD] * price
+        equity[counters[EQUITY_IDX]] = value
+        counters[EQUITY_IDX] += 1
+        if value > acct[PEAK_CAPITAL]:
+            acct[PEAK_CAPITAL] = value
+    return DONE, end
@@ -5,15 +5,31 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 import pandas as pd
 
-from ai.volatility_classifier import VolatilityClassifier, VolatilityRegime
+from ai._kernels import adx_last, rsi_last
+from ai.volatility_classifier import (
+    REGIME_LABELS,
+    VolatilityClassifier,
+    VolatilityRegime,
+    compute_feature_matrix,
+)
 from ai.trend_detector import TrendDetector, TrendState
+from backtesting import _core
 from backtesting.metrics import compute_all_metrics
-from core.grid_engine import GridEngine, GridSide
-from risk.risk_manager import RiskAction, RiskManager
+from core.grid_engine import DEFAULT_RECALIBRATE_PCT, GridEngine, GridSide
+from risk.risk_manager import RiskManager
 
 logger = logging.getLogger(__name__)
 
 
+def _windowed(kernel: Any, arrays: tuple, period: int, window: int) -> np.ndarray:
+    # kernel(*arrays, period) evaluated on the window candles ending at
+    # each row; rows without a full window are NaN
+    out = np.full(len(arrays[-1]), np.nan)
+    for i in range(window - 1, len(out)):
+        out[i] = kernel(*(a[i - window + 1:i + 1] for a in arrays), period)
+    return out
+
+
 class BacktestEngine:
     def __init__(
         self,
@@ -34,6 +50,7 @@ class BacktestEngine:
         self._fee_pct = fee_pct
         self._slippage_pct = slippage_pct
         self._use_ai = use_ai
+        self._num_grids = num_grids
         self._regime_multipliers = regime_multipliers or {
             "LOW": 0.7, "MEDIUM": 1.0, "HIGH": 1.5
         }
@@ -62,9 +79,10 @@ class BacktestEngine:
         self._daily_order_count: int = 0
         self._last_day: str = ""
 
-        self._equity_curve: List[float] = []
-        self._trades: List[Dict[str, Any]] = []
-        self._open_orders: List[Dict[str, Any]] = []
+        self._equity_curve: np.ndarray = np.empty(0, dtype=np.float64)
+        self._equity_idx: int = 0
+        self._trade_log: np.ndarray = np.empty((len(_core.TRADE_FIELDS), 0), dtype=np.float64)
+        self._trade_n: int = 0
 
     def run(self, df: pd.DataFrame, recalib_every: int = 720) -> Dict[str, Any]:
         start_time = time.time()
@@ -77,170 +95,215 @@ class BacktestEngine:
             self._volatility.load_model()
 
         lookback = 100
-        last_grid_price: Optional[float] = None
-        last_regime_check = 0
-        last_trend_check = 0
-        paused = False
-
-        for i in range(lookback, len(df)):
-            row = df.iloc[i]
-            price = float(row["close"])
-            current_day = str(row["timestamp"])[:10] if "timestamp" in df.columns else ""
-
-            if current_day != self._last_day:
-                self._daily_pnl = 0.0
-                self._daily_order_count = 0
-                self._last_day = current_day
-
-            if i - last_trend_check >= 12:
-                window = df.iloc[max(0, i - lookback):i + 1]
-                if len(window) >= 50:
-                    signal = self._trend.analyze(window)
-                    if signal.should_pause:
-                        paused = True
-                    else:
-                        paused = False
-                last_trend_check = i
-
-            if self._use_ai and i - last_regime_check >= 12:
-                window = df.iloc[max(0, i - 200):i + 1]
-                if len(window) >= 50:
-                    regime, confidence = self._volatility.predict(window)
-                    mult = self._regime_multipliers.get(regime.value, 1.0)
-                    self._grid.set_regime_multiplier(mult)
-                last_regime_check = i
-
-            risk_status = self._risk.evaluate(
-                drawdown_pct=self._drawdown_pct(),
-                capital_deployed_pct=self._capital_deployed_pct(),
-                daily_pnl=self._daily_pnl,
-                daily_order_count=self._daily_order_count,
-                total_fees=self._total_fees,
-                initial_capital=self._initial_capital,
+        check_every = 12
+        n = len(df)
+        self._equity_curve = np.empty(max(0, n - lookback), dtype=np.float64)
+        self._equity_idx = 0
+
+        close = df["close"].to_numpy(dtype=np.float64)
+        high = df["high"].to_numpy(dtype=np.float64) if "high" in df.columns else close
+        low = df["low"].to_numpy(dtype=np.float64) if "low" in df.columns else close
+        if "timestamp" in df.columns:
+            days = df["timestamp"].astype(str).str[:10].to_numpy()
+        else:
+            days = np.full(n, "", dtype=object)
+
+        day_change = np.zeros(n, dtype=np.bool_)
+        if n > lookback:
+            prev_days = np.concatenate([[self._last_day], days[lookback:-1]])
+            day_change[lookback:] = days[lookback:] != prev_days
+
+        signals = self.precompute_signals(high, low, close, lookback, check_every)
+        # trend pause and regime multiplier hold from one check to the next
+        check_rows = np.arange(lookback, n, check_every)
+        carried = (np.arange(n) - lookback) // check_every
+        paused = np.zeros(n, dtype=np.bool_)
+        regime_mult = np.ones(n, dtype=np.float64)
+        if n > lookback:
+            should_pause = np.array([
+                self._trend.analyze_scalar(
+                    float(signals["ma_fast"][i]), float(signals["ma_slow"][i]),
+                    float(signals["rsi"][i]), float(signals["adx"][i]),
+                ).should_pause
+                for i in check_rows.tolist()
+            ])
+            paused[lookback:] = should_pause[carried[lookback:]]
+            regime_mult[lookback:] = signals["regime_mult"][check_rows][carried[lookback:]]
+
+        acct = np.array([
+            self._capital, self._btc_held, self._peak_capital,
+            self._total_fees, self._daily_pnl,
+        ], dtype=np.float64)
+        counters = np.zeros(_core.NUM_COUNTERS, dtype=np.int64)
+        counters[_core.DAILY_ORDERS] = self._daily_order_count
+        book = _core.SimBook(self._num_grids + 1)
+        counters[_core.N_TRADES] = self._trade_n
+        limits = self._risk.limits()
+        risk_limits = np.array([
+            limits["max_drawdown_pct"],
+            limits["emergency_stop_loss_pct"],
+            limits["max_capital_deployed_pct"],
+            limits["daily_loss_cap_usdt"],
+            limits["max_orders_per_day"],
+        ], dtype=np.float64)
+
+        # The compiled core runs until the grid needs recalculating; the grid
+        # itself is rebuilt here so GridEngine keeps owning level prices.
+        i = lookback
+        resume = False
+        center = np.nan
+        spacing = 0.0
+        last_i = n - 1
+        while i < n:
+            # a segment fills at most one sell per order the book can hold
+            self._reserve_trades(int(counters[_core.N_TRADES]), len(book.buy_price))
+            status, i = _core.run_core(
+                i, n, resume, close, high, low, day_change, paused,
+                acct, counters, self._equity_curve, self._initial_capital,
+                risk_limits, self._fee_pct, self._slippage_pct, recalib_every,
+                DEFAULT_RECALIBRATE_PCT, center, spacing,
+                book.buy_price, book.buy_amount, book.buy_index,
+                book.counter_price, book.counter_amount,
+                book.sell_price, book.sell_amount, self._trade_log, book.filled,
+            )
+            self._collect_fills(book, counters)
+            if status == _core.EMERGENCY_STOP:
+                logger.warning("Emergency stop at candle %d", i)
+                last_i = i
+                break
+            if status == _core.DONE:
+                break
+
+            if self._use_ai:
+                self._grid.set_regime_multiplier(float(regime_mult[i]))
+            state = self._grid.calculate_grid(float(close[i]))
+            counters[_core.N_BUYS] = 0
+            counters[_core.N_SELLS] = 0
+            self._place_grid_orders(book, acct, counters)
+            center = state.center_price
+            spacing = state.spacing
+            resume = True
+
+        if counters[_core.HALTED]:
+            logger.warning(
+                "Risk limits halted trading on %d candles", counters[_core.HALTED]
             )
 
-            if risk_status.overall_action in (RiskAction.PAUSE, RiskAction.EMERGENCY_STOP):
-                equity = self._capital + self._btc_held * price
-                self._equity_curve.append(equity)
-                if risk_status.overall_action == RiskAction.EMERGENCY_STOP:
-                    logger.warning("Emergency stop at candle %d", i)
-                    break
-                continue
-
-            if paused:
-                equity = self._capital + self._btc_held * price
-                self._equity_curve.append(equity)
-                continue
-
-            if last_grid_price is None or (i % recalib_every == 0) or self._grid.should_recalibrate(price):
-                self._cancel_all_sim_orders()
-                self._grid.calculate_grid(price)
-                last_grid_price = price
-                self._place_grid_orders(price)
-
-            self._check_fills(price, float(row.get("low", price)), float(row.get("high", price)))
-
-            equity = self._capital + self._btc_held * price
-            self._equity_curve.append(equity)
-            if equity > self._peak_capital:
-                self._peak_capital = equity
+        (self._capital, self._btc_held, self._peak_capital,
+         self._total_fees, self._daily_pnl) = acct.tolist()
+        self._daily_order_count = int(counters[_core.DAILY_ORDERS])
+        self._equity_idx = int(counters[_core.EQUITY_IDX])
+        self._trade_n = int(counters[_core.N_TRADES])
+        if n > lookback:
+            self._last_day = days[last_i]
 
         elapsed = time.time() - start_time
         metrics = compute_all_metrics(
-            self._equity_curve, self._trades, self._initial_capital
+            self.equity_curve, self.trade_columns, self._initial_capital
         )
         metrics["elapsed_seconds"] = round(elapsed, 2)
         metrics["candles_processed"] = len(df) - lookback
 
-        logger.info("Backtest complete in %.2fs: %d trades", elapsed, len(self._trades))
+        logger.info("Backtest complete in %.2fs: %d trades", elapsed, self._trade_n)
         return metrics
 
-    def _place_grid_orders(self, current_price: float) -> None:
+    def precompute_signals(
+        self,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        lookback: int = 100,
+        check_every: int = 12,
+    ) -> Dict[str, np.ndarray]:
+        # Trend inputs for every candle plus the regime multiplier at each
+        # check (candles lookback, lookback + check_every, ...; NaN elsewhere).
+        signals = self._trend.indicator_series(high, low, close)
+
+        # the trend window is the last lookback + 1 candles
+        window = lookback + 1
+        for key, period in (
+            ("ma_fast", self._trend.ma_fast_period),
+            ("ma_slow", self._trend.ma_slow_period),
+        ):
+            if period > window:
+                signals[key] = np.full(len(close), np.nan)
+        # RSI and ADX periods long enough to reach the window's first candle
+        # see it without a previous close (or not at all), so the
+        # full-history series no longer match; evaluate those on the window
+        if self._trend.rsi_period >= window:
+            signals["rsi"] = _windowed(rsi_last, (close,), self._trend.rsi_period, window)
+        if 2 * self._trend.adx_period - 1 >= window:
+            signals["adx"] = _windowed(
+                adx_last, (high, low, close), self._trend.adx_period, window
+            )
+
+        regime_mult = np.full(len(close), np.nan)
+        if self._use_ai:
+            rows = np.arange(lookback, len(close), check_every)
+            features = compute_feature_matrix(high, low, close)
+            labels, _ = self._volatility.predict_batch(features[rows])
+            regime_mult[rows] = [
+                self._regime_multipliers.get(
+                    REGIME_LABELS.get(label, VolatilityRegime.MEDIUM).value, 1.0
+                )
+                for label in labels.tolist()
+            ]
+        signals["regime_mult"] = regime_mult
+        return signals
+
+    def _place_grid_orders(
+        self, book: _core.SimBook, acct: np.ndarray, counters: np.ndarray
+    ) -> None:
         orders_to_place = self._grid.get_orders_to_place()
         for level in orders_to_place:
             amount = self._grid.get_order_amount(level.price)
             if level.side == GridSide.BUY:
                 cost = level.price * amount
-                if cost > self._capital:
+                if cost > acct[_core.CAPITAL]:
                     continue
-            self._open_orders.append({
-                "index": level.index,
-                "side": level.side.value,
-                "price": level.price,
-                "amount": amount,
-            })
-            self._grid.mark_order_placed(level.index, f"sim-{level.index}")
-            self._daily_order_count += 1
-
-    def _check_fills(self, close: float, low: float, high: float) -> None:
-        filled = []
-        for order in self._open_orders:
-            if order["side"] == "buy" and low <= order["price"]:
-                fill_price = order["price"] * (1 + self._slippage_pct / 100)
-                fee = fill_price * order["amount"] * self._fee_pct / 100
-                self._capital -= fill_price * order["amount"] + fee
-                self._btc_held += order["amount"]
-                self._total_fees += fee
-                filled.append(order)
-                self._grid.mark_order_filled(f"sim-{order['index']}")
-
-                counter = self._grid.get_counter_order(
-                    self._grid.state.levels[0].__class__(
-                        price=order["price"],
-                        side=GridSide.BUY,
-                        index=order["index"],
-                        filled=True,
-                    )
+                # the grid does not move until the next recalculation, so the
+                # counter sell is already known when the buy is placed
+                counter = self._grid.get_counter_order(level)
+                counters[_core.N_BUYS] = _core.insert_buy(
+                    book.buy_price, book.buy_amount, book.buy_index,
+                    book.counter_price, book.counter_amount,
+                    counters[_core.N_BUYS], level.price, amount, level.index,
+                    counter["price"] if counter else np.nan,
+                    counter["amount"] if counter else np.nan,
+                )
+            else:
+                counters[_core.N_SELLS] = _core.insert_sell(
+                    book.sell_price, book.sell_amount,
+                    counters[_core.N_SELLS], level.price, amount,
                 )
-                if counter:
-                    self._open_orders.append({
-                        "index": order["index"] + 1000,
-                        "side": counter["side"],
-                        "price": counter["price"],
-                        "amount": counter["amount"],
-                    })
-
-            elif order["side"] == "sell" and high >= order["price"]:
-                fill_price = order["price"] * (1 - self._slippage_pct / 100)
-                fee = fill_price * order["amount"] * self._fee_pct / 100
-                revenue = fill_price * order["amount"] - fee
-                self._capital += revenue
-                self._btc_held -= order["amount"]
-                self._total_fees += fee
-                filled.append(order)
-
-                profit = revenue - order["price"] * order["amount"]
-                self._daily_pnl += profit
-                self._trades.append({
-                    "buy_price": order["price"] - self._grid.state.spacing if self._grid.state else order["price"],
-                    "sell_price": fill_price,
-                    "amount": order["amount"],
-                    "profit_usdt": profit,
-                    "fee_usdt": fee,
-                    "net_profit_usdt": profit - fee,
-                })
-
-        for f in filled:
-            self._open_orders.remove(f)
-
-    def _cancel_all_sim_orders(self) -> None:
-        self._open_orders.clear()
-
-    def _drawdown_pct(self) -> float:
-        if self._peak_capital <= 0:
-            return 0.0
-        return (self._peak_capital - self._capital) / self._peak_capital * 100
-
-    def _capital_deployed_pct(self) -> float:
-        if self._initial_capital <= 0:
-            return 0.0
-        deployed = self._initial_capital - self._capital
-        return max(0.0, deployed / self._initial_capital * 100)
+            self._grid.mark_order_placed(level.index, f"sim-{level.index}")
+            counters[_core.DAILY_ORDERS] += 1
+
+    def _collect_fills(self, book: _core.SimBook, counters: np.ndarray) -> None:
+        for index in book.filled[:counters[_core.N_FILLED]].tolist():
+            self._grid.mark_order_filled(f"sim-{index}")
+        counters[_core.N_FILLED] = 0
+
+    def _reserve_trades(self, used: int, extra: int) -> None:
+        capacity = self._trade_log.shape[1]
+        if used + extra <= capacity:
+            return
+        grown = np.empty((len(_core.TRADE_FIELDS), max(used + extra, 2 * capacity, 256)))
+        grown[:, :used] = self._trade_log[:, :used]
+        self._trade_log = grown
 
     @property
-    def equity_curve(self) -> List[float]:
-        return self._equity_curve
+    def equity_curve(self) -> np.ndarray:
+        return self._equity_curve[:self._equity_idx]
+
+    @property
+    def trade_columns(self) -> Dict[str, np.ndarray]:
+        return {
+            name: self._trade_log[row, :self._trade_n]
+            for row, name in enumerate(_core.TRADE_FIELDS)
+        }
 
     @property
     def trades(self) -> List[Dict[str, Any]]:
-        return self._trades
+        columns = self._trade_log[:, :self._trade_n].T.tolist()
+        return [dict(zip(_core.TRADE_FIELDS, row)) for row in columns]
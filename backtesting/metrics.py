@@ -1,65 +1,130 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Mapping, Sequence, Union
 
 import numpy as np
 
+from core._njit import NUMBA_AVAILABLE, njit
+
 logger = logging.getLogger(__name__)
 
+FloatSeries = Union[Sequence[float], np.ndarray]
+
+
+def _as_float_array(values: FloatSeries) -> np.ndarray:
+    if isinstance(values, np.ndarray) and values.dtype == np.float64:
+        return values
+    return np.asarray(values, dtype=np.float64)
+
+
+@njit(cache=True)
+def _mean_std(arr):
+    # mean and sample std (ddof=1) in one Welford pass
+    mean = 0.0
+    m2 = 0.0
+    for i in range(arr.shape[0]):
+        delta = arr[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (arr[i] - mean)
+    return mean, np.sqrt(m2 / (arr.shape[0] - 1))
+
+
+@njit(cache=True)
+def _mean_downside_std(arr):
+    # mean of all values plus count and sample std of the negative ones,
+    # in one pass; the std is NaN for fewer than two negatives
+    mean = 0.0
+    n_down = 0
+    down_mean = 0.0
+    down_m2 = 0.0
+    for i in range(arr.shape[0]):
+        value = arr[i]
+        mean += (value - mean) / (i + 1)
+        if value < 0:
+            n_down += 1
+            delta = value - down_mean
+            down_mean += delta / n_down
+            down_m2 += delta * (value - down_mean)
+    if n_down < 2:
+        return mean, n_down, np.nan
+    return mean, n_down, np.sqrt(down_m2 / (n_down - 1))
+
 
 def compute_sharpe_ratio(
-    returns: List[float], risk_free_rate: float = 0.0, periods_per_year: float = 252 * 288
+    returns: FloatSeries, risk_free_rate: float = 0.0, periods_per_year: float = 252 * 288
 ) -> float:
-    if not returns or len(returns) < 2:
+    if len(returns) < 2:
         return 0.0
-    arr = np.array(returns, dtype=float)
-    excess = arr - risk_free_rate / periods_per_year
-    mean_ret = np.mean(excess)
-    std_ret = np.std(excess, ddof=1)
+    arr = _as_float_array(returns)
+    if NUMBA_AVAILABLE:
+        mean_ret, std_ret = _mean_std(arr)
+        mean_ret -= risk_free_rate / periods_per_year
+    else:
+        excess = arr - risk_free_rate / periods_per_year
+        mean_ret = np.mean(excess)
+        std_ret = np.std(excess, ddof=1)
     if std_ret == 0:
         return 0.0
     return float(mean_ret / std_ret * np.sqrt(periods_per_year))
 
 
-def compute_max_drawdown(equity_curve: List[float]) -> float:
-    if not equity_curve or len(equity_curve) < 2:
+@njit(cache=True)
+def _max_drawdown_pct(arr):
+    # single pass, no peak/drawdown temporaries
+    peak = arr[0]
+    max_dd = 0.0
+    for i in range(1, arr.shape[0]):
+        if arr[i] > peak:
+            peak = arr[i]
+        dd = (peak - arr[i]) / peak * 100
+        if dd > max_dd:
+            max_dd = dd
+    return max_dd
+
+
+def compute_max_drawdown(equity_curve: FloatSeries) -> float:
+    if len(equity_curve) < 2:
         return 0.0
-    arr = np.array(equity_curve, dtype=float)
+    arr = _as_float_array(equity_curve)
+    if NUMBA_AVAILABLE:
+        return float(_max_drawdown_pct(arr))
     peak = np.maximum.accumulate(arr)
     drawdown = (peak - arr) / peak * 100
     return float(np.max(drawdown))
 
 
-def compute_win_rate(trades: List[Dict[str, Any]]) -> float:
-    if not trades:
+def compute_win_rate(net_profits: FloatSeries) -> float:
+    if len(net_profits) == 0:
         return 0.0
-    wins = sum(1 for t in trades if t.get("net_profit_usdt", 0) > 0)
-    return wins / len(trades) * 100
+    net = _as_float_array(net_profits)
+    return int(np.count_nonzero(net > 0)) / len(net) * 100
 
 
-def compute_profit_factor(trades: List[Dict[str, Any]]) -> float:
-    gross_profit = sum(
-        t["net_profit_usdt"] for t in trades if t.get("net_profit_usdt", 0) > 0
-    )
-    gross_loss = abs(
-        sum(t["net_profit_usdt"] for t in trades if t.get("net_profit_usdt", 0) < 0)
-    )
+def compute_profit_factor(net_profits: FloatSeries) -> float:
+    net = _as_float_array(net_profits)
+    gross_profit = float(np.sum(net[net > 0]))
+    gross_loss = abs(float(np.sum(net[net < 0])))
     if gross_loss == 0:
         return float("inf") if gross_profit > 0 else 0.0
     return gross_profit / gross_loss
 
 
 def compute_sortino_ratio(
-    returns: List[float], risk_free_rate: float = 0.0, periods_per_year: float = 252 * 288
+    returns: FloatSeries, risk_free_rate: float = 0.0, periods_per_year: float = 252 * 288
 ) -> float:
-    if not returns or len(returns) < 2:
+    if len(returns) < 2:
         return 0.0
-    arr = np.array(returns, dtype=float)
-    excess = arr - risk_free_rate / periods_per_year
-    mean_ret = np.mean(excess)
-    downside = arr[arr < 0]
-    if len(downside) == 0:
+    arr = _as_float_array(returns)
+    if NUMBA_AVAILABLE:
+        mean_ret, n_down, downside_std = _mean_downside_std(arr)
+        mean_ret -= risk_free_rate / periods_per_year
+    else:
+        excess = arr - risk_free_rate / periods_per_year
+        mean_ret = np.mean(excess)
+        downside = arr[arr < 0]
+        n_down = len(downside)
+        downside_std = np.std(downside, ddof=1) if n_down > 1 else np.nan
+    if n_down == 0:
         return float("inf") if mean_ret > 0 else 0.0
-    downside_std = np.std(downside, ddof=1)
     if downside_std == 0:
         return 0.0
     return float(mean_ret / downside_std * np.sqrt(periods_per_year))
@@ -74,26 +139,29 @@ def compute_calmar_ratio(
 
 
 def compute_all_metrics(
-    equity_curve: List[float],
-    trades: List[Dict[str, Any]],
+    equity_curve: FloatSeries,
+    trades: Mapping[str, FloatSeries],
     initial_capital: float,
 ) -> Dict[str, Any]:
-    if not equity_curve:
+    # trades holds one column per trade field, e.g. trades["net_profit_usdt"]
+    if len(equity_curve) == 0:
         return {}
 
-    returns = []
-    for i in range(1, len(equity_curve)):
-        if equity_curve[i - 1] > 0:
-            returns.append(
-                (equity_curve[i] - equity_curve[i - 1]) / equity_curve[i - 1]
-            )
+    eq = _as_float_array(equity_curve)
+    prev = eq[:-1]
+    mask = prev > 0
+    returns = np.zeros_like(prev)
+    np.divide(eq[1:] - prev, prev, out=returns, where=mask)
+    returns = returns[mask]
 
-    final_equity = equity_curve[-1]
+    final_equity = float(eq[-1])
     total_return = final_equity - initial_capital
     total_return_pct = total_return / initial_capital * 100 if initial_capital > 0 else 0
-    max_dd = compute_max_drawdown(equity_curve)
+    max_dd = compute_max_drawdown(eq)
 
-    total_fees = sum(t.get("fee_usdt", 0) for t in trades)
+    net_profits = _as_float_array(trades.get("net_profit_usdt", ()))
+    num_trades = len(net_profits)
+    total_fees = float(np.sum(_as_float_array(trades.get("fee_usdt", ()))))
 
     return {
         "initial_capital": initial_capital,
@@ -104,11 +172,11 @@ def compute_all_metrics(
         "sharpe_ratio": round(compute_sharpe_ratio(returns), 4),
         "sortino_ratio": round(compute_sortino_ratio(returns), 4),
         "calmar_ratio": round(compute_calmar_ratio(total_return_pct, max_dd), 4),
-        "win_rate_pct": round(compute_win_rate(trades), 2),
-        "profit_factor": round(compute_profit_factor(trades), 4),
-        "total_trades": len(trades),
+        "win_rate_pct": round(compute_win_rate(net_profits), 2),
+        "profit_factor": round(compute_profit_factor(net_profits), 4),
+        "total_trades": num_trades,
         "total_fees_usdt": round(total_fees, 2),
         "avg_trade_profit": round(
-            total_return / len(trades), 4
-        ) if trades else 0,
+            total_return / num_trades, 4
+        ) if num_trades else 0,
     }
@@ -1,17 +1,36 @@
 import copy
+import hashlib
 import logging
 import os
 import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
 
 import yaml
-from jsonschema import ValidationError, validate
+from jsonschema import Draft7Validator, ValidationError
+from jsonschema.exceptions import best_match
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
 logger = logging.getLogger(__name__)
 
+RELOAD_DEBOUNCE_SECONDS = 0.25
+
+ENV_OVERRIDES = {
+    "GRIDAI_NUM_GRIDS": ("grid", "num_grids", int),
+    "GRIDAI_ORDER_SIZE": ("grid", "order_size_usdt", float),
+    "GRIDAI_MAX_DRAWDOWN": ("risk", "max_drawdown_pct", float),
+    "GRIDAI_MAX_CAPITAL": ("risk", "max_capital_deployed_pct", float),
+    "GRIDAI_DAILY_LOSS_CAP": ("risk", "daily_loss_cap_usdt", float),
+    "GRIDAI_LOG_LEVEL": ("logging", "level", str),
+}
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 CONFIG_SCHEMA = {
     "type": "object",
     "properties": {
@@ -53,6 +72,83 @@ CONFIG_SCHEMA = {
     "required": ["exchange", "grid", "risk"],
 }
 
+Draft7Validator.check_schema(CONFIG_SCHEMA)
+_VALIDATOR = Draft7Validator(CONFIG_SCHEMA)
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: (
+        (isinstance(v, int) and not isinstance(v, bool))
+        or (isinstance(v, float) and v.is_integer())
+    ),
+}
+
+
+def _compile_schema(schema: Dict[str, Any]) -> Callable[[Any], bool]:
+    # Straight-line predicate for the subset of Draft 7 CONFIG_SCHEMA uses;
+    # any other keyword fails at import rather than being skipped.
+    unsupported = set(schema) - {"type", "properties", "required", "minimum", "maximum"}
+    if unsupported:
+        raise ValueError(f"Unsupported schema keywords: {sorted(unsupported)}")
+
+    is_type = _TYPE_CHECKS[schema["type"]] if "type" in schema else None
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    required = tuple(schema.get("required", ()))
+    properties = tuple(
+        (name, _compile_schema(sub)) for name, sub in schema.get("properties", {}).items()
+    )
+
+    def check(value: Any) -> bool:
+        if is_type is not None and not is_type(value):
+            return False
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if minimum is not None and numeric and value < minimum:
+            return False
+        if maximum is not None and numeric and value > maximum:
+            return False
+        if isinstance(value, dict):
+            for name in required:
+                if name not in value:
+                    return False
+            for name, sub_check in properties:
+                if name in value and not sub_check(value[name]):
+                    return False
+        return True
+
+    return check
+
+
+_config_is_valid = _compile_schema(CONFIG_SCHEMA)
+
+
+def _validate(instance: Dict[str, Any]) -> None:
+    # The compiled check accepts valid configs without touching jsonschema;
+    # only a failing config goes through the full validator, so the error
+    # is the one jsonschema.validate() would raise.
+    if _config_is_valid(instance):
+        return
+    error = best_match(_VALIDATOR.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def _parse_yaml(data: bytes) -> Dict[str, Any]:
+    return yaml.load(data, Loader=_YamlLoader) or {}
+
+
+def _freeze(value: Any) -> Any:
+    # read-only view of a loaded config: dicts become mapping proxies and
+    # lists tuples, so readers can share it without copying
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
 
 def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
     result = copy.deepcopy(base)
@@ -65,18 +161,40 @@ def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]
 
 
 class ConfigReloadHandler(FileSystemEventHandler):
-    def __init__(self, config_manager: "ConfigManager") -> None:
+    def __init__(
+        self,
+        config_manager: "ConfigManager",
+        debounce_seconds: float = RELOAD_DEBOUNCE_SECONDS,
+    ) -> None:
         self._config_manager = config_manager
+        self._debounce_seconds = debounce_seconds
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
 
     def on_modified(self, event: Any) -> None:
         if event.is_directory:
             return
         if event.src_path.endswith(".yaml") or event.src_path.endswith(".yml"):
-            logger.info("Config file changed: %s — reloading", event.src_path)
-            try:
-                self._config_manager.reload()
-            except Exception:
-                logger.exception("Failed to reload config after file change")
+            logger.info("Config file changed: %s", event.src_path)
+            # editors emit several events per save; reload once they settle
+            with self._timer_lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self._debounce_seconds, self._reload)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def cancel(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _reload(self) -> None:
+        try:
+            self._config_manager.reload_if_changed()
+        except Exception:
+            logger.exception("Failed to reload config after file change")
 
 
 class ConfigManager:
@@ -89,83 +207,112 @@ class ConfigManager:
         self._config_dir = Path(config_dir)
         self._profile = profile
         self._override_file = override_file
-        self._config: Dict[str, Any] = {}
-        self._lock = threading.RLock()
+        self._config: Mapping[str, Any] = MappingProxyType({})
+        self._version = 0
+        # serializes reloads only; readers never lock and see either the old
+        # or the new snapshot
+        self._reload_lock = threading.Lock()
+        self._source_digest: Optional[bytes] = None
         self._observer: Optional[Observer] = None
+        self._handler: Optional[ConfigReloadHandler] = None
         self.reload()
 
     def reload(self) -> None:
-        with self._lock:
-            default_path = self._config_dir / "default.yaml"
-            if not default_path.exists():
-                raise FileNotFoundError(f"Default config not found: {default_path}")
-
-            with open(default_path) as f:
-                base = yaml.safe_load(f) or {}
-
-            if self._profile != "default":
-                profile_path = self._config_dir / f"{self._profile}.yaml"
-                if profile_path.exists():
-                    with open(profile_path) as f:
-                        profile_cfg = yaml.safe_load(f) or {}
-                    base = deep_merge(base, profile_cfg)
-                else:
-                    logger.warning("Profile config not found: %s", profile_path)
-
-            if self._override_file:
-                override_path = Path(self._override_file)
-                if override_path.exists():
-                    with open(override_path) as f:
-                        override_cfg = yaml.safe_load(f) or {}
-                    base = deep_merge(base, override_cfg)
-
-            self._apply_env_overrides(base)
+        self._reload(force=True)
+
+    def reload_if_changed(self) -> bool:
+        # Skips parsing and validation when the files and environment
+        # overrides are exactly what the current snapshot was built from.
+        return self._reload(force=False)
+
+    def _read_sources(self) -> List[bytes]:
+        # raw config files in merge order: default, profile, override
+        default_path = self._config_dir / "default.yaml"
+        if not default_path.exists():
+            raise FileNotFoundError(f"Default config not found: {default_path}")
+        sources = [default_path.read_bytes()]
+
+        if self._profile != "default":
+            profile_path = self._config_dir / f"{self._profile}.yaml"
+            if profile_path.exists():
+                sources.append(profile_path.read_bytes())
+            else:
+                logger.warning("Profile config not found: %s", profile_path)
+
+        if self._override_file:
+            override_path = Path(self._override_file)
+            if override_path.exists():
+                sources.append(override_path.read_bytes())
+        return sources
+
+    def _reload(self, force: bool) -> bool:
+        with self._reload_lock:
+            sources = self._read_sources()
+            digest = hashlib.blake2b(digest_size=16)
+            for data in sources:
+                digest.update(len(data).to_bytes(8, "little"))
+                digest.update(data)
+            env = os.environ
+            env_values = [env.get(key) for key in ENV_OVERRIDES]
+            digest.update(repr(env_values).encode())
+            source_digest = digest.digest()
+            if not force and source_digest == self._source_digest:
+                logger.debug("Config unchanged, skipping reload")
+                return False
+
+            base = _parse_yaml(sources[0])
+            for data in sources[1:]:
+                base = deep_merge(base, _parse_yaml(data))
+
+            if any(val is not None for val in env_values):
+                self._apply_env_overrides(base, env_values)
 
             try:
-                validate(instance=base, schema=CONFIG_SCHEMA)
+                _validate(base)
             except ValidationError as e:
                 logger.error("Config validation failed: %s", e.message)
                 raise
 
-            self._config = base
+            self._config = _freeze(base)
+            self._source_digest = source_digest
+            self._version += 1
             logger.info("Config loaded (profile=%s)", self._profile)
+            return True
 
-    def _apply_env_overrides(self, cfg: Dict[str, Any]) -> None:
-        env_map = {
-            "GRIDAI_NUM_GRIDS": ("grid", "num_grids", int),
-            "GRIDAI_ORDER_SIZE": ("grid", "order_size_usdt", float),
-            "GRIDAI_MAX_DRAWDOWN": ("risk", "max_drawdown_pct", float),
-            "GRIDAI_MAX_CAPITAL": ("risk", "max_capital_deployed_pct", float),
-            "GRIDAI_DAILY_LOSS_CAP": ("risk", "daily_loss_cap_usdt", float),
-            "GRIDAI_LOG_LEVEL": ("logging", "level", str),
-        }
-        for env_key, (section, key, typ) in env_map.items():
-            val = os.environ.get(env_key)
+    def _apply_env_overrides(
+        self, cfg: Dict[str, Any], values: List[Optional[str]]
+    ) -> None:
+        # values are the ENV_OVERRIDES variables as read for this reload
+        for (section, key, typ), val in zip(ENV_OVERRIDES.values(), values):
             if val is not None:
                 if section not in cfg:
                     cfg[section] = {}
                 cfg[section][key] = typ(val)
 
     def get(self, *keys: str, default: Any = None) -> Any:
-        with self._lock:
-            obj = self._config
-            for k in keys:
-                if isinstance(obj, dict) and k in obj:
-                    obj = obj[k]
-                else:
-                    return default
-            return copy.deepcopy(obj)
+        obj = self._config
+        for k in keys:
+            if isinstance(obj, Mapping) and k in obj:
+                obj = obj[k]
+            else:
+                return default
+        return obj
+
+    @property
+    def config(self) -> Mapping[str, Any]:
+        return self._config
 
     @property
-    def config(self) -> Dict[str, Any]:
-        with self._lock:
-            return copy.deepcopy(self._config)
+    def version(self) -> int:
+        # bumped on every successful reload
+        return self._version
 
     def start_watching(self) -> None:
         if self._observer is not None:
             return
         self._observer = Observer()
         handler = ConfigReloadHandler(self)
+        self._handler = handler
         self._observer.schedule(handler, str(self._config_dir), recursive=False)
         self._observer.daemon = True
         self._observer.start()
@@ -176,3 +323,6 @@ class ConfigManager:
             self._observer.stop()
             self._observer.join(timeout=5)
             self._observer = None
+        if self._handler is not None:
+            self._handler.cancel()
+            self._handler = None
@@ -1,18 +1,31 @@
 import logging
 import math
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_RECALIBRATE_PCT = 2.0
+
 
-class GridSide(str, Enum):
-    BUY = "buy"
-    SELL = "sell"
+class GridSide(IntEnum):
+    # stored as these codes in GridState.sides
+    BUY = 0
+    SELL = 1
+
+    @property
+    def label(self) -> str:
+        # exchange / API spelling
+        return _SIDE_LABELS[self]
 
 
-@dataclass
+_SIDE_LABELS = ("buy", "sell")
+
+
+@dataclass(slots=True)
 class GridLevel:
     price: float
     side: GridSide
@@ -22,9 +35,23 @@ class GridLevel:
     filled: bool = False
 
 
-@dataclass
+_SIDES = (GridSide.BUY, GridSide.SELL)
+
+
+@dataclass(eq=False)
 class GridState:
-    levels: List[GridLevel] = field(default_factory=list)
+    # Levels as parallel arrays, one row per level in ascending price order.
+    # Order ids are assumed unique within a grid.
+    prices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    sides: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint8))
+    indices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    is_active: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.bool_))
+    filled: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.bool_))
+    order_ids: List[Optional[str]] = field(default_factory=list)
+    # counter order for a fill of each level, fixed until the next calculate_grid
+    counter_orders: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    # rounded order amount by level price, for get_order_amount()
+    order_amounts: Dict[float, float] = field(default_factory=dict)
     center_price: float = 0.0
     upper_bound: float = 0.0
     lower_bound: float = 0.0
@@ -32,6 +59,112 @@ class GridState:
     spacing: float = 0.0
     regime_multiplier: float = 1.0
 
+    def __post_init__(self) -> None:
+        self._index_to_pos: Dict[int, int] = {}
+        for pos, index in enumerate(self.indices.tolist()):
+            self._index_to_pos.setdefault(index, pos)
+        self._id_to_pos: Dict[str, int] = {}
+        for pos, order_id in enumerate(self.order_ids):
+            if order_id is not None:
+                self._id_to_pos.setdefault(order_id, pos)
+        self._levels: Optional[List[GridLevel]] = None
+        # is_active is published read-only so every change goes through
+        # set_active() and the running count cannot drift
+        self._active = np.array(self.is_active, dtype=np.bool_)
+        self.is_active = self._active.view()
+        self.is_active.flags.writeable = False
+        self._active_count = int(np.count_nonzero(self._active))
+
+    @property
+    def levels(self) -> List[GridLevel]:
+        # write-through views, so callers can keep treating levels as objects
+        if self._levels is None:
+            self._levels = [_LevelView(self, pos) for pos in range(len(self.prices))]
+        return self._levels
+
+    @property
+    def active_count(self) -> int:
+        return self._active_count
+
+    def set_active(self, pos: int, value: bool) -> None:
+        value = bool(value)
+        if self._active[pos] != value:
+            self._active[pos] = value
+            self._active_count += 1 if value else -1
+
+    def position_of_index(self, index: int) -> Optional[int]:
+        return self._index_to_pos.get(index)
+
+    def position_of_order(self, order_id: str) -> Optional[int]:
+        return self._id_to_pos.get(order_id)
+
+    def set_order_id(self, pos: int, order_id: Optional[str]) -> None:
+        old = self.order_ids[pos]
+        if old is not None and self._id_to_pos.get(old) == pos:
+            del self._id_to_pos[old]
+        self.order_ids[pos] = order_id
+        if order_id is not None:
+            current = self._id_to_pos.get(order_id)
+            if current is None or current > pos:
+                self._id_to_pos[order_id] = pos
+
+
+class _LevelView(GridLevel):
+    # GridLevel backed by one row of a GridState's arrays
+    __slots__ = ("_state", "_pos")
+
+    def __init__(self, state: GridState, pos: int) -> None:
+        self._state = state
+        self._pos = pos
+
+    @property
+    def price(self) -> float:
+        return float(self._state.prices[self._pos])
+
+    @price.setter
+    def price(self, value: float) -> None:
+        self._state.prices[self._pos] = value
+
+    @property
+    def side(self) -> GridSide:
+        return _SIDES[self._state.sides[self._pos]]
+
+    @side.setter
+    def side(self, value: GridSide) -> None:
+        self._state.sides[self._pos] = value
+
+    @property
+    def index(self) -> int:
+        return int(self._state.indices[self._pos])
+
+    @index.setter
+    def index(self, value: int) -> None:
+        self._state.indices[self._pos] = value
+
+    @property
+    def order_id(self) -> Optional[str]:
+        return self._state.order_ids[self._pos]
+
+    @order_id.setter
+    def order_id(self, value: Optional[str]) -> None:
+        self._state.set_order_id(self._pos, value)
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self._state.is_active[self._pos])
+
+    @is_active.setter
+    def is_active(self, value: bool) -> None:
+        self._state.set_active(self._pos, value)
+
+    @property
+    def filled(self) -> bool:
+        return bool(self._state.filled[self._pos])
+
+    @filled.setter
+    def filled(self, value: bool) -> None:
+        self._state.filled[self._pos] = value
+
 
 class GridEngine:
     def __init__(
@@ -81,20 +214,19 @@ class GridEngine:
         total_range = upper_bound - lower_bound
         spacing = total_range / self._num_grids
 
-        levels: List[GridLevel] = []
-        for i in range(self._num_grids + 1):
-            price = lower_bound + i * spacing
-            price = round(price, 2)
-            if price < current_price:
-                side = GridSide.BUY
-            elif price > current_price:
-                side = GridSide.SELL
-            else:
-                continue
-            levels.append(GridLevel(price=price, side=side, index=i))
+        prices = np.round(lower_bound + np.arange(self._num_grids + 1) * spacing, 2)
+        is_buy = prices < current_price
+        # a level landing exactly on the current price gets no order
+        keep = np.flatnonzero(is_buy | (prices > current_price))
+        num_levels = len(keep)
 
         self._state = GridState(
-            levels=levels,
+            prices=prices[keep],
+            sides=np.where(is_buy[keep], GridSide.BUY, GridSide.SELL).astype(np.uint8),
+            indices=keep.astype(np.int64),
+            is_active=np.zeros(num_levels, dtype=np.bool_),
+            filled=np.zeros(num_levels, dtype=np.bool_),
+            order_ids=[None] * num_levels,
             center_price=current_price,
             upper_bound=round(upper_bound, 2),
             lower_bound=round(lower_bound, 2),
@@ -102,6 +234,18 @@ class GridEngine:
             spacing=round(spacing, 2),
             regime_multiplier=self._regime_multiplier,
         )
+        self._state.order_amounts = {
+            price: round(self._order_size_usdt / price, 8)
+            for price in self._state.prices.tolist()
+        }
+        self._state.counter_orders = [
+            self._compute_counter_order(price, _SIDES[side], index)
+            for price, side, index in zip(
+                self._state.prices.tolist(),
+                self._state.sides.tolist(),
+                self._state.indices.tolist(),
+            )
+        ]
 
         logger.info(
             "Grid calculated: center=%.2f, bounds=[%.2f, %.2f], spacing=%.2f, levels=%d",
@@ -109,7 +253,7 @@ class GridEngine:
             lower_bound,
             upper_bound,
             spacing,
-            len(levels),
+            num_levels,
         )
         return self._state
 
@@ -117,58 +261,74 @@ class GridEngine:
         if self._state is None or self._paused:
             return []
 
-        active_count = sum(1 for l in self._state.levels if l.is_active)
-        available_slots = self._max_open_orders - active_count
+        state = self._state
+        available_slots = self._max_open_orders - state.active_count
 
-        pending = [
-            l for l in self._state.levels if not l.is_active and not l.filled
-        ]
-        return pending[:available_slots]
+        pending = np.flatnonzero(~state.is_active & ~state.filled).tolist()
+        levels = state.levels
+        return [levels[pos] for pos in pending[:available_slots]]
 
     def mark_order_placed(self, index: int, order_id: str) -> None:
         if self._state is None:
             return
-        for level in self._state.levels:
-            if level.index == index:
-                level.order_id = order_id
-                level.is_active = True
-                logger.debug("Order placed at grid %d: %s", index, order_id)
-                return
+        pos = self._state.position_of_index(index)
+        if pos is None:
+            return
+        self._state.set_order_id(pos, order_id)
+        self._state.set_active(pos, True)
+        logger.debug("Order placed at grid %d: %s", index, order_id)
 
     def mark_order_filled(self, order_id: str) -> Optional[GridLevel]:
         if self._state is None:
             return None
-        for level in self._state.levels:
-            if level.order_id == order_id:
-                level.filled = True
-                level.is_active = False
-                logger.info(
-                    "Grid level %d filled at %.2f (%s)",
-                    level.index,
-                    level.price,
-                    level.side.value,
-                )
-                return level
-        return None
+        pos = self._state.position_of_order(order_id)
+        if pos is None:
+            return None
+        self._state.filled[pos] = True
+        self._state.set_active(pos, False)
+        level = self._state.levels[pos]
+        logger.info(
+            "Grid level %d filled at %.2f (%s)",
+            level.index,
+            level.price,
+            level.side.label,
+        )
+        return level
 
     def mark_order_cancelled(self, order_id: str) -> None:
         if self._state is None:
             return
-        for level in self._state.levels:
-            if level.order_id == order_id:
-                level.is_active = False
-                level.order_id = None
-                return
+        pos = self._state.position_of_order(order_id)
+        if pos is None:
+            return
+        self._state.set_active(pos, False)
+        self._state.set_order_id(pos, None)
 
     def get_counter_order(self, filled_level: GridLevel) -> Optional[Dict[str, Any]]:
         if self._state is None:
             return None
 
-        if filled_level.side == GridSide.BUY:
-            counter_price = filled_level.price + self._state.spacing
+        state = self._state
+        pos = state.position_of_index(filled_level.index)
+        if (
+            pos is not None
+            and state.prices[pos] == filled_level.price
+            and state.sides[pos] == filled_level.side
+        ):
+            counter = state.counter_orders[pos]
+            return dict(counter) if counter is not None else None
+        return self._compute_counter_order(
+            filled_level.price, filled_level.side, filled_level.index
+        )
+
+    def _compute_counter_order(
+        self, price: float, side: GridSide, index: int
+    ) -> Optional[Dict[str, Any]]:
+        if side == GridSide.BUY:
+            counter_price = price + self._state.spacing
             counter_side = GridSide.SELL
         else:
-            counter_price = filled_level.price - self._state.spacing
+            counter_price = price - self._state.spacing
             counter_side = GridSide.BUY
 
         if counter_price < self._state.lower_bound or counter_price > self._state.upper_bound:
@@ -176,46 +336,60 @@ class GridEngine:
 
         amount = self._order_size_usdt / counter_price
         return {
-            "side": counter_side.value,
+            "side": counter_side.label,
             "price": round(counter_price, 2),
             "amount": round(amount, 8),
-            "source_index": filled_level.index,
+            "source_index": index,
         }
 
-    def should_recalibrate(self, current_price: float, threshold_pct: float = 2.0) -> bool:
+    def should_recalibrate(
+        self, current_price: float, threshold_pct: float = DEFAULT_RECALIBRATE_PCT
+    ) -> bool:
         if self._state is None:
             return True
         drift = abs(current_price - self._state.center_price) / self._state.center_price * 100
         return drift > threshold_pct
 
     def get_order_amount(self, price: float) -> float:
+        if self._state is not None:
+            amount = self._state.order_amounts.get(price)
+            if amount is not None:
+                return amount
         return round(self._order_size_usdt / price, 8)
 
     def active_order_count(self) -> int:
         if self._state is None:
             return 0
-        return sum(1 for l in self._state.levels if l.is_active)
+        return self._state.active_count
 
     def to_dict(self) -> Dict[str, Any]:
         if self._state is None:
             return {}
+        state = self._state
         return {
-            "center_price": self._state.center_price,
-            "upper_bound": self._state.upper_bound,
-            "lower_bound": self._state.lower_bound,
-            "num_grids": self._state.num_grids,
-            "spacing": self._state.spacing,
-            "regime_multiplier": self._state.regime_multiplier,
+            "center_price": state.center_price,
+            "upper_bound": state.upper_bound,
+            "lower_bound": state.lower_bound,
+            "num_grids": state.num_grids,
+            "spacing": state.spacing,
+            "regime_multiplier": state.regime_multiplier,
             "paused": self._paused,
             "levels": [
                 {
-                    "index": l.index,
-                    "price": l.price,
-                    "side": l.side.value,
-                    "order_id": l.order_id,
-                    "is_active": l.is_active,
-                    "filled": l.filled,
+                    "index": index,
+                    "price": price,
+                    "side": _SIDE_LABELS[side],
+                    "order_id": order_id,
+                    "is_active": is_active,
+                    "filled": filled,
                 }
-                for l in self._state.levels
+                for index, price, side, order_id, is_active, filled in zip(
+                    state.indices.tolist(),
+                    state.prices.tolist(),
+                    state.sides.tolist(),
+                    state.order_ids,
+                    state.is_active.tolist(),
+                    state.filled.tolist(),
+                )
             ],
         }
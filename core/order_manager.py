@@ -1,13 +1,36 @@
+import json
 import logging
+import math
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Type
+
+import ccxt
+
+from core.timeutils import isoformat_ns, next_utc_midnight
 
 logger = logging.getLogger(__name__)
 
+RECONCILE_WORKERS = 8
+PLACE_WORKERS = 8
+CANCEL_WORKERS = 8
+
+# network errors where the exchange turned the request away before acting
+# on it; anything else (a timeout, a dropped connection) may have left part
+# of a batch live, so batches are never resent on those
+_BATCH_RETRY_ON: Tuple[Type[Exception], ...] = (
+    ccxt.DDoSProtection,
+    ccxt.ExchangeNotAvailable,
+    ccxt.InvalidNonce,
+)
+# the exchange doesn't batch this market at all
+_BATCH_REJECTED: Tuple[Type[Exception], ...] = (ccxt.NotSupported, ccxt.BadRequest)
 
-@dataclass
+
+@dataclass(slots=True)
 class OrderRecord:
     order_id: str
     side: str
@@ -15,12 +38,27 @@ class OrderRecord:
     amount: float
     status: str
     grid_index: int
-    created_at: str = field(
-        default_factory=lambda: datetime.now(timezone.utc).isoformat()
-    )
-    filled_at: Optional[str] = None
+    # epoch nanoseconds, formatted by the properties below
+    created_at_ns: int = field(default_factory=time.time_ns)
+    filled_at_ns: Optional[int] = None
     fee: float = 0.0
 
+    @property
+    def created_at(self) -> str:
+        return isoformat_ns(self.created_at_ns)
+
+    @property
+    def filled_at(self) -> Optional[str]:
+        if self.filled_at_ns is None:
+            return None
+        return isoformat_ns(self.filled_at_ns)
+
+
+_RECORD_KEYS = (
+    "order_id", "side", "price", "amount", "status", "grid_index",
+    "created_at", "filled_at", "fee",
+)
+
 
 class OrderManager:
     def __init__(
@@ -35,6 +73,14 @@ class OrderManager:
         rate_limit_per_second: float = 5.0,
         place_buy_order_fn: Optional[Callable[[float, float], Dict[str, Any]]] = None,
         place_sell_order_fn: Optional[Callable[[float, float], Dict[str, Any]]] = None,
+        max_backoff: float = 30.0,
+        retry_jitter: float = 0.5,
+        fetch_orders_batch_fn: Optional[Callable[[List[str]], List[Dict[str, Any]]]] = None,
+        place_orders_batch_fn: Optional[
+            Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+        ] = None,
+        cancel_orders_batch_fn: Optional[Callable[[List[str]], Any]] = None,
+        max_batch_orders: Optional[int] = None,
     ) -> None:
         self._place_order_fn = place_order_fn
         self._place_buy_order_fn = place_buy_order_fn
@@ -42,15 +88,27 @@ class OrderManager:
         self._cancel_order_fn = cancel_order_fn
         self._fetch_order_fn = fetch_order_fn
         self._fetch_open_orders_fn = fetch_open_orders_fn
+        self._fetch_orders_batch_fn = fetch_orders_batch_fn
+        self._place_orders_batch_fn = place_orders_batch_fn
+        self._cancel_orders_batch_fn = cancel_orders_batch_fn
+        self._max_batch_orders = max_batch_orders
         self._dry_run = dry_run
         self._max_retries = max_retries
         self._retry_backoff = retry_backoff
+        self._max_backoff = max_backoff
+        self._retry_jitter = retry_jitter
         self._min_interval = 1.0 / rate_limit_per_second
-        self._last_call_time: float = 0.0
+        self._last_call_time: float = float("-inf")
+        self._rate_lock = threading.Lock()
         self._orders: Dict[str, OrderRecord] = {}
+        # ids of open / closed records in placement order, and the running
+        # fee total; record status and fee changes go through this class
+        self._open_ids: Dict[str, None] = {}
+        self._closed_ids: Dict[str, None] = {}
+        self._total_fees: float = 0.0
         self._order_counter: int = 0
         self._daily_order_count: int = 0
-        self._daily_reset_date: str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        self._next_daily_reset: float = next_utc_midnight(time.time())
 
     @property
     def orders(self) -> Dict[str, OrderRecord]:
@@ -58,28 +116,62 @@ class OrderManager:
 
     @property
     def daily_order_count(self) -> int:
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if self._daily_reset_date != today:
+        now = time.time()
+        if now >= self._next_daily_reset:
             self._daily_order_count = 0
-            self._daily_reset_date = today
+            self._next_daily_reset = next_utc_midnight(now)
         return self._daily_order_count
 
+    def _add_record(self, record: OrderRecord) -> None:
+        old = self._orders.get(record.order_id)
+        if old is not None:
+            self._total_fees -= old.fee
+        self._orders[record.order_id] = record
+        self._total_fees += record.fee
+        self._index_status(record.order_id, record.status)
+
+    def _set_status(self, order_id: str, status: str) -> None:
+        self._orders[order_id].status = status
+        self._index_status(order_id, status)
+
+    def _index_status(self, order_id: str, status: str) -> None:
+        self._open_ids.pop(order_id, None)
+        self._closed_ids.pop(order_id, None)
+        if status == "open":
+            self._open_ids[order_id] = None
+        elif status == "closed":
+            self._closed_ids[order_id] = None
+
     def _rate_limit(self) -> None:
-        now = time.time()
-        elapsed = now - self._last_call_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_call_time = time.time()
+        # monotonic so wall-clock adjustments cannot stall or skip the limit;
+        # the lock hands out call slots one at a time across threads
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._min_interval - (now - self._last_call_time)
+            if wait > 0:
+                time.sleep(wait)
+                now += wait
+            self._last_call_time = now
 
-    def _retry_call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    def _retry_call(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        retry_on: Tuple[Type[Exception], ...] = (Exception,),
+        **kwargs: Any,
+    ) -> Any:
+        # errors outside retry_on are raised as they are, on the first attempt
         last_error: Optional[Exception] = None
         for attempt in range(self._max_retries):
             try:
                 self._rate_limit()
                 return fn(*args, **kwargs)
-            except Exception as e:
+            except retry_on as e:
                 last_error = e
-                wait = self._retry_backoff * (2 ** attempt)
+                if attempt == self._max_retries - 1:
+                    break
+                wait = min(self._retry_backoff * (2 ** attempt), self._max_backoff)
+                wait += random.uniform(0.0, self._retry_jitter)
                 logger.warning(
                     "Retry %d/%d after error: %s (waiting %.1fs)",
                     attempt + 1,
@@ -96,28 +188,109 @@ class OrderManager:
         self, side: str, price: float, amount: float, grid_index: int
     ) -> OrderRecord:
         if self._dry_run:
-            self._order_counter += 1
-            order_id = f"dry-{self._order_counter}"
-            record = OrderRecord(
-                order_id=order_id,
-                side=side,
-                price=price,
-                amount=amount,
-                status="open",
-                grid_index=grid_index,
-            )
-            self._orders[order_id] = record
-            self._daily_order_count += 1
-            logger.info(
-                "[DRY-RUN] Order placed: %s %s %.8f @ %.2f (grid=%d)",
-                order_id,
-                side,
-                amount,
-                price,
-                grid_index,
-            )
-            return record
+            return self._place_dry_run(side, price, amount, grid_index)
+        result = self._retry_call(self._place_fn(side), amount, price)
+        return self._record_placed(result, side, price, amount, grid_index)
+
+    def place_orders(
+        self, orders: List[Tuple[str, float, float, int]]
+    ) -> List[Optional[OrderRecord]]:
+        # Places (side, price, amount, grid_index) orders: batched requests of
+        # up to max_batch_orders when the exchange supports it, otherwise
+        # concurrent per-order requests that still share the rate limit.
+        # None marks a failure.
+        if self._dry_run:
+            return [self._place_dry_run(*order) for order in orders]
+        if not orders:
+            return []
 
+        results: List[Optional[Dict[str, Any]]] = [None] * len(orders)
+        single: List[int] = []
+        size = self._max_batch_orders or len(orders)
+        for start in range(0, len(orders), size):
+            chunk = range(start, min(start + size, len(orders)))
+            if self._place_orders_batch_fn is None or len(chunk) == 1:
+                single.extend(chunk)
+                continue
+            try:
+                placed = self._place_batch([orders[i] for i in chunk])
+            except _BATCH_REJECTED as e:
+                logger.warning("Batch orders rejected (%s); placing orders one at a time", e)
+                self._place_orders_batch_fn = None
+                single.extend(chunk)
+                continue
+            except Exception:
+                logger.exception("Failed to place batch of %d orders", len(chunk))
+                continue
+            for i, result in zip(chunk, placed):
+                results[i] = result
+
+        def place(i: int) -> Optional[Dict[str, Any]]:
+            side, price, amount, _ = orders[i]
+            try:
+                return self._retry_call(self._place_fn(side), amount, price)
+            except Exception:
+                logger.exception("Failed to place %s order at %.2f", side, price)
+                return None
+
+        if len(single) == 1:
+            results[single[0]] = place(single[0])
+        elif single:
+            workers = min(PLACE_WORKERS, len(single))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for i, result in zip(single, pool.map(place, single)):
+                    results[i] = result
+
+        records: List[Optional[OrderRecord]] = []
+        for order, result in zip(orders, results):
+            if result is None or result.get("id") is None:
+                records.append(None)
+            else:
+                records.append(self._record_placed(result, *order))
+        return records
+
+    def _place_batch(
+        self, orders: List[Tuple[str, float, float, int]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        specs = [
+            {"side": side, "price": price, "amount": amount}
+            for side, price, amount, _ in orders
+        ]
+        try:
+            return list(self._retry_call(
+                self._place_orders_batch_fn, specs, retry_on=_BATCH_RETRY_ON
+            ))
+        except ccxt.NetworkError as e:
+            # part of the batch may be live: pick up what the exchange has
+            # open instead of sending it again; the rest fail this round
+            logger.warning("Batch of %d orders may be partly placed (%s)", len(specs), e)
+            return self._match_open_orders(specs)
+
+    def _match_open_orders(
+        self, specs: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        if self._fetch_open_orders_fn is None:
+            return [None] * len(specs)
+        try:
+            exchange_orders = self._retry_call(self._fetch_open_orders_fn)
+        except Exception:
+            logger.exception("Failed to fetch open orders after a batch error")
+            return [None] * len(specs)
+        unknown = [o for o in exchange_orders if o.get("id") not in self._orders]
+        matched: List[Optional[Dict[str, Any]]] = []
+        for spec in specs:
+            # the exchange rounds prices to its tick size
+            found = next((
+                o for o in unknown
+                if o.get("side") == spec["side"]
+                and math.isclose(o.get("price") or 0.0, spec["price"], rel_tol=1e-4)
+            ), None)
+            if found is not None:
+                unknown.remove(found)
+            matched.append(found)
+        return matched
+
+    def _place_fn(self, side: str) -> Callable[..., Dict[str, Any]]:
         # Choose the correct order placement function
         fn: Optional[Callable[..., Dict[str, Any]]]
         if side == "buy":
@@ -126,8 +299,41 @@ class OrderManager:
             fn = self._place_sell_order_fn or self._place_order_fn
         if fn is None:
             raise RuntimeError("No place_order function configured for side %s" % side)
-        result = self._retry_call(fn, amount, price)
+        return fn
+
+    def _place_dry_run(
+        self, side: str, price: float, amount: float, grid_index: int
+    ) -> OrderRecord:
+        self._order_counter += 1
+        order_id = f"dry-{self._order_counter}"
+        record = OrderRecord(
+            order_id=order_id,
+            side=side,
+            price=price,
+            amount=amount,
+            status="open",
+            grid_index=grid_index,
+        )
+        self._add_record(record)
+        self._daily_order_count += 1
+        logger.info(
+            "[DRY-RUN] Order placed: %s %s %.8f @ %.2f (grid=%d)",
+            order_id,
+            side,
+            amount,
+            price,
+            grid_index,
+        )
+        return record
 
+    def _record_placed(
+        self,
+        result: Dict[str, Any],
+        side: str,
+        price: float,
+        amount: float,
+        grid_index: int,
+    ) -> OrderRecord:
         order_id = result["id"]
         record = OrderRecord(
             order_id=order_id,
@@ -137,7 +343,7 @@ class OrderManager:
             status=result.get("status", "open"),
             grid_index=grid_index,
         )
-        self._orders[order_id] = record
+        self._add_record(record)
         self._daily_order_count += 1
         logger.info(
             "Order placed: %s %s %.8f @ %.2f (grid=%d)",
@@ -152,7 +358,7 @@ class OrderManager:
     def cancel_order(self, order_id: str) -> bool:
         if self._dry_run:
             if order_id in self._orders:
-                self._orders[order_id].status = "cancelled"
+                self._set_status(order_id, "cancelled")
             logger.info("[DRY-RUN] Order cancelled: %s", order_id)
             return True
 
@@ -162,13 +368,58 @@ class OrderManager:
         try:
             self._retry_call(self._cancel_order_fn, order_id)
             if order_id in self._orders:
-                self._orders[order_id].status = "cancelled"
+                self._set_status(order_id, "cancelled")
             logger.info("Order cancelled: %s", order_id)
             return True
         except Exception:
             logger.exception("Failed to cancel order: %s", order_id)
             return False
 
+    def cancel_orders(self, order_ids: List[str]) -> List[bool]:
+        # cancel_order for several orders: one batched request when the
+        # exchange supports it, otherwise concurrent per-order requests
+        # that still share the rate limit
+        if self._dry_run or not order_ids:
+            return [self.cancel_order(oid) for oid in order_ids]
+        if len(order_ids) == 1:
+            return [self.cancel_order(order_ids[0])]
+
+        ok: Optional[List[bool]] = None
+        if self._cancel_orders_batch_fn is not None:
+            try:
+                self._retry_call(
+                    self._cancel_orders_batch_fn, order_ids, retry_on=_BATCH_RETRY_ON
+                )
+                ok = [True] * len(order_ids)
+            except _BATCH_REJECTED as e:
+                logger.warning("Batch cancel rejected (%s); cancelling orders one at a time", e)
+                self._cancel_orders_batch_fn = None
+            except Exception:
+                logger.exception("Failed to cancel batch of %d orders", len(order_ids))
+                ok = [False] * len(order_ids)
+        if ok is None:
+            if self._cancel_order_fn is None:
+                raise RuntimeError("No cancel_order function configured")
+
+            def cancel(order_id: str) -> bool:
+                try:
+                    self._retry_call(self._cancel_order_fn, order_id)
+                    return True
+                except Exception:
+                    logger.exception("Failed to cancel order: %s", order_id)
+                    return False
+
+            workers = min(CANCEL_WORKERS, len(order_ids))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                ok = list(pool.map(cancel, order_ids))
+
+        for oid, cancelled in zip(order_ids, ok):
+            if cancelled:
+                if oid in self._orders:
+                    self._set_status(oid, "cancelled")
+                logger.info("Order cancelled: %s", oid)
+        return ok
+
     def check_order_status(self, order_id: str) -> Optional[str]:
         if self._dry_run:
             record = self._orders.get(order_id)
@@ -179,20 +430,61 @@ class OrderManager:
 
         try:
             result = self._retry_call(self._fetch_order_fn, order_id)
-            status = result.get("status", "unknown")
-            if order_id in self._orders:
-                self._orders[order_id].status = status
-                if status == "closed":
-                    self._orders[order_id].filled_at = datetime.now(
-                        timezone.utc
-                    ).isoformat()
-                    fee_info = result.get("fee") or {}
-                    self._orders[order_id].fee = fee_info.get("cost", 0.0)
-            return status
+            return self._apply_order_result(order_id, result)
         except Exception:
             logger.exception("Failed to check order %s", order_id)
             return None
 
+    def _apply_order_result(self, order_id: str, result: Dict[str, Any]) -> str:
+        status = result.get("status", "unknown")
+        if order_id in self._orders:
+            self._set_status(order_id, status)
+            if status == "closed":
+                record = self._orders[order_id]
+                record.filled_at_ns = time.time_ns()
+                fee_info = result.get("fee") or {}
+                fee = fee_info.get("cost", 0.0)
+                self._total_fees += fee - record.fee
+                record.fee = fee
+        return status
+
+    def _fetch_order_results(
+        self, order_ids: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        # Exchange view of each order (None when unavailable): one batched
+        # request when the exchange supports it, then concurrent per-order
+        # requests that still share the rate limit for whatever the batch
+        # didn't return.
+        results: List[Optional[Dict[str, Any]]] = [None] * len(order_ids)
+        if self._fetch_orders_batch_fn is not None:
+            by_id = {
+                r["id"]: r
+                for r in self._retry_call(self._fetch_orders_batch_fn, order_ids)
+            }
+            results = [by_id.get(oid) for oid in order_ids]
+            if self._fetch_order_fn is None:
+                return results
+        elif self._fetch_order_fn is None:
+            raise RuntimeError("No fetch_order function configured")
+
+        def fetch(order_id: str) -> Optional[Dict[str, Any]]:
+            try:
+                return self._retry_call(self._fetch_order_fn, order_id)
+            except Exception:
+                logger.exception("Failed to check order %s", order_id)
+                return None
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if len(missing) == 1:
+            results[missing[0]] = fetch(order_ids[missing[0]])
+        elif missing:
+            workers = min(RECONCILE_WORKERS, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = pool.map(fetch, [order_ids[i] for i in missing])
+                for i, result in zip(missing, fetched):
+                    results[i] = result
+        return results
+
     def reconcile_orders(self) -> List[str]:
         if self._dry_run:
             return []
@@ -204,14 +496,19 @@ class OrderManager:
             exchange_orders = self._retry_call(self._fetch_open_orders_fn)
             exchange_ids = {o["id"] for o in exchange_orders}
 
+            missing = [oid for oid in self._open_ids if oid not in exchange_ids]
+            if not missing:
+                return []
+
             filled_ids: List[str] = []
-            for oid, record in self._orders.items():
-                if record.status == "open" and oid not in exchange_ids:
-                    status = self.check_order_status(oid)
-                    if status == "closed":
-                        filled_ids.append(oid)
-                    elif status == "cancelled":
-                        logger.info("Order %s was externally cancelled", oid)
+            for oid, result in zip(missing, self._fetch_order_results(missing)):
+                if result is None:
+                    continue
+                status = self._apply_order_result(oid, result)
+                if status == "closed":
+                    filled_ids.append(oid)
+                elif status == "cancelled":
+                    logger.info("Order %s was externally cancelled", oid)
 
             return filled_ids
         except Exception:
@@ -219,34 +516,29 @@ class OrderManager:
             return []
 
     def cancel_all_open(self) -> int:
-        count = 0
-        for oid, record in list(self._orders.items()):
-            if record.status == "open":
-                if self.cancel_order(oid):
-                    count += 1
-        return count
+        return sum(self.cancel_orders(list(self._open_ids)))
 
     def get_open_orders(self) -> List[OrderRecord]:
-        return [r for r in self._orders.values() if r.status == "open"]
+        return [self._orders[oid] for oid in self._open_ids]
 
     def get_filled_orders(self) -> List[OrderRecord]:
-        return [r for r in self._orders.values() if r.status == "closed"]
+        return [self._orders[oid] for oid in self._closed_ids]
 
     def total_fees(self) -> float:
-        return sum(r.fee for r in self._orders.values())
+        return self._total_fees
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        for r in self._orders.values():
+            yield {key: getattr(r, key) for key in _RECORD_KEYS}
 
     def to_dict_list(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "order_id": r.order_id,
-                "side": r.side,
-                "price": r.price,
-                "amount": r.amount,
-                "status": r.status,
-                "grid_index": r.grid_index,
-                "created_at": r.created_at,
-                "filled_at": r.filled_at,
-                "fee": r.fee,
-            }
-            for r in self._orders.values()
-        ]
+        return list(self.iter_dicts())
+
+    def write_json_lines(self, fp: TextIO) -> int:
+        # one JSON object per line, without holding every dict at once
+        count = 0
+        for record in self.iter_dicts():
+            fp.write(json.dumps(record))
+            fp.write("\n")
+            count += 1
+        return count
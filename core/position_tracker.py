@@ -1,15 +1,93 @@
 import logging
+import queue
 import sqlite3
 import threading
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import time
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.timeutils import isoformat_us, next_utc_midnight
 
 logger = logging.getLogger(__name__)
 
+# WAL lets dashboard reads run alongside trade inserts and commits with a
+# single sequential fsync; journal_mode persists in the database file, the
+# rest are per-connection.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA wal_autocheckpoint=1000",
+    "PRAGMA cache_size=-16384",
+)
+
+# sqlite3 caches prepared statements per connection keyed by SQL text, so
+# every write reuses one of these compiled programs
+_INSERT_TRADE_SQL = """INSERT OR REPLACE INTO trades
+    (trade_id, buy_order_id, sell_order_id, buy_price, sell_price,
+     amount, profit_usdt, fee_usdt, net_profit_usdt, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_INSERT_EQUITY_SQL = (
+    "INSERT INTO equity_snapshots (timestamp, equity_usdt, btc_held, btc_price) "
+    "VALUES (?, ?, ?, ?)"
+)
+_UPSERT_STATE_SQL = "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)"
+
+# most queued rows the writer commits in one transaction
+WRITE_BATCH_SIZE = 500
+
+# equity_snapshots retention: every MAINTENANCE_INTERVAL_SECONDS rows older
+# than the newest EQUITY_SNAPSHOTS_KEEP are deleted and up to
+# INCREMENTAL_VACUUM_PAGES freed pages returned to the filesystem
+EQUITY_SNAPSHOTS_KEEP = 100_000
+MAINTENANCE_INTERVAL_SECONDS = 3600
+INCREMENTAL_VACUUM_PAGES = 1000
+
+
+_TRADES_DDL = """
+    CREATE TABLE IF NOT EXISTS trades (
+        trade_id TEXT PRIMARY KEY,
+        buy_order_id TEXT,
+        sell_order_id TEXT,
+        buy_price REAL,
+        sell_price REAL,
+        amount REAL,
+        profit_usdt REAL,
+        fee_usdt REAL,
+        net_profit_usdt REAL,
+        timestamp INTEGER
+    )
+"""
+_EQUITY_DDL = """
+    CREATE TABLE IF NOT EXISTS equity_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER,
+        equity_usdt REAL,
+        btc_held REAL,
+        btc_price REAL
+    )
+"""
+
+
+def _iso_to_us(text: Optional[str]) -> Optional[int]:
+    if text is None:
+        return None
+    moment = datetime.fromisoformat(text)
+    return (int(moment.replace(microsecond=0).timestamp()) * 1_000_000
+            + moment.microsecond)
+
+
+def _with_iso_timestamp(row: sqlite3.Row) -> Dict[str, Any]:
+    d = dict(row)
+    d["timestamp"] = isoformat_us(d["timestamp"])
+    return d
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class TradeRecord:
     trade_id: str
     buy_order_id: str
@@ -20,85 +98,217 @@ class TradeRecord:
     profit_usdt: float
     fee_usdt: float
     net_profit_usdt: float
-    timestamp: str
+    timestamp_us: int
+
+    @property
+    def timestamp(self) -> str:
+        return isoformat_us(self.timestamp_us)
+
+    def __iter__(self) -> Iterator[Any]:
+        # field values in _INSERT_TRADE_SQL column order
+        return iter((
+            self.trade_id, self.buy_order_id, self.sell_order_id,
+            self.buy_price, self.sell_price, self.amount, self.profit_usdt,
+            self.fee_usdt, self.net_profit_usdt, self.timestamp_us,
+        ))
+
+
+_TRADE_RECORD_FIELDS = tuple(f.name for f in fields(TradeRecord))
+
+
+@dataclass(frozen=True, slots=True)
+class _Totals:
+    # Running account figures. Writers build a new instance under the
+    # tracker's lock and rebind it; readers take one reference, lock-free,
+    # and see a consistent set.
+    initial_capital: float = 0.0
+    current_capital: float = 0.0
+    peak_capital: float = 0.0
+    btc_held: float = 0.0
+    total_fees: float = 0.0
+    daily_pnl: float = 0.0
+    # daily_pnl resets when time.time() passes this UTC midnight
+    day_end_ts: float = 0.0
+    trade_count: int = 0
+
+
+def _rolled(s: _Totals, now: float) -> _Totals:
+    if now >= s.day_end_ts:
+        return replace(s, daily_pnl=0.0, day_end_ts=next_utc_midnight(now))
+    return s
+
+
+def _drawdown_pct(s: _Totals) -> float:
+    if s.peak_capital <= 0:
+        return 0.0
+    return (s.peak_capital - s.current_capital) / s.peak_capital * 100
+
+
+def _capital_deployed_pct(s: _Totals) -> float:
+    if s.initial_capital <= 0:
+        return 0.0
+    deployed = s.initial_capital - s.current_capital
+    return max(0.0, deployed / s.initial_capital * 100)
+
+
+def _drain(q: queue.Queue, handle: Callable[[List[Any]], None]) -> None:
+    # Hands queued items to handle() in batches of up to WRITE_BATCH_SIZE
+    # until a None arrives.
+    while True:
+        batch = [q.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        items = [item for item in batch if item is not None]
+        if items:
+            handle(items)
+        for _ in batch:
+            q.task_done()
+        if len(items) < len(batch):
+            return
 
 
 class PositionTracker:
-    def __init__(self, db_path: str = "state/gridai.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "state/gridai.db",
+        trade_event_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> None:
         self._db_path = db_path
+        # receives batches of record_trade_event() rows from its own export
+        # thread, e.g. data.db.insert_trade_events
+        self._trade_event_sink = trade_event_sink
+        # _lock serializes updates to _totals, _db_lock the shared connection
         self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=256,
+        )
+        # rows convert to dicts keyed by column name in C
+        self._conn.row_factory = sqlite3.Row
         self._init_db()
-        self._initial_capital: float = 0.0
-        self._current_capital: float = 0.0
-        self._peak_capital: float = 0.0
-        self._btc_held: float = 0.0
-        self._total_fees: float = 0.0
-        self._daily_pnl: float = 0.0
-        self._daily_reset_date: str = ""
-        self._trade_count: int = 0
+        # trade, equity and state rows are written by a background thread
+        # in batches; items are (table, row) pairs, None stops the writer
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+        # trade events go out on a separate queue, so a slow or unreachable
+        # sink never holds up the SQLite writes or flush()
+        self._event_q: queue.Queue = queue.Queue()
+        self._event_exporter: Optional[threading.Thread] = None
+        if trade_event_sink is not None:
+            self._event_exporter = threading.Thread(target=self._event_loop, daemon=True)
+            self._event_exporter.start()
+        self._stop = threading.Event()
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, daemon=True
+        )
+        self._maintenance_thread.start()
+        # queues handed out by subscribe(); each gets ("trade", ...) and
+        # ("equity", ...) events as they are recorded
+        self._subscribers: List[queue.Queue] = []
+        self._totals = _Totals()
+        # to_dict() result for one _totals instance, recent trades for one
+        # (trade_count, limit); both are rebuilt only after a change
+        self._dict_cache: Tuple[Optional[_Totals], Dict[str, Any]] = (None, {})
+        self._trades_cache: Tuple[Optional[Tuple[int, int]], List[Dict[str, Any]]] = (None, [])
+        # the last rows save_state queued; the loop saves every tick, but
+        # the values only change on fills
+        self._saved_state: Dict[str, str] = {}
 
     def _init_db(self) -> None:
-        with sqlite3.connect(self._db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS trades (
-                    trade_id TEXT PRIMARY KEY,
-                    buy_order_id TEXT,
-                    sell_order_id TEXT,
-                    buy_price REAL,
-                    sell_price REAL,
-                    amount REAL,
-                    profit_usdt REAL,
-                    fee_usdt REAL,
-                    net_profit_usdt REAL,
-                    timestamp TEXT
-                )
-            """)
+        conn = self._conn
+        with self._db_lock:
+            # only takes effect on a fresh file, before the first table exists
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            conn.execute(_TRADES_DDL)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS state (
                     key TEXT PRIMARY KEY,
                     value TEXT
                 )
             """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS equity_snapshots (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    equity_usdt REAL,
-                    btc_held REAL,
-                    btc_price REAL
-                )
-            """)
-            conn.commit()
+            conn.execute(_EQUITY_DDL)
+            self._migrate_text_timestamps("trades", _TRADES_DDL)
+            self._migrate_text_timestamps("equity_snapshots", _EQUITY_DDL)
+            # the ORDER BY rowid/id DESC reads are backward rowid scans already;
+            # this one serves time-range lookups on a growing trades table
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp DESC)"
+            )
+
+    def _migrate_text_timestamps(self, table: str, ddl: str) -> None:
+        # databases written before timestamps were epoch microseconds hold
+        # ISO text in a TEXT column; rebuild the table keeping rowids
+        conn = self._conn
+        columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        if not any(c["name"] == "timestamp" and c["type"] == "TEXT" for c in columns):
+            return
+        names = ", ".join(c["name"] for c in columns)
+        values = ", ".join(
+            "iso_to_us(timestamp)" if c["name"] == "timestamp" else c["name"]
+            for c in columns
+        )
+        conn.create_function("iso_to_us", 1, _iso_to_us, deterministic=True)
+        conn.execute("BEGIN")
+        try:
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_text_ts")
+            conn.execute(ddl)
+            conn.execute(
+                f"INSERT INTO {table} (rowid, {names}) "
+                f"SELECT rowid, {values} FROM {table}_text_ts"
+            )
+            conn.execute(f"DROP TABLE {table}_text_ts")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        logger.info("Converted %s timestamps to epoch microseconds", table)
 
     def initialize(self, capital: float) -> None:
-        self._initial_capital = capital
-        self._current_capital = capital
-        self._peak_capital = capital
+        with self._lock:
+            self._totals = replace(
+                self._totals,
+                initial_capital=capital, current_capital=capital, peak_capital=capital,
+            )
 
     def record_buy(self, price: float, amount: float, fee: float = 0.0) -> None:
         with self._lock:
+            s = self._totals
             cost = price * amount + fee
-            self._current_capital -= cost
-            self._btc_held += amount
-            self._total_fees += fee
-            logger.debug(
-                "BUY: %.8f BTC @ %.2f, fee=%.4f, capital=%.2f",
-                amount, price, fee, self._current_capital,
+            s = self._totals = replace(
+                s,
+                current_capital=s.current_capital - cost,
+                btc_held=s.btc_held + amount,
+                total_fees=s.total_fees + fee,
             )
+        logger.debug(
+            "BUY: %.8f BTC @ %.2f, fee=%.4f, capital=%.2f",
+            amount, price, fee, s.current_capital,
+        )
 
     def record_sell(self, price: float, amount: float, fee: float = 0.0) -> None:
         with self._lock:
+            s = self._totals
             revenue = price * amount - fee
-            self._current_capital += revenue
-            self._btc_held -= amount
-            self._total_fees += fee
-            if self._current_capital > self._peak_capital:
-                self._peak_capital = self._current_capital
-            logger.debug(
-                "SELL: %.8f BTC @ %.2f, fee=%.4f, capital=%.2f",
-                amount, price, fee, self._current_capital,
+            capital = s.current_capital + revenue
+            s = self._totals = replace(
+                s,
+                current_capital=capital,
+                btc_held=s.btc_held - amount,
+                total_fees=s.total_fees + fee,
+                peak_capital=max(s.peak_capital, capital),
             )
+        logger.debug(
+            "SELL: %.8f BTC @ %.2f, fee=%.4f, capital=%.2f",
+            amount, price, fee, s.current_capital,
+        )
 
     def record_completed_trade(
         self,
@@ -111,8 +321,12 @@ class PositionTracker:
     ) -> TradeRecord:
         profit = (sell_price - buy_price) * amount
         net_profit = profit - fee
-        trade_id = f"T-{self._trade_count + 1}"
-        ts = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            s = _rolled(self._totals, time.time())
+            self._totals = replace(
+                s, trade_count=s.trade_count + 1, daily_pnl=s.daily_pnl + net_profit
+            )
+        trade_id = f"T-{s.trade_count + 1}"
 
         record = TradeRecord(
             trade_id=trade_id,
@@ -124,17 +338,8 @@ class PositionTracker:
             profit_usdt=profit,
             fee_usdt=fee,
             net_profit_usdt=net_profit,
-            timestamp=ts,
+            timestamp_us=time.time_ns() // 1000,
         )
-
-        with self._lock:
-            self._trade_count += 1
-            today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-            if self._daily_reset_date != today:
-                self._daily_pnl = 0.0
-                self._daily_reset_date = today
-            self._daily_pnl += net_profit
-
         self._save_trade(record)
         logger.info(
             "Trade %s: buy=%.2f sell=%.2f amount=%.8f profit=%.4f net=%.4f",
@@ -143,161 +348,257 @@ class PositionTracker:
         return record
 
     def _save_trade(self, t: TradeRecord) -> None:
+        row = tuple(t)
+        self._write_q.put(("trades", row))
+        if self._subscribers:
+            payload = dict(zip(_TRADE_RECORD_FIELDS, row))
+            payload["timestamp"] = isoformat_us(payload.pop("timestamp_us"))
+            self._publish("trade", payload)
+
+    def snapshot_equity(self, btc_price: float) -> float:
+        s = self._totals
+        equity = s.current_capital + s.btc_held * btc_price
+        ts = time.time_ns() // 1000
+        self._write_q.put(("equity_snapshots", (ts, equity, s.btc_held, btc_price)))
+        if self._subscribers:
+            self._publish("equity", {
+                "timestamp": isoformat_us(ts), "equity": equity,
+                "btc_held": s.btc_held, "btc_price": btc_price,
+            })
+        return equity
+
+    def subscribe(self) -> queue.Queue:
+        q: queue.Queue = queue.Queue()
+        self._subscribers.append(q)
+        return q
+
+    def _publish(self, kind: str, payload: Dict[str, Any]) -> None:
+        for q in self._subscribers:
+            q.put((kind, payload))
+
+    def record_trade_event(self, row: Dict[str, Any]) -> None:
+        if self._event_exporter is not None:
+            self._event_q.put(row)
+
+    def _writer_loop(self) -> None:
+        _drain(self._write_q, self._write_batch)
+
+    def _event_loop(self) -> None:
+        _drain(self._event_q, self._export_events)
+
+    def _export_events(self, events: List[Dict[str, Any]]) -> None:
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                conn.execute(
-                    """INSERT OR REPLACE INTO trades
-                    (trade_id, buy_order_id, sell_order_id, buy_price, sell_price,
-                     amount, profit_usdt, fee_usdt, net_profit_usdt, timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        t.trade_id, t.buy_order_id, t.sell_order_id,
-                        t.buy_price, t.sell_price, t.amount,
-                        t.profit_usdt, t.fee_usdt, t.net_profit_usdt, t.timestamp,
-                    ),
-                )
-                conn.commit()
+            self._trade_event_sink(events)
         except Exception:
-            logger.exception("Failed to save trade %s", t.trade_id)
+            logger.exception("Failed to export %d trade events", len(events))
 
-    def snapshot_equity(self, btc_price: float) -> float:
-        equity = self._current_capital + self._btc_held * btc_price
-        ts = datetime.now(timezone.utc).isoformat()
+    def _write_batch(self, items: List[Any]) -> None:
+        trades = [row for table, row in items if table == "trades"]
+        snapshots = [row for table, row in items if table == "equity_snapshots"]
+        # later saves in the batch win, key by key, as if run one by one
+        state: Dict[str, str] = {}
+        for table, row in items:
+            if table == "state":
+                state.update(row)
+        if not trades and not snapshots and not state:
+            return
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                conn.execute(
-                    "INSERT INTO equity_snapshots (timestamp, equity_usdt, btc_held, btc_price) VALUES (?, ?, ?, ?)",
-                    (ts, equity, self._btc_held, btc_price),
-                )
-                conn.commit()
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    if trades:
+                        self._conn.executemany(_INSERT_TRADE_SQL, trades)
+                    if snapshots:
+                        self._conn.executemany(_INSERT_EQUITY_SQL, snapshots)
+                    if state:
+                        self._conn.executemany(_UPSERT_STATE_SQL, state.items())
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
         except Exception:
-            logger.exception("Failed to save equity snapshot")
-        return equity
+            if state:
+                # let the next save_state queue the values again
+                self._saved_state = {}
+            logger.exception(
+                "Failed to save %d trades, %d equity snapshots and state",
+                len(trades), len(snapshots),
+            )
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(MAINTENANCE_INTERVAL_SECONDS):
+            self._prune_equity_snapshots()
+
+    def _prune_equity_snapshots(self, keep: int = EQUITY_SNAPSHOTS_KEEP) -> None:
+        try:
+            with self._db_lock:
+                deleted = self._conn.execute(
+                    "DELETE FROM equity_snapshots"
+                    " WHERE id <= (SELECT MAX(id) FROM equity_snapshots) - ?",
+                    (keep,),
+                ).rowcount
+                # each result row is one freed page; fetch them all to finish
+                self._conn.execute(
+                    f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})"
+                ).fetchall()
+            if deleted:
+                logger.info("Pruned %d old equity snapshots", deleted)
+        except Exception:
+            logger.exception("Equity snapshot maintenance failed")
+
+    def flush(self) -> None:
+        # blocks until every queued trade, snapshot and state save is committed
+        self._write_q.join()
+
+    def flush_trade_events(self) -> None:
+        # blocks until every recorded trade event has been handed to the sink
+        self._event_q.join()
 
     def get_equity_history(self, limit: int = 500) -> List[Dict[str, Any]]:
+        self.flush()
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                rows = conn.execute(
-                    "SELECT timestamp, equity_usdt, btc_held, btc_price FROM equity_snapshots ORDER BY id DESC LIMIT ?",
+            with self._db_lock:
+                rows = self._conn.execute(
+                    "SELECT timestamp, equity_usdt AS equity, btc_held, btc_price"
+                    " FROM equity_snapshots ORDER BY id DESC LIMIT ?",
                     (limit,),
                 ).fetchall()
-            return [
-                {"timestamp": r[0], "equity": r[1], "btc_held": r[2], "btc_price": r[3]}
-                for r in reversed(rows)
-            ]
+            return [_with_iso_timestamp(r) for r in reversed(rows)]
         except Exception:
             logger.exception("Failed to load equity history")
             return []
 
     def get_recent_trades(self, limit: int = 50) -> List[Dict[str, Any]]:
+        key = (self._totals.trade_count, limit)
+        cached_key, cached = self._trades_cache
+        # callers get their own list and dicts; the cache is never handed out
+        if cached_key == key:
+            return [dict(t) for t in cached]
+        self.flush()
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                rows = conn.execute(
+            with self._db_lock:
+                rows = self._conn.execute(
                     "SELECT * FROM trades ORDER BY rowid DESC LIMIT ?",
                     (limit,),
                 ).fetchall()
-            return [
-                {
-                    "trade_id": r[0], "buy_order_id": r[1], "sell_order_id": r[2],
-                    "buy_price": r[3], "sell_price": r[4], "amount": r[5],
-                    "profit_usdt": r[6], "fee_usdt": r[7], "net_profit_usdt": r[8],
-                    "timestamp": r[9],
-                }
-                for r in reversed(rows)
-            ]
+            trades = [_with_iso_timestamp(r) for r in reversed(rows)]
+            self._trades_cache = (key, trades)
+            return [dict(t) for t in trades]
         except Exception:
             logger.exception("Failed to load recent trades")
             return []
 
     @property
     def current_capital(self) -> float:
-        return self._current_capital
+        return self._totals.current_capital
 
     @property
     def btc_held(self) -> float:
-        return self._btc_held
+        return self._totals.btc_held
 
     @property
     def total_fees(self) -> float:
-        return self._total_fees
+        return self._totals.total_fees
 
     @property
     def trade_count(self) -> int:
-        return self._trade_count
+        return self._totals.trade_count
 
     @property
     def daily_pnl(self) -> float:
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if self._daily_reset_date != today:
-            self._daily_pnl = 0.0
-            self._daily_reset_date = today
-        return self._daily_pnl
+        return self._current_totals().daily_pnl
+
+    def _current_totals(self) -> _Totals:
+        # _totals with the daily P&L rolled over if a UTC midnight has passed
+        s = self._totals
+        if time.time() >= s.day_end_ts:
+            with self._lock:
+                s = self._totals = _rolled(self._totals, time.time())
+        return s
 
     def drawdown_pct(self) -> float:
-        if self._peak_capital <= 0:
-            return 0.0
-        return (self._peak_capital - self._current_capital) / self._peak_capital * 100
+        return _drawdown_pct(self._totals)
 
     def capital_deployed_pct(self) -> float:
-        if self._initial_capital <= 0:
-            return 0.0
-        deployed = self._initial_capital - self._current_capital
-        return max(0.0, deployed / self._initial_capital * 100)
+        return _capital_deployed_pct(self._totals)
 
     def total_pnl(self) -> float:
-        return self._current_capital - self._initial_capital
+        s = self._totals
+        return s.current_capital - s.initial_capital
 
     def save_state(self, extra: Optional[Dict[str, str]] = None) -> None:
+        s = self._totals
         data = {
-            "initial_capital": str(self._initial_capital),
-            "current_capital": str(self._current_capital),
-            "peak_capital": str(self._peak_capital),
-            "btc_held": str(self._btc_held),
-            "total_fees": str(self._total_fees),
-            "trade_count": str(self._trade_count),
+            "initial_capital": str(s.initial_capital),
+            "current_capital": str(s.current_capital),
+            "peak_capital": str(s.peak_capital),
+            "btc_held": str(s.btc_held),
+            "total_fees": str(s.total_fees),
+            "trade_count": str(s.trade_count),
         }
         if extra:
             data.update(extra)
-        try:
-            with sqlite3.connect(self._db_path) as conn:
-                for k, v in data.items():
-                    conn.execute(
-                        "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
-                        (k, v),
-                    )
-                conn.commit()
-        except Exception:
-            logger.exception("Failed to save state")
+        if data == self._saved_state:
+            return
+        # committed by the writer thread, in the same transaction as any
+        # trades and snapshots queued with it; flush() waits for it
+        self._saved_state = data
+        self._write_q.put(("state", data))
 
     def load_state(self) -> bool:
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                rows = conn.execute("SELECT key, value FROM state").fetchall()
+            with self._db_lock:
+                rows = self._conn.execute("SELECT key, value FROM state").fetchall()
             if not rows:
                 return False
             state = dict(rows)
-            self._initial_capital = float(state.get("initial_capital", 0))
-            self._current_capital = float(state.get("current_capital", 0))
-            self._peak_capital = float(state.get("peak_capital", 0))
-            self._btc_held = float(state.get("btc_held", 0))
-            self._total_fees = float(state.get("total_fees", 0))
-            self._trade_count = int(state.get("trade_count", 0))
-            logger.info("State restored: capital=%.2f, btc=%.8f", self._current_capital, self._btc_held)
+            with self._lock:
+                s = self._totals = replace(
+                    self._totals,
+                    initial_capital=float(state.get("initial_capital", 0)),
+                    current_capital=float(state.get("current_capital", 0)),
+                    peak_capital=float(state.get("peak_capital", 0)),
+                    btc_held=float(state.get("btc_held", 0)),
+                    total_fees=float(state.get("total_fees", 0)),
+                    trade_count=int(state.get("trade_count", 0)),
+                )
+            logger.info("State restored: capital=%.2f, btc=%.8f", s.current_capital, s.btc_held)
             return True
         except Exception:
             logger.exception("Failed to load state")
             return False
 
+    def close(self) -> None:
+        self._stop.set()
+        self._maintenance_thread.join()
+        if self._writer.is_alive():
+            self._write_q.put(None)
+            self._writer.join()
+        if self._event_exporter is not None and self._event_exporter.is_alive():
+            self._event_q.put(None)
+            self._event_exporter.join()
+        with self._db_lock:
+            # refresh query planner statistics for the next start
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "initial_capital": self._initial_capital,
-            "current_capital": self._current_capital,
-            "peak_capital": self._peak_capital,
-            "btc_held": self._btc_held,
-            "total_fees": self._total_fees,
-            "trade_count": self._trade_count,
-            "total_pnl": self.total_pnl(),
-            "drawdown_pct": self.drawdown_pct(),
-            "capital_deployed_pct": self.capital_deployed_pct(),
-            "daily_pnl": self.daily_pnl,
+        s = self._current_totals()
+        cached_for, cached = self._dict_cache
+        # a copy, like get_recent_trades, so callers can't change the cache
+        if cached_for is s:
+            return dict(cached)
+        d = {
+            "initial_capital": s.initial_capital,
+            "current_capital": s.current_capital,
+            "peak_capital": s.peak_capital,
+            "btc_held": s.btc_held,
+            "total_fees": s.total_fees,
+            "trade_count": s.trade_count,
+            "total_pnl": s.current_capital - s.initial_capital,
+            "drawdown_pct": _drawdown_pct(s),
+            "capital_deployed_pct": _capital_deployed_pct(s),
+            "daily_pnl": s.daily_pnl,
         }
+        self._dict_cache = (s, d)
+        return dict(d)
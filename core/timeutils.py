@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+SECONDS_PER_DAY = 86400
+
+
+def isoformat_ns(ns: int) -> str:
+    # same text as datetime.now(timezone.utc).isoformat() at that instant
+    seconds, rest = divmod(ns, 1_000_000_000)
+    moment = datetime.fromtimestamp(seconds, timezone.utc)
+    return moment.replace(microsecond=rest // 1000).isoformat()
+
+
+def isoformat_us(us: int) -> str:
+    # stored timestamps are UTC epoch microseconds; text only for readers
+    return isoformat_ns(us * 1000)
+
+
+def next_utc_midnight(now: float) -> float:
+    return float((int(now) // SECONDS_PER_DAY + 1) * SECONDS_PER_DAY)
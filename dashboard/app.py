@@ -1,17 +1,58 @@
-import json
+import asyncio
+import base64
+import gzip
+import hashlib
 import logging
-import os
+import queue
 import sqlite3
 import threading
 import time
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, render_template_string
-from flask_socketio import SocketIO
+import numpy as np
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+
+from core.timeutils import isoformat_us
 
 logger = logging.getLogger(__name__)
 
+# clients get a full snapshot on connect, then only new trades and equity
+# points; the full state is re-sent every HEARTBEAT_SECONDS
+HEARTBEAT_SECONDS = 30.0
+EVENT_POLL_SECONDS = 0.5
+DB_POLL_SECONDS = 2.0
+
+# read-side settings matching PositionTracker's database (which owns WAL mode)
+_READ_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# one read-only connection per database, shared by API requests and the
+# background push loop
+_read_conns: Dict[str, sqlite3.Connection] = {}
+_read_lock = threading.Lock()
+
+
+def _read_connection(path: str) -> sqlite3.Connection:
+    conn = _read_conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _READ_PRAGMAS:
+            conn.execute(pragma)
+        _read_conns[path] = conn
+    return conn
+
+
 DASHBOARD_HTML = """
 <!DOCTYPE html>
 <html lang="en">
@@ -20,7 +61,6 @@ DASHBOARD_HTML = """
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>GridAI Trader Dashboard</title>
 <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
-<script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.min.js"></script>
 <style>
 *{margin:0;padding:0;box-sizing:border-box}
 body{font-family:'Segoe UI',system-ui,-apple-system,sans-serif;background:#0d1117;color:#c9d1d9}
@@ -112,8 +152,17 @@ body{font-family:'Segoe UI',system-ui,-apple-system,sans-serif;background:#0d111
   </div>
 </div>
 <script>
-const socket = io();
+// server messages are {"event": name, "data": payload}
+const handlers={};
+const socket={on:(name,fn)=>{handlers[name]=fn}};
+function connect(){
+  const ws=new WebSocket((location.protocol==='https:'?'wss://':'ws://')+location.host+'/ws');
+  ws.onmessage=ev=>{const m=JSON.parse(ev.data);const h=handlers[m.event];if(h)h(m.data)};
+  ws.onclose=()=>setTimeout(connect,2000);
+}
 let equityChart;
+let equityHistory=[];
+let trades=[];
 
 function initChart(){
   const ctx = document.getElementById('equityChart').getContext('2d');
@@ -180,102 +229,331 @@ socket.on('update', function(data){
     }
   }
   if(data.mode){document.getElementById('modeBadge').textContent=data.mode.toUpperCase()}
-  if(data.equity_history&&data.equity_history.length>0){
-    equityChart.data.labels=data.equity_history.map(e=>e.timestamp?e.timestamp.slice(11,19):'');
-    equityChart.data.datasets[0].data=data.equity_history.map(e=>e.equity);
-    equityChart.update('none');
-  }
-  if(data.trades){
-    const tb=document.getElementById('tradesBody');
-    tb.innerHTML=data.trades.slice(-50).reverse().map(t=>{
-      const pc=pnlClass(t.net_profit_usdt);
-      return `<tr><td>${t.trade_id||''}</td><td>$${fmt(t.buy_price)}</td><td>$${fmt(t.sell_price)}</td><td>${fmt(t.amount,6)}</td><td class="${pc}">$${fmt(t.net_profit_usdt)}</td><td>$${fmt(t.fee_usdt,4)}</td><td>${(t.timestamp||'').slice(0,19)}</td></tr>`;
-    }).join('');
-  }
+  if(data.equity_bin!=null){equityHistory=unpackEquity(data.equity_bin).slice(-200);renderEquity()}
+  if(data.trades){trades=data.trades.slice(-50);renderTrades()}
+});
+
+socket.on('equity', function(e){
+  equityHistory.push(e);
+  if(equityHistory.length>200)equityHistory.shift();
+  renderEquity();
+});
+
+socket.on('trade', function(t){
+  trades.push(t);
+  if(trades.length>50)trades.shift();
+  renderTrades();
 });
 
+// equity_bin: base64 of little-endian (int32 epoch seconds, float64 equity) pairs
+function unpackEquity(s){
+  const bytes=Uint8Array.from(atob(s),c=>c.charCodeAt(0));
+  const view=new DataView(bytes.buffer);
+  const out=[];
+  for(let i=0;i+12<=bytes.length;i+=12){
+    out.push({timestamp:new Date(view.getInt32(i,true)*1000).toISOString(),equity:view.getFloat64(i+4,true)});
+  }
+  return out;
+}
+
+function renderEquity(){
+  if(equityHistory.length===0)return;
+  equityChart.data.labels=equityHistory.map(e=>e.timestamp?e.timestamp.slice(11,19):'');
+  equityChart.data.datasets[0].data=equityHistory.map(e=>e.equity);
+  equityChart.update('none');
+}
+
+function renderTrades(){
+  const tb=document.getElementById('tradesBody');
+  tb.innerHTML=trades.slice().reverse().map(t=>{
+    const pc=pnlClass(t.net_profit_usdt);
+    return `<tr><td>${t.trade_id||''}</td><td>$${fmt(t.buy_price)}</td><td>$${fmt(t.sell_price)}</td><td>${fmt(t.amount,6)}</td><td class="${pc}">$${fmt(t.net_profit_usdt)}</td><td>$${fmt(t.fee_usdt,4)}</td><td>${(t.timestamp||'').slice(0,19)}</td></tr>`;
+  }).join('');
+}
+
 initChart();
+connect();
 </script>
 </body>
 </html>
 """
 
 
+# the page never changes at runtime: encode, compress and tag it once
+_HTML_BYTES = DASHBOARD_HTML.encode()
+_HTML_GZ = gzip.compress(_HTML_BYTES)
+_HTML_ETAG = '"%s"' % hashlib.md5(_HTML_BYTES).hexdigest()
+_HTML_HEADERS = {
+    "ETag": _HTML_ETAG,
+    "Cache-Control": "public, max-age=3600",
+    "Vary": "Accept-Encoding",
+}
+
+
+def _position_from_state(state: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "current_capital": float(state.get("current_capital", 0)),
+        "btc_held": float(state.get("btc_held", 0)),
+        "total_fees": float(state.get("total_fees", 0)),
+        "trade_count": int(state.get("trade_count", 0)),
+        "initial_capital": float(state.get("initial_capital", 0)),
+    }
+
+
+_TRADE_COLUMNS = (
+    "trade_id, buy_price, sell_price, amount, profit_usdt, fee_usdt,"
+    " net_profit_usdt, timestamp"
+)
+
+
+def _row_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    # timestamps are stored as epoch microseconds, the page expects ISO text
+    d = dict(row)
+    d["timestamp"] = isoformat_us(d["timestamp"])
+    return d
+
+
+def _load_state_from_db(path: str, pack_equity: bool = False) -> Dict[str, Any]:
+    # pack_equity: equity history as equity_bin, packed straight from the
+    # stored epoch values, for the socket
+    result: Dict[str, Any] = {}
+    try:
+        if not Path(path).exists():
+            return result
+        with _read_lock:
+            conn = _read_connection(path)
+            rows = conn.execute("SELECT key, value FROM state").fetchall()
+            result["position"] = _position_from_state(dict(rows))
+
+            eq_rows = conn.execute(
+                "SELECT timestamp, equity_usdt AS equity FROM equity_snapshots"
+                " ORDER BY id DESC LIMIT 200"
+            ).fetchall()
+            if pack_equity:
+                result["equity_bin"] = _pack_equity([tuple(r) for r in reversed(eq_rows)])
+            else:
+                result["equity_history"] = [_row_dict(r) for r in reversed(eq_rows)]
+
+            trade_rows = conn.execute(
+                f"SELECT {_TRADE_COLUMNS} FROM trades ORDER BY rowid DESC LIMIT 50"
+            ).fetchall()
+            result["trades"] = [_row_dict(r) for r in reversed(trade_rows)]
+    except Exception:
+        logger.exception("Error loading state from DB")
+    return result
+
+
+class _DbChangeFeed:
+    # Emits what the trader committed since the last poll. PRAGMA
+    # data_version only moves when another connection writes, so an idle
+    # database costs one pragma per poll.
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._version: Optional[int] = None
+        self._last_trade = 0
+        self._last_equity = 0
+
+    def poll(self) -> List[Tuple[str, Dict[str, Any]]]:
+        if not Path(self._path).exists():
+            return []
+        with _read_lock:
+            conn = _read_connection(self._path)
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version:
+                return []
+            first = self._version is None
+            self._version = version
+            if first:
+                # clients get history from the snapshot sent on connect, so
+                # the first poll only moves the cursors to the end
+                self._last_trade = conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0) FROM trades"
+                ).fetchone()[0]
+                self._last_equity = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM equity_snapshots"
+                ).fetchone()[0]
+                return []
+
+            trades = [_row_dict(r) for r in conn.execute(
+                f"SELECT rowid, {_TRADE_COLUMNS} FROM trades WHERE rowid > ? ORDER BY rowid",
+                (self._last_trade,),
+            )]
+            snapshots = [_row_dict(r) for r in conn.execute(
+                "SELECT id, timestamp, equity_usdt AS equity FROM equity_snapshots"
+                " WHERE id > ? ORDER BY id",
+                (self._last_equity,),
+            )]
+            state = dict(conn.execute("SELECT key, value FROM state").fetchall())
+
+        for trade in trades:
+            self._last_trade = trade.pop("rowid")
+        for snap in snapshots:
+            self._last_equity = snap.pop("id")
+        events = [("trade", trade) for trade in trades]
+        events += [("equity", snap) for snap in snapshots]
+        events.append(("update", {"position": _position_from_state(state)}))
+        return events
+
+
+# equity history goes over the socket as packed (epoch seconds, equity)
+# pairs, about a quarter of the JSON size; equity stays a double so cents
+# survive at any account size
+_EQUITY_DTYPE = np.dtype([("t", "<i4"), ("e", "<f8")])
+
+
+def _pack_equity(points: List[Tuple[Optional[int], float]]) -> str:
+    # (epoch microseconds, equity) pairs, as equity_snapshots stores them
+    arr = np.empty(len(points), dtype=_EQUITY_DTYPE)
+    arr["t"] = [(us or 0) // 1_000_000 for us, _ in points]
+    arr["e"] = [equity for _, equity in points]
+    return base64.b64encode(arr.tobytes()).decode()
+
+
+def _history_points(history: List[Dict[str, Any]]) -> List[Tuple[Optional[int], float]]:
+    # a state_provider hands over ISO text, the database doesn't
+    return [
+        (
+            int(datetime.fromisoformat(p["timestamp"]).timestamp() * 1_000_000)
+            if p.get("timestamp") else None,
+            p["equity"],
+        )
+        for p in history
+    ]
+
+
+def _drain(events: "queue.Queue") -> List[Tuple[str, Dict[str, Any]]]:
+    items = []
+    while True:
+        try:
+            items.append(events.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _encode(kind: str, payload: Dict[str, Any]) -> str:
+    return orjson.dumps(
+        {"event": kind, "data": payload}, option=orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
+
+class ConnectionManager:
+    def __init__(self) -> None:
+        self.active_connections: List[WebSocket] = []
+
+    async def connect(self, ws: WebSocket, snapshot: Dict[str, Any]) -> None:
+        await ws.accept()
+        await ws.send_text(_encode("update", snapshot))
+        self.active_connections.append(ws)
+
+    def disconnect(self, ws: WebSocket) -> None:
+        if ws in self.active_connections:
+            self.active_connections.remove(ws)
+
+    async def broadcast(self, kind: str, payload: Dict[str, Any]) -> None:
+        # encoded once, whatever the number of clients
+        message = _encode(kind, payload)
+        clients = list(self.active_connections)
+        results = await asyncio.gather(
+            *(ws.send_text(message) for ws in clients), return_exceptions=True
+        )
+        for ws, result in zip(clients, results):
+            if isinstance(result, Exception):
+                self.disconnect(ws)
+
+
 def create_app(
     db_path: str = "state/gridai.db",
     state_provider: Optional[Any] = None,
-) -> Flask:
-    app = Flask(__name__)
-    app.config["SECRET_KEY"] = os.environ.get("JWT_SECRET", "gridai-dev-secret")
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+    event_source: Optional[Any] = None,
+) -> FastAPI:
+    # event_source is anything with subscribe() -> queue of (event, payload)
+    # pairs, e.g. the running PositionTracker; without one the dashboard
+    # follows the database
+    manager = ConnectionManager()
 
-    @app.route("/")
-    def index():
-        return render_template_string(DASHBOARD_HTML)
-
-    @app.route("/health")
-    def health():
-        return jsonify({"status": "ok"})
-
-    @app.route("/api/state")
-    def api_state():
+    def _snapshot() -> Dict[str, Any]:
         if state_provider:
-            return jsonify(state_provider())
-        return jsonify(_load_state_from_db(db_path))
+            return state_provider()
+        return _load_state_from_db(db_path)
 
-    def _load_state_from_db(path: str) -> Dict[str, Any]:
-        result: Dict[str, Any] = {}
-        try:
-            if not Path(path).exists():
-                return result
-            with sqlite3.connect(path) as conn:
-                rows = conn.execute("SELECT key, value FROM state").fetchall()
-                state = dict(rows)
-                result["position"] = {
-                    "current_capital": float(state.get("current_capital", 0)),
-                    "btc_held": float(state.get("btc_held", 0)),
-                    "total_fees": float(state.get("total_fees", 0)),
-                    "trade_count": int(state.get("trade_count", 0)),
-                    "initial_capital": float(state.get("initial_capital", 0)),
-                }
-
-                eq_rows = conn.execute(
-                    "SELECT timestamp, equity_usdt FROM equity_snapshots ORDER BY id DESC LIMIT 200"
-                ).fetchall()
-                result["equity_history"] = [
-                    {"timestamp": r[0], "equity": r[1]} for r in reversed(eq_rows)
-                ]
-
-                trade_rows = conn.execute(
-                    "SELECT * FROM trades ORDER BY rowid DESC LIMIT 50"
-                ).fetchall()
-                result["trades"] = [
-                    {
-                        "trade_id": r[0], "buy_price": r[3], "sell_price": r[4],
-                        "amount": r[5], "profit_usdt": r[6], "fee_usdt": r[7],
-                        "net_profit_usdt": r[8], "timestamp": r[9],
-                    }
-                    for r in reversed(trade_rows)
-                ]
-        except Exception:
-            logger.exception("Error loading state from DB")
-        return result
-
-    def background_push():
+    def _socket_snapshot() -> Dict[str, Any]:
+        if not state_provider:
+            return _load_state_from_db(db_path, pack_equity=True)
+        snapshot = dict(state_provider())
+        history = snapshot.pop("equity_history", None)
+        if history is not None:
+            snapshot["equity_bin"] = _pack_equity(_history_points(history))
+        return snapshot
+
+    async def background_push() -> None:
+        if event_source is not None:
+            events = event_source.subscribe()
+            poll = lambda: _drain(events)
+            interval = EVENT_POLL_SECONDS
+        else:
+            poll = _DbChangeFeed(db_path).poll
+            interval = DB_POLL_SECONDS
+        heartbeat_at = time.monotonic() + HEARTBEAT_SECONDS
+        last_equity_bin = None
         while True:
             try:
-                if state_provider:
-                    data = state_provider()
-                else:
-                    data = _load_state_from_db(db_path)
-                socketio.emit("update", data)
+                # database reads and the state provider block, keep them off the loop
+                for kind, payload in await asyncio.to_thread(poll):
+                    await manager.broadcast(kind, payload)
+                if time.monotonic() >= heartbeat_at:
+                    snapshot = await asyncio.to_thread(_socket_snapshot)
+                    # clients already hold an unchanged history
+                    equity_bin = snapshot.get("equity_bin")
+                    if equity_bin == last_equity_bin:
+                        snapshot.pop("equity_bin", None)
+                    last_equity_bin = equity_bin
+                    await manager.broadcast("update", snapshot)
+                    heartbeat_at = time.monotonic() + HEARTBEAT_SECONDS
             except Exception:
                 logger.exception("Error in background push")
-            socketio.sleep(2)
+            await asyncio.sleep(interval)
 
-    socketio.start_background_task(background_push)
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        task = asyncio.create_task(background_push())
+        yield
+        task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/")
+    def index(request: Request):
+        if request.headers.get("if-none-match") == _HTML_ETAG:
+            return Response(status_code=304, headers=_HTML_HEADERS)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(
+                _HTML_GZ, media_type="text/html",
+                headers={**_HTML_HEADERS, "Content-Encoding": "gzip"},
+            )
+        return Response(_HTML_BYTES, media_type="text/html", headers=_HTML_HEADERS)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/api/state")
+    def api_state():
+        # encoded by orjson, as on the socket; returning the response skips
+        # FastAPI's jsonable_encoder pass
+        return Response(
+            orjson.dumps(_snapshot(), option=orjson.OPT_SERIALIZE_NUMPY),
+            media_type="application/json",
+        )
+
+    @app.websocket("/ws")
+    async def ws_endpoint(ws: WebSocket):
+        await manager.connect(ws, await asyncio.to_thread(_socket_snapshot))
+        try:
+            while True:
+                await ws.receive_text()
+        except WebSocketDisconnect:
+            manager.disconnect(ws)
 
-    app.socketio = socketio
     return app
 
 
@@ -284,8 +562,11 @@ def run_dashboard(
     port: int = 8080,
     db_path: str = "state/gridai.db",
     state_provider: Optional[Any] = None,
+    event_source: Optional[Any] = None,
 ) -> None:
-    app = create_app(db_path=db_path, state_provider=state_provider)
+    app = create_app(
+        db_path=db_path, state_provider=state_provider, event_source=event_source
+    )
     logging.basicConfig(level=logging.INFO)
     logger.info("Dashboard starting on %s:%d", host, port)
-    app.socketio.run(app, host=host, port=port, log_output=True)
+    uvicorn.run(app, host=host, port=port, loop="uvloop", http="httptools", workers=1)
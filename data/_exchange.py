@@ -0,0 +1,114 @@
+import logging
+from typing import Any, Dict, Optional
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    # httpx is optional: without it exchanges keep the requests transport
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# ccxt's sync exchanges send every REST call through one requests.Session;
+# a larger per-host pool keeps warm TLS connections for the polling thread,
+# backfills and order calls alike. ccxt does its own retries.
+HTTP_POOL_CONNECTIONS = 8
+HTTP_POOL_MAXSIZE = 32
+
+# HTTP/2 client limits: requests multiplex over a few kept-alive connections
+HTTP2_MAX_CONNECTIONS = 100
+HTTP2_MAX_KEEPALIVE = 40
+HTTP2_KEEPALIVE_EXPIRY = 30.0
+
+
+class HttpxSession:
+    # Stand-in for the requests.Session ccxt's Exchange.fetch() uses: same
+    # request() signature, requests.Response results and requests exception
+    # types (ccxt maps those to NetworkError/RequestTimeout), sent through
+    # an httpx client. Proxied, unverified and multipart requests go through
+    # a plain requests.Session, as httpx configures those per client.
+    def __init__(self, client: "httpx.Client") -> None:
+        self._client = client
+        self._fallback = requests.Session()
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.headers: Dict[str, str] = {}
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        proxies: Optional[Dict[str, str]] = None,
+        verify: bool = True,
+        files: Any = None,
+    ) -> requests.Response:
+        if proxies or files or not verify:
+            return self._fallback.request(
+                method, url, data=data, headers=headers, timeout=timeout,
+                proxies=proxies, verify=verify, files=files,
+            )
+        try:
+            r = self._client.request(
+                method, url, content=data, headers=headers, timeout=timeout
+            )
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.RequestException(str(e)) from e
+        response = requests.Response()
+        response.status_code = r.status_code
+        response.reason = r.reason_phrase
+        response.headers = CaseInsensitiveDict(r.headers)
+        response.url = str(r.url)
+        response._content = r.content
+        return response
+
+    def close(self) -> None:
+        self._client.close()
+        self._fallback.close()
+
+
+def _http2_session() -> Optional[HttpxSession]:
+    if httpx is None:
+        logger.warning("httpx is not installed, using HTTP/1.1")
+        return None
+    try:
+        client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=HTTP2_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP2_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP2_KEEPALIVE_EXPIRY,
+            ),
+        )
+    except ImportError:
+        logger.warning("HTTP/2 needs the h2 package (httpx[http2]), using HTTP/1.1")
+        return None
+    return HttpxSession(client)
+
+
+def create_exchange(
+    exchange_id: str, config: Dict[str, Any], http2: bool = False
+) -> ccxt.Exchange:
+    exchange = getattr(ccxt, exchange_id)(config)
+    session = _http2_session() if http2 else None
+    if session is not None:
+        exchange.session = session
+        return exchange
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=0,
+    )
+    exchange.session.mount("https://", adapter)
+    exchange.session.mount("http://", adapter)
+    return exchange
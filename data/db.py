@@ -1,11 +1,35 @@
+import logging
 import os
+import threading
+from contextlib import contextmanager
 import psycopg2
 from psycopg2.extras import execute_values
-from typing import Any, Dict, Iterable, Tuple
+from psycopg2.pool import ThreadedConnectionPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
+_INSERT_TRADE_EVENTS_SQL = """
+    INSERT INTO trade_events(ts, trade_id, side, price, qty, fee, pnl, regime, confidence, grid_level)
+    VALUES %s
+"""
+_TRADE_EVENT_TEMPLATE = (
+    "(%(ts)s, %(trade_id)s, %(side)s, %(price)s, %(qty)s, %(fee)s, %(pnl)s,"
+    " %(regime)s, %(confidence)s, %(grid_level)s)"
+)
 
-def get_conn():
-    return psycopg2.connect(
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 8
+# how often MarketDataWriter sends what has accumulated
+FLUSH_INTERVAL_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+# created on first use so importing this module never touches the network
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _conn_params() -> Dict[str, Any]:
+    return dict(
         host=os.getenv('PGHOST', 'db'),
         port=int(os.getenv('PGPORT', '5432')),
         user=os.getenv('PGUSER', 'gridai'),
@@ -14,6 +38,35 @@ def get_conn():
     )
 
 
+def get_conn():
+    return psycopg2.connect(**_conn_params())
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, **_conn_params())
+        return _pool
+
+
+@contextmanager
+def _conn() -> Iterator[Any]:
+    # pooled connection, committed on success and rolled back on error;
+    # connections that died are dropped from the pool instead of reused
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+
 def ensure_schema() -> None:
     ddl = """
     CREATE EXTENSION IF NOT EXISTS timescaledb;
@@ -21,21 +74,32 @@ def ensure_schema() -> None:
     CREATE TABLE IF NOT EXISTS candles (
         ts timestamptz NOT NULL,
         timeframe text NOT NULL,
-        open numeric NOT NULL,
-        high numeric NOT NULL,
-        low numeric NOT NULL,
-        close numeric NOT NULL,
-        volume numeric DEFAULT 0,
+        open double precision NOT NULL,
+        high double precision NOT NULL,
+        low double precision NOT NULL,
+        close double precision NOT NULL,
+        volume double precision DEFAULT 0,
         PRIMARY KEY (ts, timeframe)
     );
     SELECT create_hypertable('candles', 'ts', if_not_exists => TRUE);
+    CREATE INDEX IF NOT EXISTS candles_timeframe_ts_idx ON candles (timeframe, ts DESC);
+    DO $$
+    BEGIN
+      IF NOT EXISTS (
+        SELECT 1 FROM timescaledb_information.hypertables
+        WHERE hypertable_name = 'candles' AND compression_enabled
+      ) THEN
+        ALTER TABLE candles SET (timescaledb.compress, timescaledb.compress_segmentby = 'timeframe');
+      END IF;
+    END $$;
+    SELECT add_compression_policy('candles', INTERVAL '7 days', if_not_exists => TRUE);
 
     CREATE TABLE IF NOT EXISTS indicators (
         ts timestamptz NOT NULL PRIMARY KEY,
-        ema20 numeric, ema50 numeric, ema200 numeric,
-        rsi numeric, macd numeric, macd_signal numeric,
-        bb_upper numeric, bb_lower numeric,
-        atr numeric, adx numeric
+        ema20 double precision, ema50 double precision, ema200 double precision,
+        rsi double precision, macd double precision, macd_signal double precision,
+        bb_upper double precision, bb_lower double precision,
+        atr double precision, adx double precision
     );
     SELECT create_hypertable('indicators', 'ts', if_not_exists => TRUE);
 
@@ -43,69 +107,132 @@ def ensure_schema() -> None:
         ts timestamptz NOT NULL,
         trade_id text,
         side text,
-        price numeric,
-        qty numeric,
-        fee numeric,
-        pnl numeric,
+        price double precision,
+        qty double precision,
+        fee double precision,
+        pnl double precision,
         regime text,
-        confidence numeric,
+        confidence double precision,
         grid_level int
     );
     SELECT create_hypertable('trade_events', 'ts', if_not_exists => TRUE);
     """
-    with get_conn() as conn:
+    with _conn() as conn:
         with conn.cursor() as cur:
             cur.execute(ddl)
-        conn.commit()
 
 
 def insert_trade_event(row: Dict[str, Any]) -> None:
-    with get_conn() as conn:
+    insert_trade_events([row])
+
+
+def insert_trade_events(rows: Iterable[Dict[str, Any]]) -> None:
+    with _conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO trade_events(ts, trade_id, side, price, qty, fee, pnl, regime, confidence, grid_level)
-                VALUES (%(ts)s, %(trade_id)s, %(side)s, %(price)s, %(qty)s, %(fee)s, %(pnl)s, %(regime)s, %(confidence)s, %(grid_level)s)
-                """,
-                row,
+            execute_values(
+                cur, _INSERT_TRADE_EVENTS_SQL, rows,
+                template=_TRADE_EVENT_TEMPLATE, page_size=500,
             )
-        conn.commit()
+
+
+_UPSERT_CANDLES_SQL = """
+    INSERT INTO candles(ts, timeframe, open, high, low, close, volume)
+    VALUES %s
+    ON CONFLICT (ts, timeframe) DO UPDATE SET
+      open=EXCLUDED.open,
+      high=EXCLUDED.high,
+      low=EXCLUDED.low,
+      close=EXCLUDED.close,
+      volume=EXCLUDED.volume
+"""
 
 
 def upsert_candles(rows: Iterable[Tuple]) -> None:
     # rows: (ts, timeframe, open, high, low, close, volume)
-    with get_conn() as conn:
+    with _conn() as conn:
         with conn.cursor() as cur:
-            execute_values(
-                cur,
-                """
-                INSERT INTO candles(ts, timeframe, open, high, low, close, volume)
-                VALUES %s
-                ON CONFLICT (ts, timeframe) DO UPDATE SET
-                  open=EXCLUDED.open,
-                  high=EXCLUDED.high,
-                  low=EXCLUDED.low,
-                  close=EXCLUDED.close,
-                  volume=EXCLUDED.volume
-                """,
-                rows,
-            )
-        conn.commit()
+            execute_values(cur, _UPSERT_CANDLES_SQL, rows, page_size=500)
+
+
+_UPSERT_INDICATORS_SQL = """
+    INSERT INTO indicators(ts, ema20, ema50, ema200, rsi, macd, macd_signal, bb_upper, bb_lower, atr, adx)
+    VALUES %s
+    ON CONFLICT (ts) DO UPDATE SET
+      ema20=EXCLUDED.ema20, ema50=EXCLUDED.ema50, ema200=EXCLUDED.ema200,
+      rsi=EXCLUDED.rsi, macd=EXCLUDED.macd, macd_signal=EXCLUDED.macd_signal,
+      bb_upper=EXCLUDED.bb_upper, bb_lower=EXCLUDED.bb_lower,
+      atr=EXCLUDED.atr, adx=EXCLUDED.adx
+"""
 
 
 def upsert_indicator(ts, ema20, ema50, ema200, rsi_v, macd_v, macd_signal_v, bb_u, bb_l, atr_v, adx_v) -> None:
-    with get_conn() as conn:
+    upsert_indicators([(ts, ema20, ema50, ema200, rsi_v, macd_v, macd_signal_v, bb_u, bb_l, atr_v, adx_v)])
+
+
+def upsert_indicators(rows: Iterable[Tuple]) -> None:
+    # rows: (ts, ema20, ema50, ema200, rsi, macd, macd_signal, bb_upper, bb_lower, atr, adx)
+    with _conn() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, _UPSERT_INDICATORS_SQL, rows, page_size=1000)
+
+
+def upsert_market_data(candle_rows: Iterable[Tuple], indicator_rows: Iterable[Tuple]) -> None:
+    # candles and their indicators in one transaction
+    with _conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO indicators(ts, ema20, ema50, ema200, rsi, macd, macd_signal, bb_upper, bb_lower, atr, adx)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (ts) DO UPDATE SET
-                  ema20=EXCLUDED.ema20, ema50=EXCLUDED.ema50, ema200=EXCLUDED.ema200,
-                  rsi=EXCLUDED.rsi, macd=EXCLUDED.macd, macd_signal=EXCLUDED.macd_signal,
-                  bb_upper=EXCLUDED.bb_upper, bb_lower=EXCLUDED.bb_lower,
-                  atr=EXCLUDED.atr, adx=EXCLUDED.adx
-                """,
-                (ts, ema20, ema50, ema200, rsi_v, macd_v, macd_signal_v, bb_u, bb_l, atr_v, adx_v),
+            execute_values(cur, _UPSERT_CANDLES_SQL, candle_rows, page_size=500)
+            execute_values(cur, _UPSERT_INDICATORS_SQL, indicator_rows, page_size=1000)
+
+
+class MarketDataWriter:
+    # Takes the live loop's candle and indicator upserts off its thread.
+    # Rows are keyed by primary key, so the overlapping windows of
+    # consecutive ticks collapse to one row each (a single upsert can't
+    # touch a row twice anyway), and are flushed together every interval.
+    def __init__(
+        self,
+        interval: float = FLUSH_INTERVAL_SECONDS,
+        write_fn: Callable[[Iterable[Tuple], Iterable[Tuple]], None] = upsert_market_data,
+    ) -> None:
+        self._interval = interval
+        self._write_fn = write_fn
+        self._candles: Dict[Tuple, Tuple] = {}
+        self._indicators: Dict[Any, Tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="market-data-writer")
+        self._thread.start()
+
+    def add(self, candle_rows: Iterable[Tuple], indicator_rows: Iterable[Tuple]) -> None:
+        with self._lock:
+            for row in candle_rows:
+                self._candles[(row[0], row[1])] = row
+            for row in indicator_rows:
+                self._indicators[row[0]] = row
+
+    def flush(self) -> None:
+        with self._lock:
+            candles, self._candles = self._candles, {}
+            indicators, self._indicators = self._indicators, {}
+        if not candles and not indicators:
+            return
+        try:
+            self._write_fn(list(candles.values()), list(indicators.values()))
+        except Exception:
+            logger.warning(
+                "DB write failed for %d candles/%d indicators, will retry",
+                len(candles), len(indicators),
             )
-        conn.commit()
+            # rows added since take precedence over the ones being put back
+            with self._lock:
+                self._candles = {**candles, **self._candles}
+                self._indicators = {**indicators, **self._indicators}
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.flush()
@@ -1,32 +1,297 @@
+import asyncio
+import csv
+import io
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Optional
+from pathlib import Path
+from typing import List, Optional
 
 import ccxt
+import ccxt.async_support as ccxt_async
+import numpy as np
 import pandas as pd
 
+from data._exchange import create_exchange
+
 logger = logging.getLogger(__name__)
 
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+# candles per request when the exchange doesn't advertise its maximum
+DEFAULT_OHLCV_LIMIT = 300
+
+
+def _epoch_ms(timestamps: pd.Series) -> pd.Series:
+    return (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+
+
+def _sorted_by_timestamp(df: pd.DataFrame) -> pd.DataFrame:
+    # saved files are normally in order already; only sort when they aren't
+    if df["timestamp"].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    return df.sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def _parse_checkpoint_ms(timestamps: pd.Series) -> pd.Series:
+    # checkpoints hold epoch ms; older ones ISO text
+    if pd.api.types.is_numeric_dtype(timestamps):
+        return timestamps.astype(np.int64)
+    return _epoch_ms(pd.to_datetime(timestamps, utc=True, format="ISO8601"))
+
+
+def _last_checkpoint_ms(path: Path) -> Optional[int]:
+    # only the tail of the checkpoint is read; rows are far shorter than 4 KiB
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if not lines:
+        return None
+    last = lines[-1].decode().split(",", 1)[0]
+    if last == "timestamp":
+        return None
+    if last.isdigit():
+        return int(last)
+    return int(_parse_checkpoint_ms(pd.Series([last])).iloc[0])
+
+
+def _read_checkpoint(path: Path, size: int) -> np.ndarray:
+    # the first size bytes: the rows that were there before this run appended
+    with open(path, "rb") as f:
+        head = f.read(size)
+    partial = pd.read_csv(io.BytesIO(head))
+    if len(partial) == 0:
+        return np.empty((0, len(OHLCV_COLUMNS)))
+    partial["timestamp"] = _parse_checkpoint_ms(partial["timestamp"])
+    return partial[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+
+
+class _RequestSpacer:
+    # Spaces request starts at least interval seconds apart across threads
+    # or tasks, so concurrent fetches overlap their latency but not the
+    # rate limit.
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        # claims the next slot and returns how long to wait for it
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self._interval
+        return start - now
+
+    def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _Backfill:
+    # State of one fetch_ohlcv call. The range splits into windows of limit
+    # candles, fetched concurrently and added in order so checkpoints stay
+    # a prefix; every window holds at most limit candles, so the rows fit a
+    # buffer sized up front.
+    def __init__(
+        self,
+        since: int,
+        end_ts: int,
+        current_since: int,
+        span: int,
+        limit: int,
+        resume_path: Optional[str],
+        resumed_bytes: int,
+        cache_path: Optional[Path],
+        cached: Optional[pd.DataFrame],
+    ) -> None:
+        self.since = since
+        self.end_ts = end_ts
+        self.span = span
+        self.limit = limit
+        self.starts = range(current_since, end_ts, span)
+        self.resume_path = resume_path
+        self.resumed_bytes = resumed_bytes
+        self.cache_path = cache_path
+        self.cached = cached
+        self._buf = np.empty((len(self.starts) * limit, len(OHLCV_COLUMNS)))
+        self._write = 0
+        self._chunks = 0
+        # checkpoints append only the rows gathered since the previous one
+        self._rows_written = 0
+        self._fh = None
+        if resume_path:
+            self._fh = open(resume_path, "a", buffering=1 << 20, newline="")
+            if self._fh.tell() == 0:
+                csv.writer(self._fh).writerow(OHLCV_COLUMNS)
+
+    def window_rows(self, start: int, candles: List[list]) -> np.ndarray:
+        arr = np.asarray(candles, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+        return arr[arr[:, 0] < start + self.span]
+
+    def add(self, start: int, rows: np.ndarray) -> None:
+        self._buf[self._write:self._write + len(rows)] = rows
+        self._write += len(rows)
+        self._chunks += 1
+
+        total_ms = self.end_ts - self.since
+        elapsed_ms = start + self.span - self.since
+        pct = min(100.0, elapsed_ms / total_ms * 100) if total_ms > 0 else 100.0
+        if self._chunks % 10 == 0:
+            logger.info("Fetch progress: %.1f%% (%d candles)", pct, self._write)
+            self._checkpoint()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._checkpoint()
+            self._fh.close()
+            self._fh = None
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._buf[:self._write]
+
+    def _checkpoint(self) -> None:
+        if self._fh is None:
+            return
+        # timestamps stay epoch ms; they are only parsed when loaded
+        try:
+            rows = self._buf[self._rows_written:self._write].tolist()
+            csv.writer(self._fh).writerows([int(r[0]), *r[1:]] for r in rows)
+            self._fh.flush()
+            self._rows_written = self._write
+        except Exception:
+            logger.warning("Failed to save partial progress to %s", self._fh.name)
+
 
 class HistoricalLoader:
     def __init__(
         self,
         exchange_id: str = "coinbase",
         trading_pair: str = "BTC/USDT",
+        cache_dir: Optional[str] = None,
+        http2: bool = False,
     ) -> None:
-        self._exchange = getattr(ccxt, exchange_id)({"enableRateLimit": True})
+        # fetch_ohlcv paces requests itself (_RequestSpacer); ccxt's own
+        # throttle would sleep a second time and isn't thread-safe
+        self._exchange = create_exchange(
+            exchange_id, {"enableRateLimit": False}, http2=http2
+        )
+        self._exchange_id = exchange_id
+        # largest fetch_ohlcv page the exchange serves (Binance 1000, Kraken
+        # 720, Coinbase 300), from ccxt's per-exchange feature table; older
+        # ccxt releases don't have one
+        features = (getattr(self._exchange, "features", None) or {}).get("spot") or {}
+        self._max_limit = (
+            (features.get("fetchOHLCV") or {}).get("limit")
+            or self._exchange.options.get("fetchOHLCVLimit")
+            or DEFAULT_OHLCV_LIMIT
+        )
         self._trading_pair = trading_pair
+        # with a cache_dir, candles persist per (exchange, pair, timeframe)
+        # and later fetches only download what the cache doesn't cover
+        self._cache_dir = cache_dir
+
+    def _cache_path(self, timeframe: str) -> Optional[Path]:
+        if self._cache_dir is None:
+            return None
+        pair = self._trading_pair.replace("/", "_")
+        return Path(self._cache_dir) / f"{self._exchange_id}_{pair}_{timeframe}.parquet"
+
+    def _async_exchange(self) -> ccxt_async.Exchange:
+        return getattr(ccxt_async, self._exchange_id)({"enableRateLimit": False})
 
     def fetch_ohlcv(
         self,
         timeframe: str = "5m",
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        limit_per_request: int = 300,
+        limit_per_request: Optional[int] = None,
         max_retries: int = 5,
         resume_path: Optional[str] = None,
+        max_workers: int = 4,
     ) -> pd.DataFrame:
+        backfill = self._start_backfill(
+            timeframe, start_date, end_date, limit_per_request, resume_path
+        )
+        spacer = _RequestSpacer(self._exchange.rateLimit / 1000)
+
+        def fetch(start: int) -> Optional[np.ndarray]:
+            candles = self._fetch_chunk(
+                start, timeframe, backfill.limit, max_retries, spacer
+            )
+            if candles is None:
+                return None
+            return backfill.window_rows(start, candles)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for start, rows in zip(backfill.starts, executor.map(fetch, backfill.starts)):
+                if rows is None:
+                    logger.error("Failed to fetch chunk after %d retries, saving partial progress", max_retries)
+                    break
+                backfill.add(start, rows)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            backfill.close()
+        return self._finish_backfill(backfill)
+
+    async def fetch_ohlcv_async(
+        self,
+        timeframe: str = "5m",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit_per_request: Optional[int] = None,
+        max_retries: int = 5,
+        resume_path: Optional[str] = None,
+        max_concurrency: int = 4,
+    ) -> pd.DataFrame:
+        # Same result as fetch_ohlcv, with the windows fetched as tasks on a
+        # ccxt.async_support exchange instead of worker threads.
+        backfill = self._start_backfill(
+            timeframe, start_date, end_date, limit_per_request, resume_path
+        )
+        spacer = _RequestSpacer(self._exchange.rateLimit / 1000)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        exchange = self._async_exchange()
+
+        async def fetch(start: int) -> Optional[np.ndarray]:
+            async with semaphore:
+                candles = await self._fetch_chunk_async(
+                    exchange, start, timeframe, backfill.limit, max_retries, spacer
+                )
+            if candles is None:
+                return None
+            return backfill.window_rows(start, candles)
+
+        tasks = [asyncio.ensure_future(fetch(start)) for start in backfill.starts]
+        try:
+            for start, task in zip(backfill.starts, tasks):
+                rows = await task
+                if rows is None:
+                    logger.error("Failed to fetch chunk after %d retries, saving partial progress", max_retries)
+                    break
+                backfill.add(start, rows)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await exchange.close()
+            backfill.close()
+        return self._finish_backfill(backfill)
+
+    def _start_backfill(
+        self,
+        timeframe: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        limit_per_request: Optional[int],
+        resume_path: Optional[str],
+    ) -> _Backfill:
         if start_date:
             since = int(
                 datetime.strptime(start_date, "%Y-%m-%d")
@@ -49,101 +314,190 @@ class HistoricalLoader:
         else:
             end_ts = int(datetime.now(timezone.utc).timestamp() * 1000)
 
-        all_candles: list = []
         current_since = since
 
+        cache_path = self._cache_path(timeframe)
+        cached = None
+        if cache_path is not None and cache_path.exists():
+            cached = self.load_from_parquet(str(cache_path))
+            cached_ms = _epoch_ms(cached["timestamp"])
+            if len(cached) > 0 and cached_ms.iloc[0] <= since:
+                # refetch the newest cached candle, it may not have been closed
+                current_since = max(since, int(cached_ms.iloc[-1]))
+
+        # a checkpoint is only tailed here; its earlier rows are read back
+        # once the fetch is done
+        resumed_bytes = 0
         if resume_path:
-            from pathlib import Path
             rp = Path(resume_path)
-            if rp.exists():
-                partial = pd.read_csv(rp)
-                if len(partial) > 0 and "timestamp" in partial.columns:
-                    all_candles = partial.values.tolist()
-                    last_ms = int(pd.to_datetime(partial["timestamp"].iloc[-1]).timestamp() * 1000)
-                    current_since = last_ms + 1
-                    logger.info("Resumed from %s (%d rows, continuing from %s)", resume_path, len(partial), partial["timestamp"].iloc[-1])
-
-        total_ms = end_ts - since
-        chunk_count = 0
-
-        while current_since < end_ts:
-            retries = 0
-            candles = None
-            while retries < max_retries:
-                try:
-                    candles = self._exchange.fetch_ohlcv(
-                        self._trading_pair,
-                        timeframe=timeframe,
-                        since=current_since,
-                        limit=limit_per_request,
-                    )
-                    break
-                except ccxt.RateLimitExceeded:
-                    retries += 1
-                    wait = 10 * retries
-                    logger.warning("Rate limit hit, retry %d/%d (waiting %ds)", retries, max_retries, wait)
-                    time.sleep(wait)
-                except ccxt.NetworkError as e:
-                    retries += 1
-                    wait = 5 * retries
-                    logger.warning("Network error: %s, retry %d/%d (waiting %ds)", e, retries, max_retries, wait)
-                    time.sleep(wait)
-                except ccxt.BaseError as e:
-                    logger.error("Exchange error fetching OHLCV: %s", e)
-                    raise
-
-            if candles is None:
-                logger.error("Failed to fetch chunk after %d retries, saving partial progress", max_retries)
-                break
-
-            if not candles:
-                break
-
-            all_candles.extend(candles)
-            last_ts = candles[-1][0]
-            if last_ts <= current_since:
-                break
-            current_since = last_ts + 1
-            chunk_count += 1
+            if rp.exists() and rp.stat().st_size > 0:
+                resumed_bytes = rp.stat().st_size
+                last = _last_checkpoint_ms(rp)
+                if last is not None:
+                    current_since = max(current_since, last + 1)
+                    logger.info("Resumed from %s (continuing from %d)", resume_path, last)
 
-            elapsed_ms = current_since - since
-            pct = min(100.0, elapsed_ms / total_ms * 100) if total_ms > 0 else 100.0
-            if chunk_count % 10 == 0:
-                logger.info("Fetch progress: %.1f%% (%d candles)", pct, len(all_candles))
-                if resume_path:
-                    self._save_partial(all_candles, resume_path)
+        limit = min(limit_per_request or self._max_limit, self._max_limit)
+        span = limit * self._exchange.parse_timeframe(timeframe) * 1000
+        return _Backfill(
+            since, end_ts, current_since, span, limit,
+            resume_path, resumed_bytes, cache_path, cached,
+        )
 
-            time.sleep(self._exchange.rateLimit / 1000)
+    def _finish_backfill(self, backfill: _Backfill) -> pd.DataFrame:
+        fetched = backfill.rows
+        if backfill.resumed_bytes:
+            resumed = _read_checkpoint(Path(backfill.resume_path), backfill.resumed_bytes)
+            fetched = np.concatenate([resumed, fetched])
+        df = self._to_frame(fetched, backfill.end_ts)
+        if backfill.cache_path is not None:
+            df = self._merge_cache(
+                backfill.cache_path, backfill.cached, df, backfill.since, backfill.end_ts,
+                backfill.span // backfill.limit,
+            )
+        return df
 
-        if not all_candles:
+    def _to_frame(self, arr: np.ndarray, end_ts: int) -> pd.DataFrame:
+        if len(arr) == 0:
             return pd.DataFrame(
-                columns=["timestamp", "open", "high", "low", "close", "volume"]
+                columns=OHLCV_COLUMNS
             )
 
-        df = pd.DataFrame(
-            all_candles,
-            columns=["timestamp", "open", "high", "low", "close", "volume"],
-        )
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df = df[df["timestamp"] <= pd.Timestamp(end_ts, unit="ms", tz="UTC")]
-        df = df.drop_duplicates(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
+        # filter, dedupe (first occurrence wins) and sort on the integer ms
+        # before any datetime conversion
+        ts = arr[:, 0].astype(np.int64)
+        keep = np.flatnonzero(ts <= end_ts)
+        ts, first = np.unique(ts[keep], return_index=True)
+        # one gather into a single float64 block for the price/volume columns
+        df = pd.DataFrame(arr[keep[first], 1:], columns=OHLCV_COLUMNS[1:])
+        df.insert(0, "timestamp", pd.to_datetime(ts, unit="ms", utc=True))
         return df
 
-    def _save_partial(self, candles: list, path: str) -> None:
-        try:
-            df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-            df.to_csv(path, index=False)
-        except Exception:
-            logger.warning("Failed to save partial progress to %s", path)
+    def _merge_cache(
+        self,
+        cache_path: Path,
+        cached: Optional[pd.DataFrame],
+        fetched: pd.DataFrame,
+        since: int,
+        end_ts: int,
+        interval_ms: int,
+    ) -> pd.DataFrame:
+        # freshly fetched candles replace cached ones with the same timestamp
+        if cached is None or len(cached) == 0:
+            merged = fetched
+        elif len(fetched) == 0:
+            merged = cached
+        else:
+            # _start_backfill only fetches from the newest cached candle on,
+            # which assumes the cache is one unbroken range; a fetch that
+            # neither overlaps nor adjoins it is returned but not cached
+            cached_ms = _epoch_ms(cached["timestamp"])
+            fetched_ms = _epoch_ms(fetched["timestamp"])
+            if (
+                fetched_ms.iloc[0] > cached_ms.iloc[-1] + interval_ms
+                or fetched_ms.iloc[-1] < cached_ms.iloc[0] - interval_ms
+            ):
+                logger.info("Fetched range is disjoint from %s, not caching it", cache_path)
+                return fetched
+            merged = (
+                pd.concat([cached, fetched], ignore_index=True)
+                .drop_duplicates(subset=["timestamp"], keep="last", ignore_index=True)
+                .sort_values("timestamp", kind="stable", ignore_index=True)
+            )
+        if len(merged) == 0:
+            return merged
+        if merged is not cached:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.save_to_parquet(merged, str(cache_path))
+        # merged is sorted, so the requested range is one contiguous slice
+        ts = _epoch_ms(merged["timestamp"])
+        lo = ts.searchsorted(since, side="left")
+        hi = ts.searchsorted(end_ts, side="right")
+        return merged.iloc[lo:hi].reset_index(drop=True)
+
+    def _fetch_chunk(
+        self,
+        since: int,
+        timeframe: str,
+        limit: int,
+        max_retries: int,
+        spacer: _RequestSpacer,
+    ) -> Optional[List[list]]:
+        retries = 0
+        while retries < max_retries:
+            spacer.wait()
+            try:
+                return self._exchange.fetch_ohlcv(
+                    self._trading_pair,
+                    timeframe=timeframe,
+                    since=since,
+                    limit=limit,
+                )
+            except ccxt.NetworkError as e:
+                retries += 1
+                time.sleep(self._retry_wait(e, retries, max_retries))
+            except ccxt.BaseError as e:
+                logger.error("Exchange error fetching OHLCV: %s", e)
+                raise
+        return None
+
+    async def _fetch_chunk_async(
+        self,
+        exchange: ccxt_async.Exchange,
+        since: int,
+        timeframe: str,
+        limit: int,
+        max_retries: int,
+        spacer: _RequestSpacer,
+    ) -> Optional[List[list]]:
+        retries = 0
+        while retries < max_retries:
+            await asyncio.sleep(max(0.0, spacer.reserve()))
+            try:
+                return await exchange.fetch_ohlcv(
+                    self._trading_pair,
+                    timeframe=timeframe,
+                    since=since,
+                    limit=limit,
+                )
+            except ccxt.NetworkError as e:
+                retries += 1
+                await asyncio.sleep(self._retry_wait(e, retries, max_retries))
+            except ccxt.BaseError as e:
+                logger.error("Exchange error fetching OHLCV: %s", e)
+                raise
+        return None
+
+    def _retry_wait(self, error: Exception, retries: int, max_retries: int) -> int:
+        if isinstance(error, ccxt.RateLimitExceeded):
+            wait = 10 * retries
+            logger.warning("Rate limit hit, retry %d/%d (waiting %ds)", retries, max_retries, wait)
+        else:
+            wait = 5 * retries
+            logger.warning("Network error: %s, retry %d/%d (waiting %ds)", error, retries, max_retries, wait)
+        return wait
 
     def load_from_csv(self, path: str) -> pd.DataFrame:
-        df = pd.read_csv(path)
+        if path.endswith(".parquet"):
+            return self.load_from_parquet(path)
+        # Arrow's reader is multi-threaded, parses ISO timestamps itself and
+        # rounds floats correctly; columns still come back numpy-backed
+        df = pd.read_csv(path, engine="pyarrow")
         if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
+            if pd.api.types.is_numeric_dtype(df["timestamp"]):
+                df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+            else:
+                df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+        return _sorted_by_timestamp(df)
 
     def save_to_csv(self, df: pd.DataFrame, path: str) -> None:
         df.to_csv(path, index=False)
         logger.info("Saved %d rows to %s", len(df), path)
+
+    def load_from_parquet(self, path: str) -> pd.DataFrame:
+        return _sorted_by_timestamp(pd.read_parquet(path, engine="pyarrow"))
+
+    def save_to_parquet(self, df: pd.DataFrame, path: str) -> None:
+        # columnar and typed: a fraction of the CSV size and no date parsing on load
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+        logger.info("Saved %d rows to %s", len(df), path)
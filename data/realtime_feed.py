@@ -1,13 +1,108 @@
+import asyncio
 import logging
 import threading
-import time
-from typing import Any, Callable, Dict, List, Optional
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
 
 import ccxt
+import numpy as np
+
+from data._exchange import create_exchange
+
+try:
+    import ccxt.pro as ccxtpro
+except ImportError:
+    ccxtpro = None
 
 logger = logging.getLogger(__name__)
 
 
+class Tick(NamedTuple):
+    # the ticker fields the trader reads; ccxt's full ticker dict carries
+    # 20+ more keys plus the raw exchange payload
+    ts: Optional[int]
+    last: Optional[float]
+    bid: Optional[float]
+    ask: Optional[float]
+    volume: Optional[float]
+
+
+def _to_tick(ticker: Dict[str, Any]) -> Tick:
+    get = ticker.get
+    return Tick(get("timestamp"), get("last"), get("bid"), get("ask"), get("baseVolume"))
+
+
+class CandleBuffer:
+    # The trader's recent candles as preallocated column arrays. update()
+    # merges a refetched window by copying only the candles at or after
+    # the newest buffered one; properties are views of the last
+    # `capacity` rows. Storage is twice that, so appends slide the window
+    # and only shift the rows back once it reaches the end.
+    def __init__(self, capacity: int = 500) -> None:
+        self._capacity = capacity
+        self._ts = np.empty(2 * capacity, dtype=np.int64)
+        self._values = np.empty((5, 2 * capacity), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def update(self, candles: List[list]) -> None:
+        if not candles:
+            return
+        last = self._ts[self._end - 1] if self._end > self._start else None
+        if last is None or candles[0][0] > last or candles[-1][0] < last:
+            # no overlap with what's buffered: start over from this window
+            self._start = self._end = 0
+            first = 0
+        else:
+            first = len(candles) - 1
+            while first > 0 and candles[first - 1][0] >= last:
+                first -= 1
+            if candles[first][0] == last:
+                # the newest buffered candle may have been still forming
+                self._values[:, self._end - 1] = candles[first][1:]
+                first += 1
+        for candle in candles[first:]:
+            self._append(candle)
+
+    def _append(self, candle: list) -> None:
+        if self._end == self._ts.shape[0]:
+            keep = self._capacity - 1
+            self._ts[:keep] = self._ts[self._end - keep:self._end]
+            self._values[:, :keep] = self._values[:, self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._ts[self._end] = candle[0]
+        self._values[:, self._end] = candle[1:]
+        self._end += 1
+        self._start = max(self._start, self._end - self._capacity)
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts[self._start:self._end]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._values[0, self._start:self._end]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._values[1, self._start:self._end]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._values[2, self._start:self._end]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._values[3, self._start:self._end]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._values[4, self._start:self._end]
+
+
 class RealtimeFeed:
     def __init__(
         self,
@@ -16,6 +111,8 @@ class RealtimeFeed:
         api_key: str = "",
         api_secret: str = "",
         sandbox: bool = False,
+        use_ws: bool = True,
+        http2: bool = False,
     ) -> None:
         config: Dict[str, Any] = {"enableRateLimit": True}
         if api_key:
@@ -25,13 +122,30 @@ class RealtimeFeed:
         if sandbox:
             config["sandbox"] = True
 
-        self._exchange = getattr(ccxt, exchange_id)(config)
+        self._exchange = create_exchange(exchange_id, config, http2=http2)
+        # with ccxt.pro the polling thread streams tickers over the exchange's
+        # websocket instead of issuing a REST request per interval; the
+        # client is built inside that thread's event loop
+        self._exchange_id = exchange_id
+        self._config = config
+        self._use_ws = use_ws and ccxtpro is not None and hasattr(ccxtpro, exchange_id)
         self._trading_pair = trading_pair
-        self._running = False
+        # set by stop_polling; the loops wait on it instead of sleeping
+        self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
-        self._callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        # replaced, never mutated, so a tick iterates whatever tuple it read
+        self._callbacks: Tuple[Callable[[Tick], None], ...] = ()
         self._last_price: Optional[float] = None
-        self._last_ticker: Optional[Dict[str, Any]] = None
+        self._last_ticker: Optional[Tick] = None
+        # true while the websocket is delivering tickers; readers fall back
+        # to REST whenever it isn't
+        self._streaming = False
+        # candles streamed next to the ticker (stream_ohlcv); empty until
+        # the stream has seeded them and cleared when it drops
+        self._ohlcv_timeframe: Optional[str] = None
+        self._ohlcv_limit = 0
+        self._candles: Deque[list] = deque()
+        self._candles_lock = threading.Lock()
 
     @property
     def exchange(self) -> ccxt.Exchange:
@@ -42,17 +156,25 @@ class RealtimeFeed:
         return self._last_price
 
     @property
-    def last_ticker(self) -> Optional[Dict[str, Any]]:
+    def last_ticker(self) -> Optional[Tick]:
         return self._last_ticker
 
-    def on_tick(self, callback: Callable[[Dict[str, Any]], None]) -> None:
-        self._callbacks.append(callback)
+    @property
+    def streams(self) -> bool:
+        return self._use_ws
+
+    @property
+    def streaming(self) -> bool:
+        return self._streaming
+
+    def on_tick(self, callback: Callable[[Tick], None]) -> None:
+        self._callbacks = self._callbacks + (callback,)
 
-    def fetch_ticker(self) -> Dict[str, Any]:
-        ticker = self._exchange.fetch_ticker(self._trading_pair)
-        self._last_ticker = ticker
-        self._last_price = ticker.get("last")
-        return ticker
+    def fetch_ticker(self) -> Tick:
+        tick = _to_tick(self._exchange.fetch_ticker(self._trading_pair))
+        self._last_ticker = tick
+        self._last_price = tick.last
+        return tick
 
     def fetch_order_book(self, limit: int = 20) -> Dict[str, Any]:
         return self._exchange.fetch_order_book(self._trading_pair, limit=limit)
@@ -64,43 +186,142 @@ class RealtimeFeed:
             self._trading_pair, timeframe=timeframe, limit=limit
         )
 
+    def stream_ohlcv(self, timeframe: str = "5m", limit: int = 100) -> None:
+        # keeps the last `limit` candles updated from the stream; call
+        # before start_polling
+        self._ohlcv_timeframe = timeframe
+        self._ohlcv_limit = limit
+        self._candles = deque(maxlen=limit)
+
+    def recent_ohlcv(self, timeframe: str = "5m", limit: int = 100) -> list:
+        # streamed candles when they cover the request, REST otherwise
+        if timeframe == self._ohlcv_timeframe and limit <= self._ohlcv_limit:
+            with self._candles_lock:
+                if self._candles:
+                    return list(self._candles)[-limit:]
+        return self.fetch_recent_ohlcv(timeframe, limit)
+
     def start_polling(self, interval: float = 10.0) -> None:
-        if self._running:
+        if self._thread is not None:
             return
-        self._running = True
-        self._thread = threading.Thread(
-            target=self._poll_loop, args=(interval,), daemon=True
-        )
+        self._stop_event.clear()
+        if self._use_ws:
+            self._thread = threading.Thread(
+                target=lambda: asyncio.run(self._ws_loop(interval)), daemon=True
+            )
+        else:
+            self._thread = threading.Thread(
+                target=self._poll_loop, args=(interval,), daemon=True
+            )
         self._thread.start()
-        logger.info("Realtime feed polling started (interval=%.1fs)", interval)
+        logger.info(
+            "Realtime feed %s started (interval=%.1fs)",
+            "stream" if self._use_ws else "polling", interval,
+        )
 
     def stop_polling(self) -> None:
-        self._running = False
+        self._stop_event.set()
         if self._thread is not None:
             self._thread.join(timeout=15)
             self._thread = None
         logger.info("Realtime feed polling stopped")
 
     def _poll_loop(self, interval: float) -> None:
-        while self._running:
+        while not self._stop_event.is_set():
             try:
-                ticker = self.fetch_ticker()
-                for cb in self._callbacks:
-                    try:
-                        cb(ticker)
-                    except Exception:
-                        logger.exception("Error in tick callback")
+                self._dispatch(_to_tick(self._exchange.fetch_ticker(self._trading_pair)))
             except ccxt.RateLimitExceeded:
                 logger.warning("Rate limit exceeded, backing off")
-                time.sleep(interval * 3)
+                wait = interval * 3
             except ccxt.NetworkError as e:
                 logger.warning("Network error: %s", e)
-                time.sleep(interval * 2)
+                wait = interval * 2
             except Exception:
                 logger.exception("Unexpected error in poll loop")
-                time.sleep(interval * 2)
+                wait = interval * 2
             else:
-                time.sleep(interval)
+                wait = interval
+            if self._stop_event.wait(wait):
+                return
+
+    def _dispatch(self, tick: Tick) -> None:
+        self._last_ticker = tick
+        self._last_price = tick.last
+        for cb in self._callbacks:
+            try:
+                cb(tick)
+            except Exception as e:
+                # tracebacks are only formatted when debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.exception("Error in tick callback %r", cb)
+                else:
+                    logger.warning("Tick callback %r failed: %s", cb, e)
+
+    async def _ws_loop(self, interval: float, client: Any = None) -> None:
+        # interval only paces reconnect backoff; updates arrive as pushed
+        ws = client or getattr(ccxtpro, self._exchange_id)(dict(self._config))
+        watchers = [self._watch_ticker(ws, interval)]
+        if self._ohlcv_timeframe is not None:
+            watchers.append(self._watch_ohlcv(ws, interval))
+        try:
+            await asyncio.gather(*watchers)
+        finally:
+            self._streaming = False
+            with self._candles_lock:
+                self._candles.clear()
+            await ws.close()
+
+    async def _watch_ticker(self, ws: Any, interval: float) -> None:
+        while not self._stop_event.is_set():
+            try:
+                tick = _to_tick(await ws.watch_ticker(self._trading_pair))
+                self._streaming = True
+                self._dispatch(tick)
+            except ccxt.NetworkError as e:
+                self._streaming = False
+                logger.warning("Ticker stream error: %s", e)
+                await asyncio.to_thread(self._stop_event.wait, interval * 2)
+            except Exception:
+                self._streaming = False
+                logger.exception("Unexpected error in ticker stream")
+                await asyncio.to_thread(self._stop_event.wait, interval * 2)
+
+    async def _watch_ohlcv(self, ws: Any, interval: float) -> None:
+        # the stream only pushes the candles that change, so the buffer is
+        # seeded over REST on (re)connect
+        seeded = False
+        while not self._stop_event.is_set():
+            try:
+                if not seeded:
+                    candles = await ws.fetch_ohlcv(
+                        self._trading_pair, self._ohlcv_timeframe, limit=self._ohlcv_limit
+                    )
+                    with self._candles_lock:
+                        self._candles.clear()
+                        self._candles.extend(candles)
+                    seeded = True
+                self._merge_candles(
+                    await ws.watch_ohlcv(self._trading_pair, self._ohlcv_timeframe)
+                )
+            except Exception as e:
+                seeded = False
+                with self._candles_lock:
+                    self._candles.clear()
+                if isinstance(e, ccxt.NetworkError):
+                    logger.warning("Candle stream error: %s", e)
+                else:
+                    logger.exception("Unexpected error in candle stream")
+                await asyncio.to_thread(self._stop_event.wait, interval * 2)
+
+    def _merge_candles(self, candles: List[list]) -> None:
+        # the forming candle is replaced in place until a newer one opens
+        with self._candles_lock:
+            buf = self._candles
+            for candle in candles:
+                if buf and candle[0] == buf[-1][0]:
+                    buf[-1] = candle
+                elif not buf or candle[0] > buf[-1][0]:
+                    buf.append(candle)
 
     def create_limit_buy(
         self, amount: float, price: float, params: Optional[Dict[str, Any]] = None
@@ -116,12 +337,64 @@ class RealtimeFeed:
             self._trading_pair, amount, price, params=params or {}
         )
 
+    def _spot_feature(self, name: str) -> Optional[Dict[str, Any]]:
+        # ccxt's per-market-type feature table; older releases don't have it
+        features = getattr(self._exchange, "features", None) or {}
+        return (features.get("spot") or {}).get(name)
+
+    @property
+    def supports_batch_orders(self) -> bool:
+        # has["createOrders"] covers every market type; binance, for one,
+        # only batches swap orders
+        if not self._exchange.has.get("createOrders"):
+            return False
+        if getattr(self._exchange, "features", None):
+            return bool(self._spot_feature("createOrders"))
+        return True
+
+    @property
+    def max_batch_orders(self) -> Optional[int]:
+        return (self._spot_feature("createOrders") or {}).get("max")
+
+    def create_orders_batch(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # one request for several {side, price, amount} limit orders
+        return self._exchange.create_orders([
+            {
+                "symbol": self._trading_pair,
+                "type": "limit",
+                "side": o["side"],
+                "amount": o["amount"],
+                "price": o["price"],
+            }
+            for o in orders
+        ])
+
     def cancel_order(self, order_id: str) -> Dict[str, Any]:
         return self._exchange.cancel_order(order_id, self._trading_pair)
 
+    @property
+    def supports_batch_cancel(self) -> bool:
+        return bool(self._exchange.has.get("cancelOrders"))
+
+    def cancel_orders_batch(self, order_ids: List[str]) -> Any:
+        return self._exchange.cancel_orders(order_ids, self._trading_pair)
+
     def fetch_order(self, order_id: str) -> Dict[str, Any]:
         return self._exchange.fetch_order(order_id, self._trading_pair)
 
+    @property
+    def supports_batch_fetch(self) -> bool:
+        return bool(self._exchange.has.get("fetchOrders"))
+
+    def fetch_orders_batch(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        # one request for the pair's recent orders; ids older than the
+        # exchange's page are left out and fetched one by one
+        wanted = set(order_ids)
+        return [
+            o for o in self._exchange.fetch_orders(self._trading_pair)
+            if o["id"] in wanted
+        ]
+
     def fetch_open_orders(self) -> list:
         return self._exchange.fetch_open_orders(self._trading_pair)
 
@@ -1,27 +1,34 @@
 import argparse
-import json
 import logging
 import os
 import signal
 import sys
+import threading
 import time
-from collections import deque
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from itertools import repeat
+from logging.handlers import MemoryHandler
 from typing import Any, Dict, Optional
 
-import pandas as pd
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 
+from ai.indicators import INDICATOR_COLUMNS, IndicatorStream
 from ai.trend_detector import TrendDetector
-from ai.volatility_classifier import VolatilityClassifier
+from ai.volatility_classifier import VolatilityClassifier, VolatilityRegime
 from config.config_manager import ConfigManager
 from core.grid_engine import GridEngine, GridSide
 from core.order_manager import OrderManager
 from core.position_tracker import PositionTracker
-from data.realtime_feed import RealtimeFeed
+from data.realtime_feed import CandleBuffer, RealtimeFeed
 from risk.risk_manager import RiskAction, RiskManager
 
 from observability.metrics import (
+    LatchedGauge,
     start_metrics_server,
     bot_mode as m_bot_mode,
     exchange_connected as m_exchange_connected,
@@ -52,16 +59,21 @@ from observability.metrics import (
 )
 
 try:
-    from data.db import ensure_schema, insert_trade_event, upsert_candles, upsert_indicator
+    from data.db import MarketDataWriter, ensure_schema, insert_trade_events
 except Exception:
     # DB optional; continue without DB if not available
+    MarketDataWriter = None
     ensure_schema = None
-    insert_trade_event = None
-    upsert_candles = None
-    upsert_indicator = None
+    insert_trade_events = None
 
 logger = logging.getLogger(__name__)
 
+# log records the file handler holds before writing them out together
+LOG_BUFFER_RECORDS = 256
+# candles the trend/regime/indicator checks read, and their length
+CANDLE_WINDOW = 200
+CANDLE_MS = 5 * 60 * 1000
+
 
 class GridAITrader:
     def __init__(self, mode: str = "paper", profile: str = "default", config_dir: str = "config") -> None:
@@ -73,10 +85,22 @@ class GridAITrader:
         self._setup_logging()
         self._running = False
         self._shutdown_requested = False
+        # set on shutdown so the wait between ticks ends right away
+        self._stop_event = threading.Event()
         self._last_tick_ts: Optional[float] = None
-        self._failed_order_ts: deque[float] = deque(maxlen=1000)
+        # monotonic times of failed placements; entries before the head
+        # are older than an hour and dropped in bulk once they're half
+        self._failed_order_ts = array("d")
+        self._failed_order_head = 0
         self._last_regime: Optional[str] = None
         self._last_confidence: float = 0.0
+        # labelled gauge children, resolved once instead of per tick
+        self._trend_state_gauges = {
+            s: LatchedGauge(m_trend_state.labels(state=s)) for s in ("trending", "ranging")
+        }
+        self._regime_gauges = {
+            r: m_volatility_regime.labels(regime=r.value.lower()) for r in VolatilityRegime
+        }
 
         # Start Prometheus metrics server
         try:
@@ -85,12 +109,17 @@ class GridAITrader:
         except Exception:
             logger.exception("Failed to start metrics server")
 
-        # Ensure DB schema (optional)
+        # Ensure DB schema (optional); nothing is sent to Postgres without it
+        db_ready = False
         try:
             if ensure_schema:
                 ensure_schema()
+                db_ready = True
         except Exception:
             logger.warning("DB not available; continuing without DB")
+        # candles/indicators reach Postgres in batches from a writer thread
+        self._market_writer = MarketDataWriter() if db_ready else None
+        trade_event_sink = insert_trade_events if db_ready else None
 
         logger.info("Initializing GridAI Trader (mode=%s, profile=%s)", mode, profile)
 
@@ -102,6 +131,8 @@ class GridAITrader:
             order_size_usdt=grid_cfg.get("order_size_usdt", 50.0),
             max_open_orders=grid_cfg.get("max_open_orders", 30),
         )
+        # the grid is also rebuilt when it is this old, as in the backtest
+        self._recalib_period_s = (grid_cfg.get("recalibration_interval_minutes") or 60) * 60
 
         risk_cfg = self._config.get("risk") or {}
         self._risk = RiskManager(
@@ -130,13 +161,19 @@ class GridAITrader:
         self._volatility = VolatilityClassifier(
             model_path=ai_cfg.get("volatility_model_path", "models/volatility_model.joblib")
         )
-        self._regime_multipliers = ai_cfg.get("regime_grid_multiplier", {
+        regime_multipliers = ai_cfg.get("regime_grid_multiplier", {
             "LOW": 0.7, "MEDIUM": 1.0, "HIGH": 1.5,
         })
+        # resolved per regime once; unlisted regimes keep the base spacing
+        self._regime_multipliers = {
+            r: float(regime_multipliers.get(r.value, 1.0)) for r in VolatilityRegime
+        }
         self._confidence_threshold = ai_cfg.get("confidence_threshold", 0.6)
+        self._indicators = IndicatorStream(keep=50)
 
         db_path = self._config.get("database", "path") or "state/gridai.db"
-        self._position = PositionTracker(db_path=db_path)
+        # fill events reach Postgres in batches from the tracker's writer thread
+        self._position = PositionTracker(db_path=db_path, trade_event_sink=trade_event_sink)
 
         is_dry_run = mode == "paper"
         self._feed: Optional[RealtimeFeed] = None
@@ -150,6 +187,7 @@ class GridAITrader:
                 api_key=os.environ.get("COINBASE_API_KEY", ""),
                 api_secret=os.environ.get("COINBASE_API_SECRET", ""),
                 sandbox=exchange_cfg.get("sandbox", False),
+                http2=exchange_cfg.get("http2", False),
             )
 
             live_cfg = self._config.get("live") or {}
@@ -167,44 +205,82 @@ class GridAITrader:
                     cancel_order_fn=self._feed.cancel_order,
                     fetch_order_fn=self._feed.fetch_order,
                     fetch_open_orders_fn=self._feed.fetch_open_orders,
+                    fetch_orders_batch_fn=(
+                        self._feed.fetch_orders_batch
+                        if self._feed.supports_batch_fetch else None
+                    ),
+                    place_orders_batch_fn=(
+                        self._feed.create_orders_batch
+                        if self._feed.supports_batch_orders else None
+                    ),
+                    max_batch_orders=self._feed.max_batch_orders,
+                    cancel_orders_batch_fn=(
+                        self._feed.cancel_orders_batch
+                        if self._feed.supports_batch_cancel else None
+                    ),
                     dry_run=False,
                     max_retries=live_cfg.get("retry_max_attempts", 5),
                     retry_backoff=live_cfg.get("retry_backoff_seconds", 2),
                     rate_limit_per_second=live_cfg.get("rate_limit_calls_per_second", 5),
                 )
 
+        # monotonic time the grid was last calculated
         self._last_grid_calc: float = 0
-        self._last_regime_check: float = 0
-        self._last_trend_check: float = 0
-        self._candle_buffer: list = []
+        # the most recent 5m candles the trend/regime/indicator checks read
+        self._candle_buffer = CandleBuffer(capacity=CANDLE_WINDOW)
+        self._fetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-fetch")
+        # length and newest candle the last trend/regime check ran on
+        self._checked_candles: Optional[tuple] = None
+        # open time of the newest candle handed to the market writer
+        self._written_ts: Optional[int] = None
         self._counter_pairs: Dict[str, Dict[str, Any]] = {}
 
     def _setup_logging(self) -> None:
         class JsonFormatter(logging.Formatter):
+            def __init__(self) -> None:
+                super().__init__()
+                # ISO prefix of the last whole second seen; records in the
+                # same second only append their microseconds
+                self._last_sec = -1
+                self._last_iso = ""
+
             def format(self, record: logging.LogRecord) -> str:
+                # both handlers share this formatter, so each record is
+                # serialized once
+                cached = getattr(record, "_json", None)
+                if cached is not None:
+                    return cached
+                sec = int(record.created)
+                if sec != self._last_sec:
+                    self._last_iso = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+                    self._last_sec = sec
+                usec = int((record.created - sec) * 1_000_000)
                 payload = {
-                    "ts": datetime.now(timezone.utc).isoformat(),
+                    "ts": f"{self._last_iso}.{usec:06d}+00:00",
                     "level": record.levelname,
                     "name": record.name,
                     "message": record.getMessage(),
                 }
-                return json.dumps(payload)
+                record._json = orjson.dumps(payload).decode()
+                return record._json
 
         log_cfg = self._config.get("logging") or {}
         level = getattr(logging, log_cfg.get("level", "INFO").upper(), logging.INFO)
 
         root = logging.getLogger()
         root.setLevel(level)
+        formatter = JsonFormatter()
         # stdout handler
         sh = logging.StreamHandler(sys.stdout)
-        sh.setFormatter(JsonFormatter())
+        sh.setFormatter(formatter)
         root.addHandler(sh)
-        # file handler (also JSON)
+        # file handler (also JSON), written in batches; warnings and above
+        # flush straight away
         try:
             os.makedirs("logs", exist_ok=True)
             fh = logging.FileHandler("logs/gridai.log")
-            fh.setFormatter(JsonFormatter())
-            root.addHandler(fh)
+            fh.setFormatter(formatter)
+            root.addHandler(MemoryHandler(LOG_BUFFER_RECORDS, flushLevel=logging.WARNING, target=fh))
         except Exception:
             pass
 
@@ -239,31 +315,60 @@ class GridAITrader:
 
         live_cfg = self._config.get("live") or {}
         poll_interval = live_cfg.get("poll_interval_seconds", 10)
-        recalib_interval = self._config.get("grid", "recalibration_interval_minutes") or 60
+
+        if self._feed is not None and self._feed.streams:
+            self._feed.stream_ohlcv("5m", limit=CANDLE_WINDOW)
+            self._feed.start_polling(poll_interval)
 
         logger.info("GridAI Trader started (mode=%s)", self._mode)
 
         tick_count = 0
+        # ticks start every poll_interval on the monotonic clock, however
+        # long each one takes; an overrun restarts the schedule
+        next_tick = time.monotonic()
         while self._running and not self._shutdown_requested:
             try:
-                self._tick(tick_count, recalib_interval)
+                self._tick(tick_count)
                 tick_count += 1
-                time.sleep(poll_interval)
+                next_tick += poll_interval
             except KeyboardInterrupt:
                 break
             except Exception:
                 logger.exception("Error in main loop")
-                time.sleep(poll_interval * 2)
+                next_tick += poll_interval * 2
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                logger.warning("Tick overran the poll interval by %.2fs", -delay)
+                next_tick -= delay
+                delay = 0.0
+            self._stop_event.wait(delay)
 
         self._shutdown()
 
-    def _tick(self, tick_count: int, recalib_minutes: int) -> None:
+    def _tick(self, tick_count: int) -> None:
         if self._feed is None or self._order_mgr is None:
             return
 
+        candles = self._candle_buffer
+        # a full window only while the buffer is (re)filling; after that,
+        # the candles since the newest buffered one, which may have been
+        # forming, plus one for clock skew
+        limit = CANDLE_WINDOW
+        if len(candles) == CANDLE_WINDOW:
+            behind = (time.time() * 1000 - int(candles.ts[-1])) // CANDLE_MS
+            limit = int(min(CANDLE_WINDOW, max(behind, 0) + 2))
+        # over REST the candle request runs alongside the ticker's
+        if self._feed.streaming:
+            candles_future = None
+        else:
+            candles_future = self._fetch_pool.submit(self._feed.recent_ohlcv, "5m", limit)
+
         t0 = time.perf_counter()
         try:
-            ticker = self._feed.fetch_ticker()
+            # the stream keeps the latest ticker; REST only while it's down
+            ticker = self._feed.last_ticker if self._feed.streaming else None
+            if ticker is None:
+                ticker = self._feed.fetch_ticker()
             m_exchange_connected.set(1)
         except Exception:
             m_exchange_connected.set(0)
@@ -272,7 +377,7 @@ class GridAITrader:
         latency_ms = (time.perf_counter() - t0) * 1000.0
         m_api_latency_ms.set(latency_ms)
 
-        price = ticker.get("last")
+        price = ticker.last
         if price is None:
             return
         m_current_price_usd.set(price)
@@ -281,90 +386,116 @@ class GridAITrader:
         m_last_tick_age_seconds.set(0)
 
         # Account metrics
-        equity = self._position.current_capital + self._position.total_pnl()
+        # read once: fills are only applied further down this tick, so the
+        # risk check below sees the same values
+        total_pnl = self._position.total_pnl()
+        equity = self._position.current_capital + total_pnl
+        daily_pnl = self._position.daily_pnl
+        drawdown = self._position.drawdown_pct()
+        deployed = self._position.capital_deployed_pct()
+        total_fees = self._position.total_fees
         m_equity_usd.set(equity)
-        m_pnl_total_usd.set(self._position.total_pnl())
-        m_pnl_daily_usd.set(self._position.daily_pnl)
-        m_drawdown_pct.set(self._position.drawdown_pct())
-        m_fees_total_usd.set(self._position.total_fees)
-        m_capital_deployed_pct.set(self._position.capital_deployed_pct())
+        m_pnl_total_usd.set(total_pnl)
+        m_pnl_daily_usd.set(daily_pnl)
+        m_drawdown_pct.set(drawdown)
+        m_fees_total_usd.set(total_fees)
+        m_capital_deployed_pct.set(deployed)
         m_open_orders_count.set(len(self._order_mgr.get_open_orders()))
-        # Prune failed order timestamps <=1h
-        cutoff = now - 3600
-        while self._failed_order_ts and self._failed_order_ts[0] < cutoff:
-            self._failed_order_ts.popleft()
-        m_failed_orders_count_1h.set(len(self._failed_order_ts))
+        # Failed orders in the last hour: the times only grow, so it's a suffix
+        failed = self._failed_order_ts
+        head = bisect_left(failed, time.monotonic() - 3600, self._failed_order_head)
+        if head > len(failed) // 2:
+            del failed[:head]
+            head = 0
+        self._failed_order_head = head
+        m_failed_orders_count_1h.set(len(failed) - head)
 
         try:
-            candles = self._feed.fetch_recent_ohlcv("5m", limit=200)
-            if candles:
-                df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume"])
-                df["ts"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-            else:
-                df = pd.DataFrame()
+            candles.update(
+                candles_future.result() if candles_future is not None
+                else self._feed.recent_ohlcv("5m", limit=limit)
+            )
+            have_candles = len(candles) >= 50
         except Exception:
             logger.warning("Failed to fetch candles")
-            df = pd.DataFrame()
+            have_candles = False
+
+        run_checks = have_candles and tick_count % 6 == 0
+        if run_checks:
+            # Only the newest candle changes between appends, so if it and
+            # the length are what the last check saw, so is every result.
+            candles_key = (
+                len(candles), int(candles.ts[-1]),
+                *(float(col[-1]) for col in (
+                    candles.open, candles.high, candles.low, candles.close, candles.volume,
+                )),
+            )
+            run_checks = candles_key != self._checked_candles
+            self._checked_candles = candles_key
 
-        if len(df) >= 50 and tick_count % 6 == 0:
+        if run_checks:
+            high, low, close = candles.high, candles.low, candles.close
             # Trend detection and indicators
-            signal = self._trend.analyze(df)
+            signal = self._trend.analyze_arrays(high, low, close)
             m_trend_pause.set(1 if signal.should_pause else 0)
             state_label = "trending" if signal.should_pause else "ranging"
-            m_trend_state.labels(state=state_label).set(1)
+            for s, gauge in self._trend_state_gauges.items():
+                gauge.set(1 if s == state_label else 0)
             if signal.should_pause:
-                self._grid.pause()
-                logger.info("Grid paused: %s", signal.reason)
+                if not self._grid.is_paused:
+                    self._grid.pause()
+                    logger.info("Grid paused: %s", signal.reason)
             elif self._grid.is_paused:
                 self._grid.resume()
 
-            # Indicators (via ta)
+            # Indicators, updated incrementally from the candles since last time
             try:
-                from ta.momentum import RSIIndicator
-                from ta.trend import MACD, EMAIndicator, ADXIndicator
-                from ta.volatility import BollingerBands, AverageTrueRange
-
-                close = df["close"]
-                high = df["high"]
-                low = df["low"]
-
-                rsi_v = RSIIndicator(close, window=14).rsi().iloc[-1]
-                macd_i = MACD(close, window_slow=26, window_fast=12, window_sign=9)
-                macd_v = macd_i.macd().iloc[-1]
-                macd_signal_v = macd_i.macd_signal().iloc[-1]
-                bb = BollingerBands(close, window=20, window_dev=2)
-                bb_u = bb.bollinger_hband().iloc[-1]
-                bb_l = bb.bollinger_lband().iloc[-1]
-                atr_v = AverageTrueRange(high, low, close, window=14).average_true_range().iloc[-1]
-                adx_v = ADXIndicator(high, low, close, window=14).adx().iloc[-1]
-                ema20 = EMAIndicator(close, window=20).ema_indicator().iloc[-1]
-                ema50 = EMAIndicator(close, window=50).ema_indicator().iloc[-1]
-                ema200 = EMAIndicator(close, window=200).ema_indicator().iloc[-1]
-
-                m_rsi.set(float(rsi_v))
-                m_atr.set(float(atr_v))
-                m_adx.set(float(adx_v))
-
-                if upsert_candles and upsert_indicator:
-                    rows = list(zip(df["ts"].dt.tz_convert("UTC"), ["5m"]*len(df), df["open"], df["high"], df["low"], df["close"], df["volume"]))
-                    try:
-                        upsert_candles(rows[-50:])
-                        upsert_indicator(df["ts"].iloc[-1].to_pydatetime(), float(ema20), float(ema50), float(ema200), float(rsi_v), float(macd_v), float(macd_signal_v), float(bb_u), float(bb_l), float(atr_v), float(adx_v))
-                    except Exception:
-                        logger.warning("DB write failed for candles/indicators")
+                indicator_rows = self._indicators.update(candles.ts, high, low, close)
+                latest = dict(zip(INDICATOR_COLUMNS, indicator_rows[-1][1:]))
+
+                m_rsi.set(latest["rsi"])
+                m_atr.set(latest["atr"])
+                m_adx.set(latest["adx"])
+
+                if self._market_writer is not None:
+                    # Closed candles and their indicators don't change, so
+                    # after the first write only the candle that was forming
+                    # last time and anything newer go out, straight from
+                    # the buffer's columns.
+                    start = len(candles.ts) - 50
+                    if self._written_ts is not None:
+                        start = max(start, int(np.searchsorted(candles.ts, self._written_ts)))
+                    recent = slice(max(start, 0), None)
+                    ts = candles.ts[recent].tolist()
+                    stamps = {t: datetime.fromtimestamp(t / 1000, tz=timezone.utc) for t in ts}
+                    # indicator row order matches data.db.upsert_indicators
+                    self._market_writer.add(
+                        zip(
+                            stamps.values(),
+                            repeat("5m"),
+                            *(col[recent].tolist() for col in (
+                                candles.open, high, low, close, candles.volume,
+                            )),
+                        ),
+                        (
+                            (stamps[row[0]], *row[1:])
+                            for row in indicator_rows if row[0] in stamps
+                        ),
+                    )
+                    if ts:
+                        self._written_ts = ts[-1]
             except Exception:
                 logger.debug("Indicator calc failed", exc_info=True)
 
-        if len(df) >= 50 and tick_count % 6 == 0:
-            regime, confidence = self._volatility.predict(df)
-            self._last_regime = regime.value
+            regime, confidence = self._volatility.predict_arrays(high, low, close)
+            if regime.value != self._last_regime:
+                for r, gauge in self._regime_gauges.items():
+                    gauge.set(1 if r is regime else 0)
+                self._last_regime = regime.value
             self._last_confidence = float(confidence)
-            m_volatility_confidence.set(float(confidence))
-            for r in ("LOW", "MEDIUM", "HIGH"):
-                m_volatility_regime.labels(regime=r.lower()).set(1 if r == regime.value else 0)
+            m_volatility_confidence.set(self._last_confidence)
             if confidence >= self._confidence_threshold:
-                mult = self._regime_multipliers.get(regime.value, 1.0)
-                self._grid.set_regime_multiplier(mult)
+                self._grid.set_regime_multiplier(self._regime_multipliers[regime])
 
         # Grid metrics
         if self._grid.state is not None:
@@ -375,12 +506,12 @@ class GridAITrader:
             m_grid_spacing.set(st.spacing)
 
         risk_status = self._risk.evaluate(
-            drawdown_pct=self._position.drawdown_pct(),
-            capital_deployed_pct=self._position.capital_deployed_pct(),
-            daily_pnl=self._position.daily_pnl,
+            drawdown_pct=drawdown,
+            capital_deployed_pct=deployed,
+            daily_pnl=daily_pnl,
             daily_order_count=self._order_mgr.daily_order_count,
-            total_fees=self._position.total_fees,
-            initial_capital=self._position.current_capital + self._position.total_pnl(),
+            total_fees=total_fees,
+            initial_capital=equity,
         )
 
         if risk_status.overall_action == RiskAction.EMERGENCY_STOP:
@@ -388,6 +519,7 @@ class GridAITrader:
             self._order_mgr.cancel_all_open()
             self._position.save_state({"emergency_stop": "true"})
             self._running = False
+            self._stop_event.set()
             return
 
         if risk_status.overall_action == RiskAction.PAUSE:
@@ -395,26 +527,28 @@ class GridAITrader:
             self._position.save_state()
             return
 
+        now = time.monotonic()
         if self._grid.state is None:
             self._grid.calculate_grid(price)
             self._place_grid_orders(price)
-        elif self._grid.should_recalibrate(price):
+            self._last_grid_calc = now
+        elif (
+            self._grid.should_recalibrate(price)
+            or now - self._last_grid_calc >= self._recalib_period_s
+        ):
             self._incremental_recalibrate(price)
+            self._last_grid_calc = now
 
-        if tick_count % 6 == 0:
-            try:
-                filled_ids = self._order_mgr.reconcile_orders()
-                m_reconciliation_ok.set(1)
-                for oid in filled_ids:
-                    self._handle_fill(oid, price)
-            except Exception:
-                m_reconciliation_ok.set(0)
-                logger.exception("Reconciliation failed")
-
-        for record in self._order_mgr.get_open_orders():
-            status = self._order_mgr.check_order_status(record.order_id)
-            if status == "closed":
-                self._handle_fill(record.order_id, price)
+        # one open-orders request per tick; only orders that left the
+        # exchange's open set are fetched individually
+        try:
+            filled_ids = self._order_mgr.reconcile_orders()
+            m_reconciliation_ok.set(1)
+            for oid in filled_ids:
+                self._handle_fill(oid, price)
+        except Exception:
+            m_reconciliation_ok.set(0)
+            logger.exception("Reconciliation failed")
 
         self._position.snapshot_equity(price)
         self._position.save_state()
@@ -424,39 +558,42 @@ class GridAITrader:
             return
         old_state = self._grid.state
         new_state = self._grid.calculate_grid(current_price)
+        stale = []
         if old_state is not None:
             for level in old_state.levels:
                 if level.is_active and level.order_id:
                     if level.price < new_state.lower_bound or level.price > new_state.upper_bound:
-                        self._order_mgr.cancel_order(level.order_id)
-                        self._grid.mark_order_cancelled(level.order_id)
+                        stale.append(level.order_id)
                     else:
                         for nl in new_state.levels:
                             if abs(nl.price - level.price) < new_state.spacing * 0.1:
                                 nl.order_id = level.order_id
                                 nl.is_active = True
                                 break
+        # orders that fell outside the new bounds go in one cancel call; the
+        # grid keeps tracking any the exchange didn't cancel
+        cancelled = self._order_mgr.cancel_orders(stale)
+        for order_id, ok in zip(stale, cancelled):
+            if ok:
+                self._grid.mark_order_cancelled(order_id)
         self._place_grid_orders(current_price)
 
     def _place_grid_orders(self, current_price: float) -> None:
         if self._order_mgr is None:
             return
-        orders = self._grid.get_orders_to_place()
-        for level in orders:
-            if not self._risk.can_place_order():
-                break
-            amount = self._grid.get_order_amount(level.price)
-            try:
-                record = self._order_mgr.place_order(
-                    side=level.side.value,
-                    price=level.price,
-                    amount=amount,
-                    grid_index=level.index,
-                )
+        if not self._risk.can_place_order():
+            return
+        levels = self._grid.get_orders_to_place()
+        records = self._order_mgr.place_orders([
+            (level.side.label, level.price, self._grid.get_order_amount(level.price), level.index)
+            for level in levels
+        ])
+        for level, record in zip(levels, records):
+            if record is None:
+                self._failed_order_ts.append(time.monotonic())
+                logger.warning("Failed to place order at grid %d", level.index)
+            else:
                 self._grid.mark_order_placed(level.index, record.order_id)
-            except Exception:
-                self._failed_order_ts.append(time.time())
-                logger.exception("Failed to place order at grid %d", level.index)
 
     def _handle_fill(self, order_id: str, current_price: float) -> None:
         if self._order_mgr is None:
@@ -466,8 +603,11 @@ class GridAITrader:
             return
 
         filled_level = self._grid.mark_order_filled(order_id)
-        fee_pct = (self._config.get("paper", "fee_pct") or 0.1) / 100.0
-        fee = record.fee if record.fee > 0 else record.price * record.amount * fee_pct
+        fee = record.fee
+        if fee <= 0:
+            # read per fill so a hot-reloaded paper.fee_pct applies at once
+            fee_pct = (self._config.get("paper", "fee_pct") or 0.1) / 100.0
+            fee = record.price * record.amount * fee_pct
 
         pair_info = self._counter_pairs.pop(order_id, None)
 
@@ -529,26 +669,26 @@ class GridAITrader:
                     logger.exception("Failed to place counter order")
         # Trade event to DB
         try:
-            if insert_trade_event:
-                insert_trade_event({
-                    "ts": datetime.now(timezone.utc),
-                    "trade_id": order_id,
-                    "side": record.side,
-                    "price": record.price,
-                    "qty": record.amount,
-                    "fee": fee,
-                    "pnl": float(self._position.total_pnl()),
-                    "regime": (self._last_regime or "unknown").lower(),
-                    "confidence": float(self._last_confidence or 0.0),
-                    "grid_level": filled_level.index if filled_level else None,
-                })
+            self._position.record_trade_event({
+                "ts": datetime.now(timezone.utc),
+                "trade_id": order_id,
+                "side": record.side,
+                "price": record.price,
+                "qty": record.amount,
+                "fee": fee,
+                "pnl": float(self._position.total_pnl()),
+                "regime": (self._last_regime or "unknown").lower(),
+                "confidence": float(self._last_confidence or 0.0),
+                "grid_level": filled_level.index if filled_level else None,
+            })
         except Exception:
-            logger.debug("trade_events insert failed", exc_info=True)
+            logger.debug("trade_events enqueue failed", exc_info=True)
 
     def _handle_signal(self, signum: int, frame: Any) -> None:
         logger.info("Signal %d received, shutting down...", signum)
         self._shutdown_requested = True
         self._running = False
+        self._stop_event.set()
 
     def _shutdown(self) -> None:
         logger.info("Shutting down GridAI Trader...")
@@ -557,7 +697,11 @@ class GridAITrader:
             logger.info("Cancelled %d open orders on shutdown", cancelled)
         if self._feed:
             self._feed.stop_polling()
+        self._fetch_pool.shutdown(wait=False)
+        if self._market_writer is not None:
+            self._market_writer.close()
         self._position.save_state()
+        self._position.close()
         self._config.stop_watching()
         logger.info("Shutdown complete")
 
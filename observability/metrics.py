@@ -1,32 +1,51 @@
+from typing import Any, Optional
+
 from prometheus_client import Gauge, start_http_server
 
-# Gauges (all values updated by bot)
+
+class LatchedGauge:
+    # Forwards set() only when the value changed; most gauges are written
+    # every tick but move far less often, and each write takes the
+    # gauge's lock. Assumes nothing else sets the wrapped gauge.
+    __slots__ = ("_gauge", "_last")
+
+    def __init__(self, gauge: Any) -> None:
+        self._gauge = gauge
+        self._last: Optional[float] = None
+
+    def set(self, value: float) -> None:
+        if value != self._last:
+            self._gauge.set(value)
+            self._last = value
+
+
+# Gauges (all values updated by bot); unlabelled ones are latched
 bot_mode = Gauge('bot_mode', 'Bot mode', ['mode'])
-exchange_connected = Gauge('exchange_connected', 'Exchange connectivity (1=ok,0=down)')
-ws_connected = Gauge('ws_connected', 'Websocket connectivity (1=ok,0=down)')
-api_latency_ms = Gauge('api_latency_ms', 'API latency in milliseconds')
-last_tick_age_seconds = Gauge('last_tick_age_seconds', 'Seconds since last tick')
-current_price_usd = Gauge('current_price_usd', 'Current price in USD')
-equity_usd = Gauge('equity_usd', 'Account equity in USD')
-pnl_total_usd = Gauge('pnl_total_usd', 'Total PnL in USD')
-pnl_daily_usd = Gauge('pnl_daily_usd', 'Daily PnL in USD')
-drawdown_pct = Gauge('drawdown_pct', 'Drawdown percentage')
-fees_total_usd = Gauge('fees_total_usd', 'Total fees in USD')
-capital_deployed_pct = Gauge('capital_deployed_pct', 'Capital deployed percentage')
-open_orders_count = Gauge('open_orders_count', 'Open orders count')
-failed_orders_count_1h = Gauge('failed_orders_count_1h', 'Failed orders in last hour')
-reconciliation_ok = Gauge('reconciliation_ok', 'Reconciliation status (1=ok,0=error)')
+exchange_connected = LatchedGauge(Gauge('exchange_connected', 'Exchange connectivity (1=ok,0=down)'))
+ws_connected = LatchedGauge(Gauge('ws_connected', 'Websocket connectivity (1=ok,0=down)'))
+api_latency_ms = LatchedGauge(Gauge('api_latency_ms', 'API latency in milliseconds'))
+last_tick_age_seconds = LatchedGauge(Gauge('last_tick_age_seconds', 'Seconds since last tick'))
+current_price_usd = LatchedGauge(Gauge('current_price_usd', 'Current price in USD'))
+equity_usd = LatchedGauge(Gauge('equity_usd', 'Account equity in USD'))
+pnl_total_usd = LatchedGauge(Gauge('pnl_total_usd', 'Total PnL in USD'))
+pnl_daily_usd = LatchedGauge(Gauge('pnl_daily_usd', 'Daily PnL in USD'))
+drawdown_pct = LatchedGauge(Gauge('drawdown_pct', 'Drawdown percentage'))
+fees_total_usd = LatchedGauge(Gauge('fees_total_usd', 'Total fees in USD'))
+capital_deployed_pct = LatchedGauge(Gauge('capital_deployed_pct', 'Capital deployed percentage'))
+open_orders_count = LatchedGauge(Gauge('open_orders_count', 'Open orders count'))
+failed_orders_count_1h = LatchedGauge(Gauge('failed_orders_count_1h', 'Failed orders in last hour'))
+reconciliation_ok = LatchedGauge(Gauge('reconciliation_ok', 'Reconciliation status (1=ok,0=error)'))
 volatility_regime = Gauge('volatility_regime', 'Volatility regime flag', ['regime'])
-volatility_confidence = Gauge('volatility_confidence', 'Volatility confidence [0,1]')
+volatility_confidence = LatchedGauge(Gauge('volatility_confidence', 'Volatility confidence [0,1]'))
 trend_state = Gauge('trend_state', 'Trend state flag', ['state'])
-trend_pause = Gauge('trend_pause', 'Trading paused by trend (1=yes,0=no)')
-rsi = Gauge('rsi', 'RSI 14')
-adx = Gauge('adx', 'ADX 14')
-atr = Gauge('atr', 'ATR 14')
-grid_center_price = Gauge('grid_center_price', 'Grid center price')
-grid_lower_bound = Gauge('grid_lower_bound', 'Grid lower bound')
-grid_upper_bound = Gauge('grid_upper_bound', 'Grid upper bound')
-grid_spacing = Gauge('grid_spacing', 'Grid spacing')
+trend_pause = LatchedGauge(Gauge('trend_pause', 'Trading paused by trend (1=yes,0=no)'))
+rsi = LatchedGauge(Gauge('rsi', 'RSI 14'))
+adx = LatchedGauge(Gauge('adx', 'ADX 14'))
+atr = LatchedGauge(Gauge('atr', 'ATR 14'))
+grid_center_price = LatchedGauge(Gauge('grid_center_price', 'Grid center price'))
+grid_lower_bound = LatchedGauge(Gauge('grid_lower_bound', 'Grid lower bound'))
+grid_upper_bound = LatchedGauge(Gauge('grid_upper_bound', 'Grid upper bound'))
+grid_spacing = LatchedGauge(Gauge('grid_spacing', 'Grid spacing'))
 
 
 def start_metrics_server(port: int = 9000) -> None:
@@ -1,20 +1,23 @@
 import logging
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from enum import Enum
-from typing import Any, Dict, List, Optional
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.timeutils import isoformat_ns
 
 logger = logging.getLogger(__name__)
 
 
-class RiskAction(str, Enum):
-    OK = "OK"
-    WARN = "WARN"
-    PAUSE = "PAUSE"
-    EMERGENCY_STOP = "EMERGENCY_STOP"
+class RiskAction(IntEnum):
+    # values are escalation priorities; names are what to_dict() reports
+    OK = 0
+    WARN = 1
+    PAUSE = 2
+    EMERGENCY_STOP = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskCheck:
     name: str
     action: RiskAction
@@ -23,15 +26,17 @@ class RiskCheck:
     message: str
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskStatus:
     overall_action: RiskAction
     checks: List[RiskCheck] = field(default_factory=list)
     paused: bool = False
     pause_reason: str = ""
-    timestamp: str = field(
-        default_factory=lambda: datetime.now(timezone.utc).isoformat()
-    )
+    created_at_ns: int = field(default_factory=time.time_ns)
+
+    @property
+    def timestamp(self) -> str:
+        return isoformat_ns(self.created_at_ns)
 
 
 class RiskManager:
@@ -52,9 +57,15 @@ class RiskManager:
         self._max_orders_per_day = max_orders_per_day
         self._max_fee_pct = max_fee_pct
         self._slippage_tolerance_pct = slippage_tolerance_pct
+        # WARN from 80% of the drawdown and deployment limits
+        self._warn_drawdown_pct = max_drawdown_pct * 0.8
+        self._warn_capital_deployed_pct = max_capital_deployed_pct * 0.8
         self._paused = False
         self._pause_reason = ""
         self._last_status: Optional[RiskStatus] = None
+        # evaluate() inputs behind _last_status; between fills the loop
+        # passes the same values every tick, so its checks are reused
+        self._last_inputs: Optional[tuple] = None
 
     @property
     def is_paused(self) -> bool:
@@ -64,6 +75,15 @@ class RiskManager:
     def pause_reason(self) -> str:
         return self._pause_reason
 
+    def limits(self) -> Dict[str, float]:
+        return {
+            "max_drawdown_pct": self._max_drawdown_pct,
+            "emergency_stop_loss_pct": self._emergency_stop_loss_pct,
+            "max_capital_deployed_pct": self._max_capital_deployed_pct,
+            "daily_loss_cap_usdt": self._daily_loss_cap_usdt,
+            "max_orders_per_day": float(self._max_orders_per_day),
+        }
+
     def evaluate(
         self,
         drawdown_pct: float,
@@ -73,6 +93,43 @@ class RiskManager:
         total_fees: float,
         initial_capital: float,
     ) -> RiskStatus:
+        inputs = (
+            drawdown_pct, capital_deployed_pct, daily_pnl,
+            daily_order_count, total_fees, initial_capital,
+        )
+        if inputs == self._last_inputs and self._last_status is not None:
+            checks = self._last_status.checks
+            worst_action = self._last_status.overall_action
+        else:
+            checks, worst_action = self._run_checks(*inputs)
+
+        if worst_action >= RiskAction.PAUSE:
+            breached = [c for c in checks if c.action >= RiskAction.PAUSE]
+            self._paused = True
+            self._pause_reason = "; ".join(c.message for c in breached)
+            logger.warning("RISK BREACH: %s", self._pause_reason)
+        elif worst_action == RiskAction.OK and self._paused:
+            pass
+
+        status = RiskStatus(
+            overall_action=worst_action,
+            checks=checks,
+            paused=self._paused,
+            pause_reason=self._pause_reason,
+        )
+        self._last_status = status
+        self._last_inputs = inputs
+        return status
+
+    def _run_checks(
+        self,
+        drawdown_pct: float,
+        capital_deployed_pct: float,
+        daily_pnl: float,
+        daily_order_count: int,
+        total_fees: float,
+        initial_capital: float,
+    ) -> Tuple[List[RiskCheck], RiskAction]:
         checks: List[RiskCheck] = []
         worst_action = RiskAction.OK
 
@@ -95,27 +152,12 @@ class RiskManager:
         fee_check = self._check_fees(total_fees, initial_capital)
         checks.append(fee_check)
         worst_action = self._escalate(worst_action, fee_check.action)
-
-        if worst_action in (RiskAction.PAUSE, RiskAction.EMERGENCY_STOP):
-            breached = [c for c in checks if c.action in (RiskAction.PAUSE, RiskAction.EMERGENCY_STOP)]
-            self._paused = True
-            self._pause_reason = "; ".join(c.message for c in breached)
-            logger.warning("RISK BREACH: %s", self._pause_reason)
-        elif worst_action == RiskAction.OK and self._paused:
-            pass
-
-        status = RiskStatus(
-            overall_action=worst_action,
-            checks=checks,
-            paused=self._paused,
-            pause_reason=self._pause_reason,
-        )
-        self._last_status = status
-        return status
+        return checks, worst_action
 
     def reset_pause(self) -> None:
         self._paused = False
         self._pause_reason = ""
+        self._last_inputs = None
         logger.info("Risk pause reset manually")
 
     def _check_drawdown(self, drawdown_pct: float) -> RiskCheck:
@@ -135,7 +177,7 @@ class RiskManager:
                 threshold=self._max_drawdown_pct,
                 message=f"Drawdown {drawdown_pct:.1f}% >= {self._max_drawdown_pct:.1f}%",
             )
-        if drawdown_pct >= self._max_drawdown_pct * 0.8:
+        if drawdown_pct >= self._warn_drawdown_pct:
             return RiskCheck(
                 name="drawdown",
                 action=RiskAction.WARN,
@@ -160,7 +202,7 @@ class RiskManager:
                 threshold=self._max_capital_deployed_pct,
                 message=f"Capital deployed {deployed_pct:.1f}% >= {self._max_capital_deployed_pct:.1f}%",
             )
-        if deployed_pct >= self._max_capital_deployed_pct * 0.8:
+        if deployed_pct >= self._warn_capital_deployed_pct:
             return RiskCheck(
                 name="capital_deployed",
                 action=RiskAction.WARN,
@@ -233,13 +275,7 @@ class RiskManager:
         )
 
     def _escalate(self, current: RiskAction, new: RiskAction) -> RiskAction:
-        priority = {
-            RiskAction.OK: 0,
-            RiskAction.WARN: 1,
-            RiskAction.PAUSE: 2,
-            RiskAction.EMERGENCY_STOP: 3,
-        }
-        return new if priority[new] > priority[current] else current
+        return new if new > current else current
 
     def can_place_order(self) -> bool:
         return not self._paused
@@ -250,11 +286,11 @@ class RiskManager:
             "pause_reason": self._pause_reason,
         }
         if self._last_status:
-            result["overall_action"] = self._last_status.overall_action.value
+            result["overall_action"] = self._last_status.overall_action.name
             result["checks"] = [
                 {
                     "name": c.name,
-                    "action": c.action.value,
+                    "action": c.action.name,
                     "value": c.value,
                     "threshold": c.threshold,
                     "message": c.message,
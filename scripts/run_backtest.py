@@ -6,9 +6,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from backtesting.backtest_engine import BacktestEngine
 from config.config_manager import ConfigManager
-from data.historical_loader import HistoricalLoader
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +15,7 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Run GridAI backtest")
     parser.add_argument("--config-dir", default="config")
     parser.add_argument("--profile", default="default")
-    parser.add_argument("--data-file", default="", help="CSV file with OHLCV data")
+    parser.add_argument("--data-file", default="", help="CSV or Parquet file with OHLCV data")
     parser.add_argument("--start-date", default="")
     parser.add_argument("--end-date", default="")
     parser.add_argument("--output", default="state/backtest_results.json")
@@ -29,6 +27,11 @@ def main() -> None:
         stream=sys.stdout,
     )
 
+    # imported after argument parsing so --help does not load pandas,
+    # numba and ccxt
+    from backtesting.backtest_engine import BacktestEngine
+    from data.historical_loader import HistoricalLoader
+
     config = ConfigManager(config_dir=args.config_dir, profile=args.profile)
     bt_cfg = config.get("backtesting") or {}
     grid_cfg = config.get("grid") or {}
@@ -49,11 +52,13 @@ def main() -> None:
         loader = HistoricalLoader(
             exchange_id=exchange_cfg.get("name", "coinbase"),
             trading_pair=exchange_cfg.get("trading_pair", "BTC/USDT"),
+            cache_dir="state/ohlcv_cache",
+            http2=exchange_cfg.get("http2", False),
         )
         df = loader.fetch_ohlcv(timeframe="5m", start_date=start_date, end_date=end_date)
-        cache_path = "state/backtest_data.csv"
+        cache_path = "state/backtest_data.parquet"
         Path("state").mkdir(parents=True, exist_ok=True)
-        loader.save_to_csv(df, cache_path)
+        loader.save_to_parquet(df, cache_path)
 
     logger.info("Backtest data: %d candles", len(df))
 
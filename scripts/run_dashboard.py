@@ -6,7 +6,6 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from config.config_manager import ConfigManager
-from dashboard.app import run_dashboard
 
 
 def main() -> None:
@@ -23,6 +22,9 @@ def main() -> None:
         stream=sys.stdout,
     )
 
+    # imported after argument parsing so --help does not load the app
+    from dashboard.app import run_dashboard
+
     config = ConfigManager(config_dir=args.config_dir, profile=args.profile)
     dash_cfg = config.get("dashboard") or {}
 
@@ -6,8 +6,6 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from main import GridAITrader
-
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +28,10 @@ def main() -> None:
         logger.error("COINBASE_API_KEY and COINBASE_API_SECRET must be set")
         sys.exit(1)
 
+    # imported once the arguments and credentials are checked, so --help
+    # and a missing key fail without loading the trader
+    from main import GridAITrader
+
     logger.warning("=" * 60)
     logger.warning("  LIVE TRADING MODE — REAL MONEY AT RISK")
     logger.warning("  Ensure risk parameters are properly configured")
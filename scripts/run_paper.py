@@ -5,8 +5,6 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from main import GridAITrader
-
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run GridAI in paper trading mode")
@@ -20,6 +18,9 @@ def main() -> None:
         stream=sys.stdout,
     )
 
+    # imported after argument parsing so --help does not load the trader
+    from main import GridAITrader
+
     trader = GridAITrader(mode="paper", profile=args.profile, config_dir=args.config_dir)
     trader.run()
 
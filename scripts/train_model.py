@@ -3,13 +3,9 @@ import logging
 import sys
 from pathlib import Path
 
-import pandas as pd
-
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from ai.volatility_classifier import VolatilityClassifier
 from config.config_manager import ConfigManager
-from data.historical_loader import HistoricalLoader
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +14,7 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Train volatility classifier")
     parser.add_argument("--config-dir", default="config")
     parser.add_argument("--profile", default="default")
-    parser.add_argument("--data-file", default="", help="CSV file with OHLCV data")
+    parser.add_argument("--data-file", default="", help="CSV or Parquet file with OHLCV data")
     parser.add_argument("--start-date", default="2024-01-01")
     parser.add_argument("--end-date", default="2026-01-01")
     parser.add_argument("--timeframe", default="5m")
@@ -32,9 +28,16 @@ def main() -> None:
         stream=sys.stdout,
     )
 
+    # imported after argument parsing so --help does not load pandas,
+    # sklearn and ccxt
+    from ai.volatility_classifier import VolatilityClassifier
+    from data.historical_loader import HistoricalLoader
+
     config = ConfigManager(config_dir=args.config_dir, profile=args.profile)
 
-    cache_path = "state/training_data.csv"
+    cache_path = "state/training_data.parquet"
+    # fetch checkpoints are appended as CSV rows, which parquet can't do
+    partial_path = "state/training_data.partial.csv"
     Path("state").mkdir(parents=True, exist_ok=True)
 
     if args.data_file and Path(args.data_file).exists():
@@ -47,15 +50,17 @@ def main() -> None:
         loader = HistoricalLoader(
             exchange_id=exchange_cfg.get("name", "coinbase"),
             trading_pair=exchange_cfg.get("trading_pair", "BTC/USDT"),
+            cache_dir="state/ohlcv_cache",
+            http2=exchange_cfg.get("http2", False),
         )
-        resume_path = cache_path if args.resume else None
+        resume_path = partial_path if args.resume else None
         df = loader.fetch_ohlcv(
             timeframe=args.timeframe,
             start_date=args.start_date,
             end_date=args.end_date,
             resume_path=resume_path,
         )
-        loader.save_to_csv(df, cache_path)
+        loader.save_to_parquet(df, cache_path)
         logger.info("Data cached to %s (%d rows)", cache_path, len(df))
 
     logger.info("Training data: %d rows", len(df))
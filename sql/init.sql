@@ -3,21 +3,32 @@ CREATE EXTENSION IF NOT EXISTS timescaledb;
 CREATE TABLE IF NOT EXISTS candles (
   ts timestamptz NOT NULL,
   timeframe text NOT NULL,
-  open numeric NOT NULL,
-  high numeric NOT NULL,
-  low numeric NOT NULL,
-  close numeric NOT NULL,
-  volume numeric DEFAULT 0,
+  open double precision NOT NULL,
+  high double precision NOT NULL,
+  low double precision NOT NULL,
+  close double precision NOT NULL,
+  volume double precision DEFAULT 0,
   PRIMARY KEY (ts, timeframe)
 );
 SELECT create_hypertable('candles', 'ts', if_not_exists => TRUE);
+CREATE INDEX IF NOT EXISTS candles_timeframe_ts_idx ON candles (timeframe, ts DESC);
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM timescaledb_information.hypertables
+    WHERE hypertable_name = 'candles' AND compression_enabled
+  ) THEN
+    ALTER TABLE candles SET (timescaledb.compress, timescaledb.compress_segmentby = 'timeframe');
+  END IF;
+END $$;
+SELECT add_compression_policy('candles', INTERVAL '7 days', if_not_exists => TRUE);
 
 CREATE TABLE IF NOT EXISTS indicators (
   ts timestamptz NOT NULL PRIMARY KEY,
-  ema20 numeric, ema50 numeric, ema200 numeric,
-  rsi numeric, macd numeric, macd_signal numeric,
-  bb_upper numeric, bb_lower numeric,
-  atr numeric, adx numeric
+  ema20 double precision, ema50 double precision, ema200 double precision,
+  rsi double precision, macd double precision, macd_signal double precision,
+  bb_upper double precision, bb_lower double precision,
+  atr double precision, adx double precision
 );
 SELECT create_hypertable('indicators', 'ts', if_not_exists => TRUE);
 
@@ -25,12 +36,12 @@ CREATE TABLE IF NOT EXISTS trade_events (
   ts timestamptz NOT NULL,
   trade_id text,
   side text,
-  price numeric,
-  qty numeric,
-  fee numeric,
-  pnl numeric,
+  price double precision,
+  qty double precision,
+  fee double precision,
+  pnl double precision,
   regime text,
-  confidence numeric,
+  confidence double precision,
   grid_level int
 );
 SELECT create_hypertable('trade_events', 'ts', if_not_exists => TRUE);
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backtesting import _core
+from backtesting.backtest_engine import BacktestEngine
+
+
+def _make_ohlcv(n: int = 3000, seed: int = 11, vol: float = 40.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 50000 + np.cumsum(rng.normal(0, vol, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="5min", tz="UTC"),
+        "open": close,
+        "high": close + np.abs(rng.normal(0, 30, n)),
+        "low": close - np.abs(rng.normal(0, 30, n)),
+        "close": close,
+        "volume": rng.random(n) * 1000,
+    })
+
+
+def test_run_produces_metrics_and_trades():
+    df = _make_ohlcv()
+    engine = BacktestEngine(use_ai=False)
+    metrics = engine.run(df)
+    assert metrics["candles_processed"] == len(df) - 100
+    assert len(engine.equity_curve) == len(df) - 100
+    assert metrics["total_trades"] == len(engine.trades) > 0
+    for trade in engine.trades:
+        assert trade["net_profit_usdt"] == trade["profit_usdt"] - trade["fee_usdt"]
+        assert trade["sell_price"] > trade["buy_price"]
+
+
+def test_emergency_stop_ends_run():
+    df = _make_ohlcv(n=8000, seed=4, vol=80.0)
+    engine = BacktestEngine(
+        use_ai=False,
+        num_grids=40,
+        upper_bound_pct=1.0,
+        lower_bound_pct=1.0,
+        max_open_orders=10,
+    )
+    engine.run(df, recalib_every=300)
+    assert 0 < len(engine.equity_curve) < len(df) - 100
+
+
+def test_sim_book_fills_from_sorted_ends():
+    book = _core.SimBook(8)
+    n = 0
+    for index, price in enumerate([99.0, 97.0, 98.0]):
+        n = _core.insert_buy(
+            book.buy_price, book.buy_amount, book.buy_index,
+            book.counter_price, book.counter_amount,
+            n, price, 1.0, index, price + 1.0, 1.0,
+        )
+    assert book.buy_price[:n].tolist() == [97.0, 98.0, 99.0]
+
+    acct = np.array([1000.0, 0.0, 1000.0, 0.0, 0.0])
+    counters = np.zeros(_core.NUM_COUNTERS, dtype=np.int64)
+    counters[_core.N_BUYS] = n
+    trades = np.zeros((len(_core.TRADE_FIELDS), 8))
+    _core._check_fills(
+        97.5, 99.5, acct, counters, 0.0, 0.0, 1.0,
+        book.buy_price, book.buy_amount, book.buy_index,
+        book.counter_price, book.counter_amount,
+        book.sell_price, book.sell_amount, trades, book.filled,
+    )
+    # 98 and 99 fill; their counter sell at 99 fills on the same candle
+    assert counters[_core.N_BUYS] == 1 and book.buy_price[0] == 97.0
+    assert sorted(book.filled[:counters[_core.N_FILLED]].tolist()) == [0, 2]
+    assert counters[_core.N_TRADES] == 1
+    assert trades[_core.TRADE_SELL_PRICE, 0] == 99.0
+    assert counters[_core.N_SELLS] == 1 and book.sell_price[0] == 100.0
+
+
+def test_long_trend_periods_follow_the_lookback_window():
+    df = _make_ohlcv(n=600)
+    high, low, close = (df[k].to_numpy() for k in ("high", "low", "close"))
+    for rsi_period, adx_period in ((101, 51), (100, 50), (102, 60)):
+        engine = BacktestEngine(
+            use_ai=False, trend_config={"rsi_period": rsi_period, "adx_period": adx_period}
+        )
+        signals = engine.precompute_signals(high, low, close)
+        for i in range(100, len(df), 12):
+            window = slice(i - 100, i + 1)
+            expected = engine._trend.analyze_arrays(high[window], low[window], close[window])
+            signal = engine._trend.analyze_scalar(
+                *(float(signals[k][i]) for k in ("ma_fast", "ma_slow", "rsi", "adx"))
+            )
+            assert signal.should_pause == expected.should_pause
+            assert np.isclose(signal.adx, expected.adx)
+            assert np.isclose(signal.rsi, expected.rsi, equal_nan=True)
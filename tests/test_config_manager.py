@@ -0,0 +1,158 @@
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+from jsonschema import ValidationError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.config_manager import ConfigManager
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+
+
+def _copy_config_dir() -> Path:
+    target = Path(tempfile.mkdtemp())
+    for path in CONFIG_DIR.glob("*.yaml"):
+        shutil.copy(path, target / path.name)
+    return target
+
+
+def test_loads_default_and_profile():
+    cm = ConfigManager(config_dir=str(CONFIG_DIR), profile="aggressive")
+    with open(CONFIG_DIR / "aggressive.yaml") as f:
+        profile = yaml.safe_load(f)
+    assert cm.get("grid", "num_grids") == profile["grid"]["num_grids"]
+    assert cm.get("exchange", "name") is not None
+    assert cm.get("grid", "missing", default=7) == 7
+
+
+def test_invalid_reload_raises_and_keeps_config():
+    config_dir = _copy_config_dir()
+    cm = ConfigManager(config_dir=str(config_dir))
+    num_grids = cm.get("grid", "num_grids")
+
+    default = yaml.safe_load((config_dir / "default.yaml").read_text())
+    default["grid"]["num_grids"] = 1
+    (config_dir / "default.yaml").write_text(yaml.safe_dump(default))
+    try:
+        cm.reload()
+        assert False, "expected a validation error"
+    except ValidationError as e:
+        assert e.validator == "minimum" and list(e.path) == ["grid", "num_grids"]
+    assert cm.get("grid", "num_grids") == num_grids
+
+
+def test_get_returns_read_only_snapshot():
+    cm = ConfigManager(config_dir=str(CONFIG_DIR))
+    grid = cm.get("grid")
+    try:
+        grid["num_grids"] = 99
+        assert False, "expected a read-only mapping"
+    except TypeError:
+        pass
+    assert cm.get("grid") is grid
+    assert cm.config["grid"] is grid
+
+    version = cm.version
+    cm.reload()
+    assert cm.version == version + 1
+    assert cm.get("grid") is not grid
+    assert cm.get("grid") == grid
+
+
+def test_reads_during_reloads_see_complete_snapshots():
+    import threading
+
+    cm = ConfigManager(config_dir=str(CONFIG_DIR), profile="aggressive")
+    expected = cm.get("grid", "num_grids")
+    errors = []
+
+    def reader():
+        for _ in range(2000):
+            if cm.get("grid", "num_grids") != expected:
+                errors.append(cm.version)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for _ in range(20):
+        cm.reload()
+    for t in threads:
+        t.join()
+    assert not errors
+
+
+def test_compiled_schema_check_agrees_with_jsonschema():
+    import copy
+    import random
+
+    from config.config_manager import _VALIDATOR, _config_is_valid
+
+    base = yaml.safe_load((CONFIG_DIR / "default.yaml").read_text())
+    assert _config_is_valid(base)
+
+    candidates = [None, True, 0, 1, 2, 2.0, 2.5, -1, 100, 101, 0.05, "x", {}, []]
+    rng = random.Random(1)
+    for _ in range(500):
+        cfg = copy.deepcopy(base)
+        section = rng.choice(["exchange", "grid", "risk"])
+        if rng.random() < 0.1:
+            del cfg[section]
+        else:
+            key = rng.choice(sorted(cfg[section]))
+            if rng.random() < 0.2:
+                del cfg[section][key]
+            else:
+                cfg[section][key] = rng.choice(candidates)
+        assert _config_is_valid(cfg) == _VALIDATOR.is_valid(cfg), cfg
+
+
+def test_reload_if_changed_skips_identical_sources():
+    config_dir = _copy_config_dir()
+    cm = ConfigManager(config_dir=str(config_dir))
+    version = cm.version
+    assert not cm.reload_if_changed()
+    assert cm.version == version
+
+    default = yaml.safe_load((config_dir / "default.yaml").read_text())
+    default["grid"]["num_grids"] = 12
+    (config_dir / "default.yaml").write_text(yaml.safe_dump(default))
+    assert cm.reload_if_changed()
+    assert cm.get("grid", "num_grids") == 12
+    assert cm.version == version + 1
+
+
+def test_reload_handler_coalesces_event_bursts():
+    import time
+    from types import SimpleNamespace
+
+    from config.config_manager import ConfigReloadHandler
+
+    calls = []
+    manager = SimpleNamespace(reload_if_changed=lambda: calls.append(time.monotonic()))
+    handler = ConfigReloadHandler(manager, debounce_seconds=0.05)
+    event = SimpleNamespace(is_directory=False, src_path="config/default.yaml")
+    for _ in range(5):
+        handler.on_modified(event)
+    time.sleep(0.2)
+    assert len(calls) == 1
+    handler.cancel()
+
+
+def test_env_overrides_apply_and_trigger_reload():
+    import os
+
+    config_dir = _copy_config_dir()
+    cm = ConfigManager(config_dir=str(config_dir))
+    os.environ["GRIDAI_NUM_GRIDS"] = "33"
+    try:
+        assert cm.reload_if_changed()
+        assert cm.get("grid", "num_grids") == 33
+        assert not cm.reload_if_changed()
+    finally:
+        del os.environ["GRIDAI_NUM_GRIDS"]
+    assert cm.reload_if_changed()
+    assert cm.get("grid", "num_grids") != 33
@@ -0,0 +1,117 @@
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+from core.position_tracker import PositionTracker
+from dashboard.app import create_app
+
+_DB_DIR = tempfile.TemporaryDirectory()
+
+
+def _make_tracker(name: str) -> PositionTracker:
+    tracker = PositionTracker(db_path=str(Path(_DB_DIR.name) / name))
+    tracker.initialize(10000.0)
+    tracker.record_buy(price=50000.0, amount=0.01, fee=0.5)
+    tracker.record_completed_trade("b-1", "s-1", 50000.0, 50500.0, 0.01, 1.0)
+    tracker.snapshot_equity(50000.0)
+    tracker.snapshot_equity(50100.0)
+    tracker.save_state()
+    tracker.flush()
+    return tracker
+
+
+def test_api_state_reads_tracker_database():
+    tracker = _make_tracker("api.db")
+    client = TestClient(create_app(db_path=tracker._db_path))
+    response = client.get("/api/state")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    state = response.json()
+    assert state["position"]["current_capital"] == tracker.current_capital
+    assert state["position"]["btc_held"] == tracker.btc_held
+    assert state["position"]["trade_count"] == 1
+    assert [e["equity"] for e in state["equity_history"]] == [
+        e["equity"] for e in tracker.get_equity_history()
+    ]
+    assert [t["trade_id"] for t in state["trades"]] == ["T-1"]
+    tracker.close()
+
+
+def test_index_is_gzipped_and_revalidates_with_etag():
+    client = TestClient(create_app(db_path=str(Path(_DB_DIR.name) / "none.db")))
+    page = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert page.status_code == 200
+    assert page.headers["content-encoding"] == "gzip"
+    assert "GridAI Trader" in page.text
+    etag = page.headers["etag"]
+
+    cached = client.get("/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_websocket_sends_snapshot_then_deltas():
+    import base64
+    from datetime import datetime
+
+    import numpy as np
+
+    from dashboard.app import _EQUITY_DTYPE
+
+    tracker = _make_tracker("ws.db")
+    history = tracker.get_equity_history()
+    app = create_app(db_path=tracker._db_path, event_source=tracker)
+    with TestClient(app) as client, client.websocket_connect("/ws") as ws:
+        first = ws.receive_json()
+        assert first["event"] == "update"
+        assert first["data"]["position"]["trade_count"] == 1
+        assert "equity_history" not in first["data"]
+
+        packed = np.frombuffer(base64.b64decode(first["data"]["equity_bin"]), dtype=_EQUITY_DTYPE)
+        assert packed["t"].tolist() == [
+            int(datetime.fromisoformat(e["timestamp"]).timestamp()) for e in history
+        ]
+        assert packed["e"].tolist() == [e["equity"] for e in history]
+
+        equity = tracker.snapshot_equity(51000.0)
+        delta = ws.receive_json()
+        assert delta["event"] == "equity"
+        assert delta["data"]["equity"] == equity
+        assert delta["data"]["btc_price"] == 51000.0
+    tracker.close()
+
+
+def test_db_change_feed_starts_at_the_end_then_emits_deltas():
+    from dashboard.app import _DbChangeFeed
+
+    tracker = _make_tracker("feed.db")
+    feed = _DbChangeFeed(tracker._db_path)
+    assert feed.poll() == []
+    assert feed._last_trade == 1 and feed._last_equity == 2
+    assert feed.poll() == []
+
+    tracker.record_completed_trade("b-2", "s-2", 50000.0, 50600.0, 0.01, 1.0)
+    tracker.snapshot_equity(50200.0)
+    tracker.flush()
+    kinds = [kind for kind, _ in feed.poll()]
+    assert kinds == ["trade", "equity", "update"]
+    tracker.close()
+
+
+def test_packed_equity_keeps_cents_on_large_accounts():
+    import base64
+
+    import numpy as np
+
+    from dashboard.app import _EQUITY_DTYPE, _pack_equity
+
+    points = [(1_767_225_600_123_456, 123456.78), (1_767_225_900_000_000, 9876543.21)]
+    packed = np.frombuffer(base64.b64decode(_pack_equity(points)), dtype=_EQUITY_DTYPE)
+    assert packed["t"].tolist() == [1_767_225_600, 1_767_225_900]
+    assert packed["e"].tolist() == [123456.78, 9876543.21]
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.db import MarketDataWriter
+
+
+def test_market_data_writer_coalesces_and_retries():
+    calls = []
+    fail = [True]
+
+    def write(candles, indicators):
+        calls.append((sorted(candles), sorted(indicators)))
+        if fail[0]:
+            raise RuntimeError("db down")
+
+    writer = MarketDataWriter(interval=3600, write_fn=write)
+    writer.add([(1, "5m", 1.0), (2, "5m", 1.0)], [(1, 10.0), (2, 10.0)])
+    writer.add([(2, "5m", 2.0), (3, "5m", 1.0)], [(2, 20.0), (3, 10.0)])
+    writer.flush()
+    assert calls[-1] == (
+        [(1, "5m", 1.0), (2, "5m", 2.0), (3, "5m", 1.0)],
+        [(1, 10.0), (2, 20.0), (3, 10.0)],
+    )
+
+    # rows that failed are retried; newer values for the same key win
+    fail[0] = False
+    writer.add([(3, "5m", 3.0)], [])
+    writer.close()
+    assert calls[-1][0] == [(1, "5m", 1.0), (2, "5m", 2.0), (3, "5m", 3.0)]
+    assert len(calls) == 2
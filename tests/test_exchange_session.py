@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+import ccxt
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data._exchange import HttpxSession
+
+
+def _exchange_with(handler) -> ccxt.Exchange:
+    exchange = ccxt.coinbase()
+    exchange.session = HttpxSession(httpx.Client(transport=httpx.MockTransport(handler)))
+    return exchange
+
+
+def test_httpx_session_serves_ccxt_fetch():
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, str(request.url)))
+        return httpx.Response(200, json={"price": "42000.5"})
+
+    exchange = _exchange_with(handler)
+    assert exchange.fetch("https://api.example.com/ticker") == {"price": "42000.5"}
+    assert seen == [("GET", "https://api.example.com/ticker")]
+
+
+def test_httpx_session_errors_map_to_ccxt_exceptions():
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    try:
+        _exchange_with(refuse).fetch("https://api.example.com/ticker")
+        assert False, "expected a network error"
+    except ccxt.NetworkError:
+        pass
+
+    def busy(request):
+        return httpx.Response(429, text="slow down")
+
+    try:
+        _exchange_with(busy).fetch("https://api.example.com/ticker")
+        assert False, "expected a rate limit error"
+    except ccxt.RateLimitExceeded:
+        pass
@@ -3,7 +3,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from core.grid_engine import GridEngine, GridSide, GridState
+from core.grid_engine import GridEngine, GridLevel, GridSide, GridState
 
 
 def test_calculate_grid_creates_levels():
@@ -20,11 +20,8 @@ def test_calculate_grid_creates_levels():
 def test_grid_levels_have_correct_sides():
     engine = GridEngine(num_grids=10, upper_bound_pct=3.0, lower_bound_pct=3.0)
     state = engine.calculate_grid(50000.0)
-    for level in state.levels:
-        if level.price < 50000.0:
-            assert level.side == GridSide.BUY
-        elif level.price > 50000.0:
-            assert level.side == GridSide.SELL
+    assert (state.sides[state.prices < 50000.0] == GridSide.BUY).all()
+    assert (state.sides[state.prices > 50000.0] == GridSide.SELL).all()
 
 
 def test_grid_spacing():
@@ -110,3 +107,97 @@ def test_active_order_count():
     assert engine.active_order_count() == 0
     engine.mark_order_placed(state.levels[0].index, "o1")
     assert engine.active_order_count() == 1
+
+
+def test_grid_prices_follow_spacing_and_skip_center():
+    engine = GridEngine(num_grids=4, upper_bound_pct=2.0, lower_bound_pct=2.0)
+    state = engine.calculate_grid(100.0)
+    # the middle level lands on the current price and is skipped
+    assert [l.index for l in state.levels] == [0, 1, 3, 4]
+    assert [l.price for l in state.levels] == [98.0, 99.0, 101.0, 102.0]
+    assert [l.side for l in state.levels] == [GridSide.BUY, GridSide.BUY, GridSide.SELL, GridSide.SELL]
+    assert all(type(l.price) is float for l in state.levels)
+
+
+def test_level_views_write_through_to_state():
+    engine = GridEngine(num_grids=10)
+    state = engine.calculate_grid(50000.0)
+    level = state.levels[3]
+    level.order_id = "carried"
+    level.is_active = True
+    assert state.is_active[3] and state.order_ids[3] == "carried"
+    assert engine.active_order_count() == 1
+    assert engine.mark_order_filled("carried") is level
+    assert state.filled[3] and not state.is_active[3]
+
+
+def test_cancel_and_replace_order_ids():
+    engine = GridEngine(num_grids=10)
+    state = engine.calculate_grid(50000.0)
+    index = state.levels[0].index
+    engine.mark_order_placed(index, "a")
+    engine.mark_order_cancelled("a")
+    assert engine.mark_order_filled("a") is None
+    assert state.levels[0].order_id is None and not state.levels[0].is_active
+
+    engine.mark_order_placed(index, "b")
+    engine.mark_order_placed(index, "c")
+    assert engine.mark_order_filled("b") is None
+    assert engine.mark_order_filled("c").index == index
+    assert engine.to_dict()["levels"][0] == {
+        "index": index,
+        "price": state.levels[0].price,
+        "side": "buy",
+        "order_id": "c",
+        "is_active": False,
+        "filled": True,
+    }
+
+
+def test_counter_orders_precomputed_per_level():
+    engine = GridEngine(num_grids=10, order_size_usdt=50.0)
+    state = engine.calculate_grid(50000.0)
+    for level, counter in zip(state.levels, state.counter_orders):
+        standalone = GridLevel(price=level.price, side=level.side, index=level.index)
+        assert engine.get_counter_order(level) == counter
+        assert engine._compute_counter_order(level.price, level.side, level.index) == counter
+        assert engine.get_counter_order(standalone) == counter
+    # the top sell's counter buy stays in range; a level past the top does not
+    assert state.counter_orders[-1] is not None
+    outside = GridLevel(price=state.upper_bound, side=GridSide.BUY, index=state.levels[-1].index)
+    assert engine.get_counter_order(outside) is None
+
+
+def test_grid_side_is_integer_coded():
+    assert GridSide.BUY == 0 and GridSide.SELL == 1
+    assert GridSide.BUY.label == "buy" and GridSide.SELL.label == "sell"
+    engine = GridEngine(num_grids=10)
+    state = engine.calculate_grid(50000.0)
+    assert state.sides.tolist() == [int(l.side) for l in state.levels]
+
+
+def test_order_amounts_precomputed_per_level():
+    engine = GridEngine(num_grids=10, order_size_usdt=50.0)
+    state = engine.calculate_grid(50000.0)
+    for level in state.levels:
+        assert engine.get_order_amount(level.price) == round(50.0 / level.price, 8)
+    assert engine.get_order_amount(12345.67) == round(50.0 / 12345.67, 8)
+
+
+def test_active_count_tracks_every_transition():
+    engine = GridEngine(num_grids=10)
+    state = engine.calculate_grid(50000.0)
+    engine.mark_order_placed(state.levels[0].index, "a")
+    engine.mark_order_placed(state.levels[0].index, "a2")
+    state.levels[1].is_active = True
+    state.levels[1].is_active = True
+    assert engine.active_order_count() == 2
+    engine.mark_order_cancelled("a2")
+    engine.mark_order_filled("missing")
+    assert engine.active_order_count() == 1
+    assert engine.active_order_count() == int(state.is_active.sum())
+    try:
+        state.is_active[2] = True
+        assert False, "is_active should be read-only"
+    except ValueError:
+        pass
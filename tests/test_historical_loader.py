@@ -0,0 +1,152 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.historical_loader import HistoricalLoader
+
+FIVE_MIN_MS = 300_000
+
+
+def _fake_exchange(first_ms: int, count: int) -> SimpleNamespace:
+    candles = [
+        [first_ms + i * FIVE_MIN_MS, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(count)
+    ]
+
+    def fetch_ohlcv(symbol, timeframe, since, limit):
+        return [c for c in candles if c[0] >= since][:limit]
+
+    return SimpleNamespace(
+        fetch_ohlcv=fetch_ohlcv,
+        parse_timeframe=lambda tf: 300,
+        rateLimit=0,
+    )
+
+
+def test_sharded_fetch_returns_every_candle_once():
+    loader = HistoricalLoader()
+    start_ms = 1704067200000  # 2024-01-01
+    loader._exchange = _fake_exchange(start_ms, 1000)
+    df = loader.fetch_ohlcv(
+        start_date="2024-01-01", end_date="2024-01-05",
+        limit_per_request=64, max_workers=4,
+    )
+    assert len(df) == 1000
+    assert df["timestamp"].is_monotonic_increasing
+    assert df["timestamp"].iloc[0].value // 1_000_000 == start_ms
+
+
+def test_resume_appends_to_partial_csv():
+    import tempfile
+
+    start_ms = 1704067200000
+    path = str(Path(tempfile.mkdtemp()) / "partial.csv")
+    loader = HistoricalLoader()
+    loader._exchange = _fake_exchange(start_ms, 300)
+    first = loader.fetch_ohlcv(
+        start_date="2024-01-01", end_date="2024-01-02",
+        limit_per_request=50, resume_path=path,
+    )
+    assert len(first) == 289
+
+    loader._exchange = _fake_exchange(start_ms, 600)
+    second = loader.fetch_ohlcv(
+        start_date="2024-01-01", end_date="2024-01-03",
+        limit_per_request=50, resume_path=path,
+    )
+    assert len(second) == 577
+    assert second["timestamp"].is_unique
+    assert len(loader.load_from_csv(path)) == 600
+
+
+def test_cache_only_fetches_missing_tail():
+    import tempfile
+
+    start_ms = 1704067200000
+    loader = HistoricalLoader(cache_dir=tempfile.mkdtemp())
+    loader._exchange = _fake_exchange(start_ms, 600)
+    first = loader.fetch_ohlcv(start_date="2024-01-01", end_date="2024-01-02", limit_per_request=50)
+    assert len(first) == 289
+
+    calls = []
+    fetch = loader._exchange.fetch_ohlcv
+    loader._exchange.fetch_ohlcv = lambda *a, **kw: calls.append(kw["since"]) or fetch(*a, **kw)
+    second = loader.fetch_ohlcv(start_date="2024-01-01", end_date="2024-01-03", limit_per_request=50)
+    assert len(second) == 577 and second["timestamp"].is_unique
+    assert min(calls) == start_ms + 288 * FIVE_MIN_MS
+
+    calls.clear()
+    again = loader.fetch_ohlcv(start_date="2024-01-01", end_date="2024-01-02", limit_per_request=50)
+    assert calls == [] and again.equals(first)
+
+
+def test_checkpoint_tail_reads_last_timestamp():
+    import tempfile
+
+    from data.historical_loader import _last_checkpoint_ms
+
+    path = Path(tempfile.mkdtemp()) / "partial.csv"
+    path.write_text("timestamp,open,high,low,close,volume\n")
+    assert _last_checkpoint_ms(path) is None
+
+    rows = "".join(f"{1704067200000 + i * FIVE_MIN_MS},1,2,0.5,1.5,10\n" for i in range(500))
+    path.write_text("timestamp,open,high,low,close,volume\n" + rows)
+    assert _last_checkpoint_ms(path) == 1704067200000 + 499 * FIVE_MIN_MS
+
+    path.write_text("timestamp,open,high,low,close,volume\n2024-01-01 00:05:00+00:00,1,2,0.5,1.5,10\n")
+    assert _last_checkpoint_ms(path) == 1704067200000 + FIVE_MIN_MS
+
+
+def test_async_fetch_matches_threaded_fetch():
+    import asyncio
+
+    start_ms = 1704067200000
+    sync = _fake_exchange(start_ms, 1000)
+    closed = []
+
+    async def fetch_ohlcv(symbol, timeframe, since, limit):
+        await asyncio.sleep(0)
+        return sync.fetch_ohlcv(symbol, timeframe, since, limit)
+
+    async def close():
+        closed.append(True)
+
+    loader = HistoricalLoader()
+    loader._exchange = sync
+    loader._async_exchange = lambda: SimpleNamespace(fetch_ohlcv=fetch_ohlcv, close=close)
+    kwargs = dict(start_date="2024-01-01", end_date="2024-01-05", limit_per_request=64)
+    df = asyncio.run(loader.fetch_ohlcv_async(max_concurrency=4, **kwargs))
+    assert df.equals(loader.fetch_ohlcv(**kwargs))
+    assert len(df) == 1000 and closed == [True]
+
+
+def test_cache_never_merges_a_disjoint_range():
+    import tempfile
+
+    import pandas as pd
+
+    start_ms = 1704067200000
+    loader = HistoricalLoader(cache_dir=tempfile.mkdtemp())
+    loader._exchange = _fake_exchange(start_ms, 22 * 288)
+    loader.fetch_ohlcv(start_date="2024-01-01", end_date="2024-01-03", limit_per_request=300)
+    later = loader.fetch_ohlcv(start_date="2024-01-20", end_date="2024-01-22", limit_per_request=300)
+    assert len(later) == 577
+
+    full = loader.fetch_ohlcv(start_date="2024-01-01", end_date="2024-01-22", limit_per_request=300)
+    assert len(full) == 21 * 288 + 1
+    assert (full["timestamp"].diff().dropna() == pd.Timedelta(minutes=5)).all()
+
+
+def test_page_size_without_ccxt_feature_table():
+    import data.historical_loader as hl
+
+    # ccxt releases before the feature table only carry options
+    real = hl.create_exchange
+    hl.create_exchange = lambda exchange_id, config, http2=False: SimpleNamespace(
+        options={"fetchOHLCVLimit": 720}
+    )
+    try:
+        assert HistoricalLoader()._max_limit == 720
+    finally:
+        hl.create_exchange = real
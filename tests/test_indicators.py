@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, ADXIndicator, EMAIndicator
+from ta.volatility import AverageTrueRange, BollingerBands
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai.indicators import INDICATOR_COLUMNS, IndicatorStream
+
+FIVE_MIN_MS = 300_000
+
+
+def _candles(n: int = 400, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    close = 50000 + np.cumsum(rng.normal(0, 40, n))
+    high = close + np.abs(rng.normal(0, 30, n))
+    low = close - np.abs(rng.normal(0, 30, n))
+    ts = 1704067200000 + np.arange(n) * FIVE_MIN_MS
+    return ts, high, low, close
+
+
+def _ta_frame(high, low, close) -> pd.DataFrame:
+    high, low, close = pd.Series(high), pd.Series(low), pd.Series(close)
+    macd = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+    bb = BollingerBands(close, window=20, window_dev=2)
+    return pd.DataFrame({
+        "ema20": EMAIndicator(close, window=20).ema_indicator(),
+        "ema50": EMAIndicator(close, window=50).ema_indicator(),
+        "ema200": EMAIndicator(close, window=200).ema_indicator(),
+        "rsi": RSIIndicator(close, window=14).rsi(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+        "bb_upper": bb.bollinger_hband(),
+        "bb_lower": bb.bollinger_lband(),
+        "atr": AverageTrueRange(high, low, close, window=14).average_true_range(),
+        "adx": ADXIndicator(high, low, close, window=14).adx(),
+    })
+
+
+def test_stream_matches_ta_over_the_history_it_has_seen():
+    ts, high, low, close = _candles()
+    stream = IndicatorStream(keep=50)
+    for end in [*range(200, len(ts), 7), len(ts)]:
+        window = slice(end - 200, end)
+        # the newest candle is still forming; a different close must not stick
+        forming = close[window].copy()
+        forming[-1] *= 1.01
+        stream.update(ts[window], high[window], low[window], forming)
+        rows = stream.update(ts[window], high[window], low[window], close[window])
+
+    expected = _ta_frame(high, low, close).iloc[-50:]
+    got = pd.DataFrame([row[1:] for row in rows], columns=INDICATOR_COLUMNS)
+    assert [row[0] for row in rows] == ts[-50:].tolist()
+    assert np.allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+
+def test_stream_replays_after_a_gap():
+    ts, high, low, close = _candles()
+    stream = IndicatorStream(keep=50)
+    stream.update(ts[:200], high[:200], low[:200], close[:200])
+    rows = stream.update(ts[-200:], high[-200:], low[-200:], close[-200:])
+
+    expected = _ta_frame(high[-200:], low[-200:], close[-200:]).iloc[-1]
+    assert np.allclose(rows[-1][1:], expected.to_numpy(), rtol=1e-9)
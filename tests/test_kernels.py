@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai._kernels import (
+    adx_last,
+    atr_last,
+    rolling_var_last,
+    rolling_var_series,
+    rsi_last,
+    sma_last,
+)
+from ai.volatility_classifier import FEATURE_COLUMNS, compute_features, compute_last_features
+
+
+def _make_ohlc(n: int = 300, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    close = 50000 + np.cumsum(rng.normal(0, 50, n))
+    high = close + np.abs(rng.normal(0, 30, n))
+    low = close - np.abs(rng.normal(0, 30, n))
+    return high, low, close
+
+
+def _pandas_true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    return pd.concat([
+        high - low,
+        (high - close.shift(1)).abs(),
+        (low - close.shift(1)).abs(),
+    ], axis=1).max(axis=1)
+
+
+def test_sma_and_var_match_pandas():
+    _, _, close = _make_ohlc()
+    s = pd.Series(close)
+    assert np.isclose(sma_last(close, 20), s.rolling(20).mean().iloc[-1])
+    assert np.isclose(rolling_var_last(close, 144), s.rolling(144).var().iloc[-1])
+    assert np.isnan(sma_last(close[:5], 20))
+
+
+def test_rolling_var_series_matches_pandas():
+    _, _, close = _make_ohlc(n=1000)
+    close[300] = np.nan
+    for window in (12, 24, 144):
+        expected = pd.Series(close).rolling(window).var().to_numpy()
+        result = rolling_var_series(close, window)
+        assert np.array_equal(np.isnan(result), np.isnan(expected))
+        assert np.allclose(result, expected, rtol=1e-8, equal_nan=True)
+
+
+def test_rsi_matches_pandas():
+    _, _, close = _make_ohlc()
+    s = pd.Series(close)
+    delta = s.diff()
+    gain = delta.where(delta > 0, 0.0).rolling(14).mean().iloc[-1]
+    loss = (-delta).where(delta < 0, 0.0).rolling(14).mean().iloc[-1]
+    expected = 100.0 - 100.0 / (1.0 + gain / loss)
+    assert np.isclose(rsi_last(close, 14), expected)
+    assert rsi_last(np.arange(30, dtype=np.float64), 14) == 100.0
+
+
+def test_atr_and_adx_match_pandas():
+    high, low, close = _make_ohlc()
+    h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+    period = 14
+
+    tr = _pandas_true_range(h, l, c)
+    assert np.isclose(atr_last(high, low, close, period), tr.rolling(period).mean().iloc[-1])
+
+    plus_dm = h.diff()
+    minus_dm = -l.diff()
+    plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0.0)
+    minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0.0)
+    atr = tr.rolling(period).mean()
+    plus_di = 100 * (plus_dm.rolling(period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(period).mean() / atr)
+    dx = (plus_di - minus_di).abs() / (plus_di + minus_di) * 100
+    expected = dx.rolling(period).mean().iloc[-1]
+
+    assert np.isclose(adx_last(high, low, close, period), expected)
+    assert np.isnan(adx_last(high[:2 * period - 2], low[:2 * period - 2], close[:2 * period - 2], period))
+
+
+def test_last_features_match_compute_features():
+    high, low, close = _make_ohlc()
+    df = pd.DataFrame({"high": high, "low": low, "close": close})
+    expected = compute_features(df)[list(FEATURE_COLUMNS)].iloc[-1].values
+    assert np.allclose(compute_last_features(high, low, close), expected)
+
+
+def test_last_features_short_history():
+    high, low, close = _make_ohlc(n=100)
+    assert compute_last_features(high, low, close) is None
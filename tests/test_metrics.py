@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backtesting.metrics import (
+    _max_drawdown_pct,
+    _mean_downside_std,
+    _mean_std,
+    compute_all_metrics,
+    compute_max_drawdown,
+    compute_sharpe_ratio,
+    compute_sortino_ratio,
+)
+
+
+def test_all_metrics_skips_non_positive_equity_returns():
+    curve = [100.0, 110.0, 0.0, 50.0, 55.0, 44.0]
+    metrics = compute_all_metrics(curve, {}, 100.0)
+    returns = np.array([0.1, -1.0, 0.1, -0.2])
+    assert metrics["final_equity"] == 44.0
+    assert metrics["sharpe_ratio"] == round(compute_sharpe_ratio(returns), 4)
+
+
+def test_sharpe_accepts_list_and_array():
+    returns = [0.01, -0.005, 0.02, 0.0]
+    assert compute_sharpe_ratio(returns) == compute_sharpe_ratio(np.array(returns))
+    assert compute_sharpe_ratio(np.array([0.01])) == 0.0
+
+
+def test_max_drawdown_kernel_matches_numpy():
+    rng = np.random.default_rng(5)
+    curve = 10000 + np.cumsum(rng.normal(0, 20, 5000))
+    peak = np.maximum.accumulate(curve)
+    expected = float(np.max((peak - curve) / peak * 100))
+    assert _max_drawdown_pct(curve) == expected
+    assert compute_max_drawdown(curve) == expected
+
+
+def test_trade_stats_from_net_profit_column():
+    trades = {
+        "net_profit_usdt": np.array([2.0, -1.0, 3.0, -0.5]),
+        "fee_usdt": np.array([0.1, 0.1, 0.2, 0.1]),
+    }
+    metrics = compute_all_metrics([100.0, 101.0, 103.5], trades, 100.0)
+    assert metrics["total_trades"] == 4
+    assert metrics["win_rate_pct"] == 50.0
+    assert metrics["profit_factor"] == round(5.0 / 1.5, 4)
+    assert metrics["total_fees_usdt"] == 0.5
+
+
+def test_one_pass_moments_match_numpy():
+    rng = np.random.default_rng(8)
+    returns = rng.normal(0.0001, 0.002, 20000)
+    mean, std = _mean_std(returns)
+    assert np.isclose(mean, np.mean(returns), rtol=1e-10)
+    assert np.isclose(std, np.std(returns, ddof=1), rtol=1e-10)
+
+    downside = returns[returns < 0]
+    mean, n_down, down_std = _mean_downside_std(returns)
+    assert n_down == len(downside)
+    assert np.isclose(down_std, np.std(downside, ddof=1), rtol=1e-10)
+    assert np.isnan(_mean_downside_std(np.array([0.01, -0.02, 0.03]))[2])
+
+
+def test_sortino_without_losses():
+    assert compute_sortino_ratio(np.array([0.01, 0.02])) == float("inf")
+    assert compute_sortino_ratio(np.array([0.0, 0.0])) == 0.0
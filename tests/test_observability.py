@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from observability.metrics import LatchedGauge
+
+
+def test_latched_gauge_forwards_changes_only():
+    writes = []
+    gauge = LatchedGauge(SimpleNamespace(set=writes.append))
+    for value in (0, 0, 1.5, 1.5, 1.5, 0, 0):
+        gauge.set(value)
+    assert writes == [0, 1.5, 0]
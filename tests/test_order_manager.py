@@ -32,8 +32,7 @@ def test_get_open_orders():
 
 def test_cancel_all_open():
     mgr = OrderManager(dry_run=True)
-    for i in range(5):
-        mgr.place_order(side="buy", price=50000.0 - i * 100, amount=0.001, grid_index=i)
+    mgr.place_orders([("buy", 50000.0 - i * 100, 0.001, i) for i in range(5)])
     cancelled = mgr.cancel_all_open()
     assert cancelled == 5
     assert len(mgr.get_open_orders()) == 0
@@ -41,8 +40,9 @@ def test_cancel_all_open():
 
 def test_daily_order_count():
     mgr = OrderManager(dry_run=True)
-    for i in range(10):
-        mgr.place_order(side="buy", price=50000.0, amount=0.001, grid_index=i)
+    records = mgr.place_orders([("buy", 50000.0, 0.001, i) for i in range(10)])
+    assert [r.grid_index for r in records] == list(range(10))
+    assert len({r.order_id for r in records}) == 10
     assert mgr.daily_order_count == 10
 
 
@@ -66,3 +66,350 @@ def test_total_fees():
     mgr = OrderManager(dry_run=True)
     mgr.place_order(side="buy", price=50000.0, amount=0.001, grid_index=0)
     assert mgr.total_fees() == 0.0
+
+
+def test_daily_order_count_resets_at_utc_midnight():
+    from core.timeutils import next_utc_midnight
+
+    assert next_utc_midnight(0.0) == 86400.0
+    assert next_utc_midnight(86399.5) == 86400.0
+    assert next_utc_midnight(86400.0) == 172800.0
+
+    mgr = OrderManager(dry_run=True)
+    mgr.place_order(side="buy", price=50000.0, amount=0.001, grid_index=0)
+    assert mgr.daily_order_count == 1
+    mgr._next_daily_reset = 0.0
+    assert mgr.daily_order_count == 0
+    assert mgr._next_daily_reset > 0.0
+
+
+def test_status_indexes_and_fee_total_follow_exchange():
+    statuses = {}
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{len(statuses) - 1}", "status": "open"},
+        cancel_order_fn=lambda oid: {},
+        fetch_order_fn=lambda oid: {"status": statuses[oid], "fee": {"cost": 0.25}},
+        fetch_open_orders_fn=lambda: [{"id": oid} for oid, st in statuses.items() if st == "open"],
+        rate_limit_per_second=1e9,
+    )
+    for i in range(3):
+        statuses[f"x{i}"] = "open"
+        mgr.place_order(side="buy", price=100.0 - i, amount=0.1, grid_index=i)
+
+    statuses["x1"] = "closed"
+    assert mgr.reconcile_orders() == ["x1"]
+    assert [r.order_id for r in mgr.get_open_orders()] == ["x0", "x2"]
+    assert [r.order_id for r in mgr.get_filled_orders()] == ["x1"]
+    assert mgr.total_fees() == 0.25
+
+    mgr.check_order_status("x1")
+    assert mgr.total_fees() == 0.25
+    assert mgr.cancel_all_open() == 2
+    assert mgr.get_open_orders() == []
+
+
+def test_rate_limit_spaces_calls_on_monotonic_clock():
+    import time
+
+    mgr = OrderManager(dry_run=True, rate_limit_per_second=20.0)
+    start = time.monotonic()
+    mgr._rate_limit()
+    assert time.monotonic() - start < 0.04
+    mgr._rate_limit()
+    mgr._rate_limit()
+    assert time.monotonic() - start >= 0.1 - 1e-3
+
+
+def test_retry_caps_backoff_and_skips_final_sleep():
+    import time
+
+    calls = []
+
+    def failing():
+        calls.append(time.monotonic())
+        raise ConnectionError("down")
+
+    mgr = OrderManager(
+        max_retries=3, retry_backoff=10.0, max_backoff=0.02, retry_jitter=0.0,
+        rate_limit_per_second=1e9,
+    )
+    start = time.monotonic()
+    try:
+        mgr._retry_call(failing)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert isinstance(e.__cause__, ConnectionError)
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.02 - 1e-3
+    assert time.monotonic() - start < 0.5
+
+
+def test_reconcile_fetches_missing_orders_in_one_batch():
+    batches = []
+
+    def fetch_batch(ids):
+        batches.append(list(ids))
+        return [{"id": oid, "status": "closed", "fee": {"cost": 0.1}} for oid in ids if oid != "x3"]
+
+    placed = iter(range(5))
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        fetch_open_orders_fn=lambda: [{"id": "x0"}],
+        fetch_orders_batch_fn=fetch_batch,
+        rate_limit_per_second=1e9,
+    )
+    for i in range(5):
+        mgr.place_order(side="buy", price=100.0 - i, amount=0.1, grid_index=i)
+
+    assert mgr.reconcile_orders() == ["x1", "x2", "x4"]
+    assert batches == [["x1", "x2", "x3", "x4"]]
+    assert [r.order_id for r in mgr.get_open_orders()] == ["x0", "x3"]
+    assert abs(mgr.total_fees() - 0.3) < 1e-12
+
+
+def test_reconcile_fetches_orders_the_batch_left_out_one_by_one():
+    from types import SimpleNamespace
+
+    from data.realtime_feed import RealtimeFeed
+
+    feed = RealtimeFeed(use_ws=False)
+    # x0 is older than the exchange's fetch_orders page
+    feed._exchange = SimpleNamespace(
+        has={"fetchOrders": True},
+        fetch_orders=lambda symbol: [
+            {"id": oid, "status": "closed"} for oid in ("x1", "x2", "other")
+        ],
+        fetch_order=lambda oid, symbol: {"id": oid, "status": "cancelled"},
+    )
+    assert feed.supports_batch_fetch
+
+    placed = iter(range(3))
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        fetch_order_fn=feed.fetch_order,
+        fetch_open_orders_fn=lambda: [],
+        fetch_orders_batch_fn=feed.fetch_orders_batch,
+        rate_limit_per_second=1e9,
+    )
+    for i in range(3):
+        mgr.place_order(side="buy", price=100.0 - i, amount=0.1, grid_index=i)
+
+    assert mgr.reconcile_orders() == ["x1", "x2"]
+    assert mgr.orders["x0"].status == "cancelled"
+
+
+def test_reconcile_fetches_missing_orders_concurrently():
+    placed = iter(range(6))
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        fetch_order_fn=lambda oid: {"status": "closed" if oid != "x5" else "cancelled"},
+        fetch_open_orders_fn=lambda: [],
+        rate_limit_per_second=1e9,
+    )
+    for i in range(6):
+        mgr.place_order(side="sell", price=100.0 + i, amount=0.1, grid_index=i)
+
+    assert mgr.reconcile_orders() == ["x0", "x1", "x2", "x3", "x4"]
+    assert mgr.get_open_orders() == []
+    assert mgr.orders["x5"].status == "cancelled"
+
+
+def test_order_timestamps_format_lazily():
+    from datetime import datetime, timezone
+
+    from core.timeutils import isoformat_ns
+
+    assert isoformat_ns(1_700_000_000_123_456_789) == "2023-11-14T22:13:20.123456+00:00"
+    assert isoformat_ns(1_700_000_000_000_000_000) == "2023-11-14T22:13:20+00:00"
+
+    mgr = OrderManager(dry_run=True)
+    record = mgr.place_order(side="buy", price=50000.0, amount=0.001, grid_index=0)
+    created = datetime.fromisoformat(record.created_at)
+    assert abs((datetime.now(timezone.utc) - created).total_seconds()) < 5
+    assert mgr.to_dict_list()[0]["created_at"] == record.created_at
+    assert mgr.to_dict_list()[0]["filled_at"] is None
+
+
+def test_records_are_slotted():
+    mgr = OrderManager(dry_run=True)
+    record = mgr.place_order(side="buy", price=50000.0, amount=0.001, grid_index=0)
+    assert not hasattr(record, "__dict__")
+    assert list(mgr.to_dict_list()[0]) == [
+        "order_id", "side", "price", "amount", "status", "grid_index",
+        "created_at", "filled_at", "fee",
+    ]
+
+
+def test_write_json_lines_streams_records():
+    import io
+    import json
+
+    mgr = OrderManager(dry_run=True)
+    for i in range(3):
+        mgr.place_order(side="buy", price=50000.0 - i, amount=0.001, grid_index=i)
+    buf = io.StringIO()
+    assert mgr.write_json_lines(buf) == 3
+    lines = buf.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == mgr.to_dict_list()
+
+
+def test_place_orders_uses_one_batch_request():
+    batches = []
+
+    def place_batch(specs):
+        batches.append(specs)
+        return [{"id": f"b{i}"} if i != 1 else {"id": None} for i in range(len(specs))]
+
+    mgr = OrderManager(place_orders_batch_fn=place_batch, rate_limit_per_second=1e9)
+    records = mgr.place_orders([
+        ("buy", 99.0, 0.1, 0), ("buy", 98.0, 0.1, 1), ("sell", 101.0, 0.1, 3),
+    ])
+    assert len(batches) == 1 and batches[0][2] == {"side": "sell", "price": 101.0, "amount": 0.1}
+    assert [r.order_id if r else None for r in records] == ["b0", None, "b2"]
+    assert [r.grid_index for r in mgr.get_open_orders()] == [0, 3]
+
+
+def test_place_orders_falls_back_to_concurrent_calls():
+    def place(amount, price):
+        if price == 98.0:
+            raise ConnectionError("down")
+        return {"id": f"x{price:g}"}
+
+    mgr = OrderManager(place_order_fn=place, max_retries=1, rate_limit_per_second=1e9)
+    records = mgr.place_orders([("buy", 99.0, 0.1, 0), ("buy", 98.0, 0.1, 1), ("buy", 97.0, 0.1, 2)])
+    assert [r.order_id if r else None for r in records] == ["x99", None, "x97"]
+    assert mgr.daily_order_count == 2
+
+
+def test_place_orders_splits_batches_to_the_exchange_limit():
+    batches = []
+
+    def place_batch(specs):
+        batches.append([s["price"] for s in specs])
+        return [{"id": f"b{s['price']:g}"} for s in specs]
+
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{price:g}"},
+        place_orders_batch_fn=place_batch,
+        max_batch_orders=2,
+        rate_limit_per_second=1e9,
+    )
+    records = mgr.place_orders([("buy", 100.0 - i, 0.1, i) for i in range(5)])
+    assert batches == [[100.0, 99.0], [98.0, 97.0]]
+    assert [r.order_id for r in records] == ["b100", "b99", "b98", "b97", "x96"]
+
+
+def test_place_orders_falls_back_when_the_batch_is_not_supported():
+    import ccxt
+
+    calls = []
+
+    def place_batch(specs):
+        calls.append(specs)
+        raise ccxt.NotSupported("createOrders() does not support spot orders")
+
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{price:g}"},
+        place_orders_batch_fn=place_batch,
+        rate_limit_per_second=1e9,
+    )
+    records = mgr.place_orders([("buy", 99.0, 0.1, 0), ("sell", 101.0, 0.1, 2)])
+    assert [r.order_id for r in records] == ["x99", "x101"]
+    records = mgr.place_orders([("buy", 98.0, 0.1, 1), ("sell", 102.0, 0.1, 3)])
+    assert [r.order_id for r in records] == ["x98", "x102"]
+    assert len(calls) == 1
+
+
+def test_place_orders_does_not_resend_a_timed_out_batch():
+    import ccxt
+
+    calls = []
+
+    def place_batch(specs):
+        calls.append(specs)
+        raise ccxt.RequestTimeout("timed out")
+
+    # the exchange took the first order (at its tick size) before timing out
+    mgr = OrderManager(
+        place_orders_batch_fn=place_batch,
+        fetch_open_orders_fn=lambda: [{"id": "e1", "side": "buy", "price": 99.01}],
+        retry_backoff=0.0,
+        rate_limit_per_second=1e9,
+    )
+    records = mgr.place_orders([("buy", 99.0123, 0.1, 0), ("buy", 98.0, 0.1, 1)])
+    assert len(calls) == 1
+    assert records[0].order_id == "e1" and records[0].grid_index == 0
+    assert records[1] is None
+
+
+def test_cancel_orders_uses_one_batch_request():
+    batches = []
+    placed = iter(range(4))
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        cancel_order_fn=lambda oid: {"id": oid},
+        cancel_orders_batch_fn=lambda ids: batches.append(list(ids)),
+        rate_limit_per_second=1e9,
+    )
+    for i in range(4):
+        mgr.place_order(side="buy", price=100.0 - i, amount=0.1, grid_index=i)
+
+    assert mgr.cancel_orders(["x1", "x2"]) == [True, True]
+    assert batches == [["x1", "x2"]]
+    assert [r.order_id for r in mgr.get_open_orders()] == ["x0", "x3"]
+    assert mgr.cancel_all_open() == 2
+    assert batches[-1] == ["x0", "x3"]
+    assert mgr.get_open_orders() == []
+
+
+def test_cancel_orders_falls_back_when_the_batch_is_rejected():
+    import ccxt
+
+    calls = []
+    placed = iter(range(4))
+
+    def cancel_batch(ids):
+        calls.append(list(ids))
+        raise ccxt.BadRequest("cancelOrders is only supported for swap markets.")
+
+    def cancel(oid):
+        if oid == "x1":
+            raise ccxt.OrderNotFound(oid)
+        return {"id": oid}
+
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        cancel_order_fn=cancel,
+        cancel_orders_batch_fn=cancel_batch,
+        max_retries=1,
+        rate_limit_per_second=1e9,
+    )
+    for i in range(4):
+        mgr.place_order(side="buy", price=100.0 - i, amount=0.1, grid_index=i)
+
+    assert mgr.cancel_orders(["x0", "x1"]) == [True, False]
+    assert mgr.cancel_orders(["x2", "x3"]) == [True, True]
+    assert calls == [["x0", "x1"]]
+    assert [r.order_id for r in mgr.get_open_orders()] == ["x1"]
+
+
+def test_cancel_orders_falls_back_to_concurrent_calls():
+    placed = iter(range(3))
+
+    def cancel(oid):
+        if oid == "x1":
+            raise ConnectionError("down")
+        return {"id": oid}
+
+    mgr = OrderManager(
+        place_order_fn=lambda amount, price: {"id": f"x{next(placed)}"},
+        cancel_order_fn=cancel,
+        max_retries=1,
+        rate_limit_per_second=1e9,
+    )
+    for i in range(3):
+        mgr.place_order(side="sell", price=100.0 + i, amount=0.1, grid_index=i)
+
+    assert mgr.cancel_all_open() == 2
+    assert [r.order_id for r in mgr.get_open_orders()] == ["x1"]
+    assert mgr.orders["x0"].status == mgr.orders["x2"].status == "cancelled"
@@ -7,9 +7,12 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from core.position_tracker import PositionTracker
 
+# every test database, with its -wal/-shm files, is removed at exit
+_DB_DIR = tempfile.TemporaryDirectory()
+
 
 def _make_tracker() -> PositionTracker:
-    fd, path = tempfile.mkstemp(suffix=".db")
+    fd, path = tempfile.mkstemp(suffix=".db", dir=_DB_DIR.name)
     os.close(fd)
     tracker = PositionTracker(db_path=path)
     tracker.initialize(10000.0)
@@ -65,6 +68,7 @@ def test_save_and_load_state():
     t = _make_tracker()
     t.record_buy(price=50000.0, amount=0.01, fee=0.5)
     t.save_state()
+    t.flush()
 
     t2 = PositionTracker(db_path=t._db_path)
     assert t2.load_state()
@@ -86,3 +90,250 @@ def test_to_dict():
     assert d["initial_capital"] == 10000.0
     assert "total_pnl" in d
     assert "drawdown_pct" in d
+
+
+def test_database_uses_wal():
+    import sqlite3
+
+    t = _make_tracker()
+    with sqlite3.connect(t._db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_writes_share_one_connection():
+    t = _make_tracker()
+    conn = t._conn
+    t.record_completed_trade("b1", "s1", 50000.0, 51000.0, 0.01, 1.0)
+    t.snapshot_equity(50000.0)
+    t.save_state()
+    assert t._conn is conn
+    assert len(t.get_recent_trades()) == 1
+    t.close()
+
+    t2 = PositionTracker(db_path=t._db_path)
+    assert t2.load_state()
+    assert t2.get_recent_trades()[0]["trade_id"] == "T-1"
+    assert len(t2.get_equity_history()) == 1
+
+
+def test_queued_writes_commit_in_batches():
+    t = _make_tracker()
+    for i in range(50):
+        t.record_completed_trade(f"b{i}", f"s{i}", 50000.0, 51000.0, 0.01, 1.0)
+        t.snapshot_equity(50000.0 + i)
+    t.flush()
+    assert t._write_q.unfinished_tasks == 0
+    assert len(t.get_recent_trades(limit=100)) == 50
+    history = t.get_equity_history()
+    assert [h["btc_price"] for h in history] == [50000.0 + i for i in range(50)]
+    t.close()
+    assert not t._writer.is_alive()
+
+
+def test_trades_timestamp_index():
+    t = _make_tracker()
+    plan = t._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE timestamp >= ? ORDER BY timestamp DESC",
+        ("2024-01-01",),
+    ).fetchall()
+    assert any("idx_trades_ts" in row[-1] for row in plan)
+
+
+def test_subscribers_receive_trade_and_equity_events():
+    t = _make_tracker()
+    events = t.subscribe()
+    t.record_completed_trade("b1", "s1", 50000.0, 51000.0, 0.01, 1.0)
+    t.snapshot_equity(50000.0)
+    kind, trade = events.get_nowait()
+    assert kind == "trade" and trade["trade_id"] == "T-1"
+    kind, snap = events.get_nowait()
+    assert kind == "equity" and snap["equity"] == 10000.0
+    assert events.empty()
+
+
+def test_daily_pnl_resets_at_utc_midnight():
+    import time
+    from dataclasses import replace
+
+    t = _make_tracker()
+    t.record_completed_trade("b1", "s1", 50000.0, 51000.0, 0.01, 1.0)
+    assert t.daily_pnl == 9.0
+    assert t._totals.day_end_ts > time.time()
+    t._totals = replace(t._totals, day_end_ts=time.time() - 1)
+    assert t.daily_pnl == 0.0
+    assert t._totals.day_end_ts % 86400 == 0
+
+
+def test_timestamps_stored_as_epoch_microseconds():
+    from datetime import datetime
+
+    t = _make_tracker()
+    record = t.record_completed_trade("b1", "s1", 50000.0, 51000.0, 0.01, 1.0)
+    t.snapshot_equity(50000.0)
+    t.flush()
+    stored = t._conn.execute("SELECT timestamp FROM trades").fetchone()[0]
+    assert stored == record.timestamp_us
+    trade = t.get_recent_trades()[0]
+    assert trade["timestamp"] == record.timestamp
+    moment = datetime.fromisoformat(trade["timestamp"])
+    assert int(moment.timestamp()) == record.timestamp_us // 1_000_000
+    assert moment.microsecond == record.timestamp_us % 1_000_000
+    assert isinstance(t.get_equity_history()[0]["timestamp"], str)
+
+
+def test_text_timestamps_are_migrated():
+    import sqlite3
+
+    fd, path = tempfile.mkstemp(suffix=".db", dir=_DB_DIR.name)
+    os.close(fd)
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE trades (trade_id TEXT PRIMARY KEY, buy_order_id TEXT,"
+            " sell_order_id TEXT, buy_price REAL, sell_price REAL, amount REAL,"
+            " profit_usdt REAL, fee_usdt REAL, net_profit_usdt REAL, timestamp TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE equity_snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " timestamp TEXT, equity_usdt REAL, btc_held REAL, btc_price REAL)"
+        )
+        conn.execute(
+            "INSERT INTO trades VALUES ('T-1', 'b1', 's1', 1.0, 2.0, 1.0, 1.0, 0.1, 0.9,"
+            " '2024-03-01T12:30:45.123456+00:00')"
+        )
+        conn.execute(
+            "INSERT INTO equity_snapshots (timestamp, equity_usdt, btc_held, btc_price)"
+            " VALUES ('2024-03-01T12:30:45+00:00', 100.0, 0.0, 1.0)"
+        )
+
+    t = PositionTracker(db_path=path)
+    assert t._conn.execute("SELECT timestamp FROM trades").fetchone()[0] == 1709296245123456
+    assert t.get_recent_trades()[0]["timestamp"] == "2024-03-01T12:30:45.123456+00:00"
+    assert t.get_equity_history()[0]["timestamp"] == "2024-03-01T12:30:45+00:00"
+    t.snapshot_equity(2.0)
+    assert [h["btc_price"] for h in t.get_equity_history()] == [1.0, 2.0]
+
+
+def test_totals_are_replaced_not_mutated():
+    t = _make_tracker()
+    before = t._totals
+    t.record_buy(price=50000.0, amount=0.01, fee=0.5)
+    t.record_sell(price=51000.0, amount=0.01, fee=0.5)
+    assert before.current_capital == 10000.0 and before.btc_held == 0.0
+    assert t._totals is not before
+    d = t.to_dict()
+    assert d["current_capital"] == t.current_capital
+    assert d["peak_capital"] == t.current_capital > 10000.0
+    assert d["total_pnl"] == t.total_pnl()
+
+
+def test_to_dict_and_recent_trades_cached_until_change():
+    t = _make_tracker()
+    d = t.to_dict()
+    d["btc_held"] = 1.0
+    again = t.to_dict()
+    assert again is not d and again["btc_held"] == 0.0
+    t.record_buy(price=50000.0, amount=0.01, fee=0.5)
+    assert t.to_dict()["btc_held"] == 0.01
+
+    assert t.get_recent_trades() == []
+    t.record_completed_trade("b1", "s1", 50000.0, 51000.0, 0.01, 1.0)
+    trades = t.get_recent_trades()
+    assert len(trades) == 1
+    assert len(t.get_recent_trades(limit=10)) == 1
+
+    # served from the cache, but callers can't change what others get
+    trades[0]["net_profit_usdt"] = 0.0
+    trades.append({})
+    again = t.get_recent_trades()
+    assert again is not trades and len(again) == 1
+    assert again[0]["net_profit_usdt"] != 0.0
+
+
+def test_trade_events_reach_sink_in_batches():
+    batches = []
+    t = PositionTracker(
+        db_path=os.path.join(_DB_DIR.name, "sink.db"),
+        trade_event_sink=batches.append,
+    )
+    for i in range(3):
+        t.record_trade_event({"trade_id": f"o-{i}", "side": "buy"})
+    t.flush_trade_events()
+    assert [e["trade_id"] for b in batches for e in b] == ["o-0", "o-1", "o-2"]
+
+
+def test_slow_trade_event_sink_does_not_block_sqlite_writes():
+    import threading
+    import time
+
+    release = threading.Event()
+    exported = []
+
+    def sink(events):
+        release.wait(5)
+        exported.extend(events)
+
+    t = PositionTracker(
+        db_path=os.path.join(_DB_DIR.name, "slow_sink.db"), trade_event_sink=sink,
+    )
+    t.initialize(10000.0)
+    t.record_trade_event({"trade_id": "o-1", "side": "sell"})
+    t.record_completed_trade("b", "s", 100.0, 101.0, 1.0, 0.1)
+    started = time.monotonic()
+    assert len(t.get_recent_trades()) == 1
+    assert time.monotonic() - started < 1.0
+    assert exported == []
+
+    release.set()
+    t.flush_trade_events()
+    assert [e["trade_id"] for e in exported] == ["o-1"]
+    t.close()
+
+
+def test_equity_snapshots_pruned_to_newest_rows():
+    t = _make_tracker()
+    assert t._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    for price in range(10):
+        t.snapshot_equity(float(price))
+    t.flush()
+    t._prune_equity_snapshots(keep=4)
+    assert [h["btc_price"] for h in t.get_equity_history()] == [6.0, 7.0, 8.0, 9.0]
+    t.close()
+
+
+def test_trade_record_iterates_in_column_order():
+    from dataclasses import astuple
+
+    from core.position_tracker import TradeRecord
+
+    r = TradeRecord("T-1", "b1", "s1", 1.0, 2.0, 0.5, 0.5, 0.1, 0.4, 1700000000000000)
+    assert tuple(r) == astuple(r)
+    assert not hasattr(r, "__dict__")
+
+
+def test_save_state_skips_unchanged_values():
+    t = _make_tracker()
+    t.save_state()
+    t.flush()
+    t._conn.execute("UPDATE state SET value = 'stale' WHERE key = 'current_capital'")
+    t.save_state()
+    t.flush()
+    row = t._conn.execute("SELECT value FROM state WHERE key = 'current_capital'").fetchone()
+    assert row[0] == "stale"
+
+    t.record_buy(price=50000.0, amount=0.01, fee=0.5)
+    t.save_state()
+    t.flush()
+    row = t._conn.execute("SELECT value FROM state WHERE key = 'current_capital'").fetchone()
+    assert float(row[0]) == t.current_capital
+
+
+def test_save_state_is_written_by_the_writer_thread():
+    t = _make_tracker()
+    t.save_state({"emergency_stop": "true"})
+    t.record_buy(price=50000.0, amount=0.01, fee=0.5)
+    t.save_state()
+    t.flush()
+    state = dict(t._conn.execute("SELECT key, value FROM state").fetchall())
+    assert state["emergency_stop"] == "true"
+    assert float(state["current_capital"]) == t.current_capital
+    t.close()
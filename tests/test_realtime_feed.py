@@ -0,0 +1,128 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.realtime_feed import RealtimeFeed
+
+
+class _FakeStream:
+    def __init__(self, feed, prices):
+        self._feed = feed
+        self._prices = list(prices)
+        self.closed = False
+
+    async def watch_ticker(self, symbol):
+        price = self._prices.pop(0)
+        if not self._prices:
+            self._feed._stop_event.set()
+        return {"symbol": symbol, "last": price}
+
+    async def close(self):
+        self.closed = True
+
+
+def test_ws_loop_dispatches_pushed_tickers():
+    feed = RealtimeFeed(use_ws=False)
+    seen = []
+    feed.on_tick(lambda t: seen.append(t.last))
+    stream = _FakeStream(feed, [100.0, 101.0, 99.5])
+    asyncio.run(feed._ws_loop(1.0, client=stream))
+    assert seen == [100.0, 101.0, 99.5]
+    assert feed.last_price == 99.5
+    assert stream.closed
+
+
+def test_stop_polling_interrupts_the_wait():
+    import time
+    from types import SimpleNamespace
+
+    feed = RealtimeFeed(use_ws=False)
+    feed._exchange = SimpleNamespace(fetch_ticker=lambda symbol: {"last": 1.0})
+    feed.start_polling(interval=60.0)
+    time.sleep(0.05)
+    start = time.monotonic()
+    feed.stop_polling()
+    assert time.monotonic() - start < 1.0
+    assert feed.last_price == 1.0
+
+
+def test_streamed_candles_replace_rest_fetches():
+    from types import SimpleNamespace
+
+    feed = RealtimeFeed(use_ws=False)
+    feed._exchange = SimpleNamespace(fetch_ohlcv=None)
+    feed.stream_ohlcv("5m", limit=3)
+    updates = [
+        [[300, 1, 1, 1, 1.5, 1]],
+        [[300, 1, 1, 1, 1.7, 2], [600, 1, 1, 1, 2.0, 1]],
+    ]
+    seen = []
+
+    class Stream:
+        async def fetch_ohlcv(self, symbol, timeframe, limit):
+            return [[0, 1, 1, 1, 1.0, 1], [300, 1, 1, 1, 1.2, 1]][-limit:]
+
+        async def watch_ohlcv(self, symbol, timeframe):
+            if not updates:
+                seen.append(feed.recent_ohlcv("5m", limit=3))
+                feed._stop_event.set()
+                return []
+            return updates.pop(0)
+
+        async def watch_ticker(self, symbol):
+            await asyncio.sleep(0)
+            return {"last": 1.0}
+
+        async def close(self):
+            pass
+
+    asyncio.run(feed._ws_loop(1.0, client=Stream()))
+    candles = seen[0]
+    assert [c[0] for c in candles] == [0, 300, 600]
+    assert candles[1][4] == 1.7
+    assert not feed.streaming and not feed._candles
+
+
+def test_candle_buffer_merges_refetched_windows():
+    from data.realtime_feed import CandleBuffer
+
+    def window(first, last, close=1.0):
+        return [[t, 1.0, 2.0, 0.5, close, 10.0] for t in range(first, last)]
+
+    buf = CandleBuffer(capacity=4)
+    buf.update(window(0, 3))
+    assert buf.ts.tolist() == [0, 1, 2]
+
+    # the forming candle changes, then new candles open
+    buf.update(window(0, 3, close=1.5))
+    assert buf.close.tolist() == [1.0, 1.0, 1.5]
+    for last in range(4, 20):
+        buf.update(window(last - 3, last))
+    assert buf.ts.tolist() == [15, 16, 17, 18]
+    assert buf.high.tolist() == [2.0] * 4
+
+    # a window that doesn't reach the buffered candles replaces them
+    buf.update(window(100, 102))
+    assert buf.ts.tolist() == [100, 101]
+
+
+def test_batch_orders_follow_the_spot_feature_table():
+    from types import SimpleNamespace
+
+    feed = RealtimeFeed(use_ws=False)
+    has = {"createOrders": True}
+    # binance: createOrders is swap-only
+    feed._exchange = SimpleNamespace(has=has, features={"spot": {"createOrders": None}})
+    assert not feed.supports_batch_orders
+    assert feed.max_batch_orders is None
+
+    feed._exchange = SimpleNamespace(has=has, features={"spot": {"createOrders": {"max": 10}}})
+    assert feed.supports_batch_orders
+    assert feed.max_batch_orders == 10
+
+    # a ccxt release without the feature table
+    feed._exchange = SimpleNamespace(has=has)
+    assert feed.supports_batch_orders
+    assert feed.max_batch_orders is None
@@ -3,7 +3,21 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from risk.risk_manager import RiskAction, RiskManager
+from risk.risk_manager import RiskAction, RiskManager, RiskStatus
+
+# account figures that pass every check under the default limits
+_CALM = dict(
+    drawdown_pct=0.0,
+    capital_deployed_pct=10.0,
+    daily_pnl=0.0,
+    daily_order_count=10,
+    total_fees=0.0,
+    initial_capital=10000.0,
+)
+
+
+def _evaluate(rm: RiskManager, **inputs: float) -> RiskStatus:
+    return rm.evaluate(**{**_CALM, **inputs})
 
 
 def test_ok_state():
@@ -13,121 +27,58 @@ def test_ok_state():
         daily_loss_cap_usdt=500.0,
         max_orders_per_day=200,
     )
-    status = rm.evaluate(
-        drawdown_pct=2.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=50.0,
-        daily_order_count=10,
-        total_fees=5.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, drawdown_pct=2.0, daily_pnl=50.0, total_fees=5.0)
     assert status.overall_action == RiskAction.OK
     assert not status.paused
 
 
 def test_drawdown_pause():
     rm = RiskManager(max_drawdown_pct=15.0, emergency_stop_loss_pct=20.0)
-    status = rm.evaluate(
-        drawdown_pct=16.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, drawdown_pct=16.0)
     assert status.overall_action == RiskAction.PAUSE
     assert rm.is_paused
 
 
 def test_emergency_stop():
     rm = RiskManager(max_drawdown_pct=15.0, emergency_stop_loss_pct=20.0)
-    status = rm.evaluate(
-        drawdown_pct=25.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, drawdown_pct=25.0)
     assert status.overall_action == RiskAction.EMERGENCY_STOP
 
 
 def test_capital_deployed_pause():
     rm = RiskManager(max_capital_deployed_pct=50.0)
-    status = rm.evaluate(
-        drawdown_pct=0.0,
-        capital_deployed_pct=55.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, capital_deployed_pct=55.0)
     assert status.overall_action == RiskAction.PAUSE
 
 
 def test_daily_loss_cap():
     rm = RiskManager(daily_loss_cap_usdt=500.0)
-    status = rm.evaluate(
-        drawdown_pct=0.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=-600.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, daily_pnl=-600.0)
     assert status.overall_action == RiskAction.PAUSE
 
 
 def test_max_orders_per_day():
     rm = RiskManager(max_orders_per_day=100)
-    status = rm.evaluate(
-        drawdown_pct=0.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=150,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, daily_order_count=150)
     assert status.overall_action == RiskAction.PAUSE
 
 
 def test_warn_state():
     rm = RiskManager(max_drawdown_pct=15.0, emergency_stop_loss_pct=20.0)
-    status = rm.evaluate(
-        drawdown_pct=13.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    status = _evaluate(rm, drawdown_pct=13.0)
     assert status.overall_action == RiskAction.WARN
 
 
 def test_can_place_order():
     rm = RiskManager()
     assert rm.can_place_order()
-    rm.evaluate(
-        drawdown_pct=20.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    _evaluate(rm, drawdown_pct=20.0)
     assert not rm.can_place_order()
 
 
 def test_reset_pause():
     rm = RiskManager(max_drawdown_pct=10.0)
-    rm.evaluate(
-        drawdown_pct=12.0,
-        capital_deployed_pct=10.0,
-        daily_pnl=0.0,
-        daily_order_count=10,
-        total_fees=0.0,
-        initial_capital=10000.0,
-    )
+    _evaluate(rm, drawdown_pct=12.0)
     assert rm.is_paused
     rm.reset_pause()
     assert not rm.is_paused
@@ -135,15 +86,40 @@ def test_reset_pause():
 
 def test_to_dict():
     rm = RiskManager()
-    rm.evaluate(
-        drawdown_pct=5.0,
-        capital_deployed_pct=20.0,
-        daily_pnl=-100.0,
-        daily_order_count=50,
-        total_fees=10.0,
-        initial_capital=10000.0,
-    )
+    _evaluate(rm, drawdown_pct=5.0, capital_deployed_pct=20.0, daily_pnl=-100.0, daily_order_count=50, total_fees=10.0)
     d = rm.to_dict()
     assert "paused" in d
     assert "checks" in d
     assert len(d["checks"]) == 5
+
+
+def test_evaluate_reuses_status_for_unchanged_inputs():
+    rm = RiskManager(max_drawdown_pct=10.0)
+    first = _evaluate(rm, drawdown_pct=12.0)
+    second = _evaluate(rm, drawdown_pct=12.0)
+    assert second is not first and second.checks is first.checks
+    assert second.overall_action == first.overall_action and second.paused
+    assert second.created_at_ns >= first.created_at_ns
+
+    rm.reset_pause()
+    again = _evaluate(rm, drawdown_pct=12.0)
+    assert again is not first and rm.is_paused
+    assert _evaluate(rm, drawdown_pct=1.0).overall_action != first.overall_action
+
+
+def test_status_timestamp_formats_lazily():
+    from datetime import datetime, timezone
+
+    before = datetime.now(timezone.utc)
+    status = _evaluate(RiskManager(), drawdown_pct=1.0, capital_deployed_pct=1.0, daily_order_count=0)
+    stamp = datetime.fromisoformat(status.timestamp)
+    assert stamp.tzinfo is not None
+    assert before <= stamp <= datetime.now(timezone.utc)
+
+
+def test_to_dict_reports_action_names():
+    rm = RiskManager(max_drawdown_pct=15.0, emergency_stop_loss_pct=20.0)
+    _evaluate(rm, drawdown_pct=16.0, capital_deployed_pct=1.0, daily_order_count=0)
+    d = rm.to_dict()
+    assert d["overall_action"] == "PAUSE"
+    assert [c["action"] for c in d["checks"]] == ["PAUSE", "OK", "OK", "OK", "OK"]
@@ -95,3 +95,27 @@ def test_last_signal_stored():
     assert detector.last_signal is None
     detector.analyze(df)
     assert detector.last_signal is not None
+
+
+def test_analyze_arrays_matches_analyze():
+    df = _make_trending_data("down", 200)
+    detector = TrendDetector()
+    expected = detector.analyze(df)
+    signal = detector.analyze_arrays(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+    )
+    assert signal == expected
+
+
+def test_indicator_series_last_values_match_analyze():
+    df = _make_trending_data("up", 200)
+    detector = TrendDetector()
+    signal = detector.analyze(df)
+    series = detector.indicator_series(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+    )
+    assert round(series["ma_fast"][-1], 2) == signal.ma_fast
+    assert round(series["ma_slow"][-1], 2) == signal.ma_slow
+    assert round(series["rsi"][-1], 2) == signal.rsi
+    assert round(series["adx"][-1], 2) == signal.adx
+    assert np.isnan(series["ma_slow"][:49]).all()
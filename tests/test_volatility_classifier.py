@@ -1,4 +1,5 @@
 import sys
+import tempfile
 from pathlib import Path
 
 import numpy as np
@@ -6,13 +7,21 @@ import pandas as pd
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from ai._kernels import forest_predict_proba
 from ai.volatility_classifier import (
+    REGIME_LABELS,
     VolatilityClassifier,
     VolatilityRegime,
+    _flatten_forest,
+    _float32_thresholds,
+    compute_feature_matrix,
     compute_features,
     label_regimes,
 )
 
+_MODEL_DIR = tempfile.TemporaryDirectory()
+_MODEL_PATH = str(Path(_MODEL_DIR.name) / "vol_model.joblib")
+
 
 def _make_ohlcv(n: int = 500) -> pd.DataFrame:
     np.random.seed(42)
@@ -31,6 +40,15 @@ def _make_ohlcv(n: int = 500) -> pd.DataFrame:
     })
 
 
+def _trained_classifier() -> VolatilityClassifier:
+    # the forest is fitted on _make_ohlcv(1000) once per module; each test
+    # gets its own classifier loaded from the saved model
+    classifier = VolatilityClassifier(model_path=_MODEL_PATH)
+    if not classifier.load_model():
+        classifier.train(_make_ohlcv(1000), n_estimators=10)
+    return classifier
+
+
 def test_compute_features():
     df = _make_ohlcv(500)
     features = compute_features(df)
@@ -51,7 +69,7 @@ def test_label_regimes():
 
 def test_train_and_predict():
     df = _make_ohlcv(1000)
-    classifier = VolatilityClassifier(model_path="/tmp/test_vol_model.joblib")
+    classifier = VolatilityClassifier(model_path=str(Path(_MODEL_DIR.name) / "trained.joblib"))
     results = classifier.train(df, n_estimators=10)
     assert "accuracy" in results
     assert results["accuracy"] > 0
@@ -60,6 +78,95 @@ def test_train_and_predict():
     assert isinstance(regime, VolatilityRegime)
     assert 0 <= confidence <= 1
 
+    tail = df.tail(200)
+    assert classifier.predict_arrays(
+        tail["high"].to_numpy(dtype=float),
+        tail["low"].to_numpy(dtype=float),
+        tail["close"].to_numpy(dtype=float),
+    ) == (regime, confidence)
+
+
+def test_predict_features_reuses_close_result():
+    df = _make_ohlcv(1000)
+    classifier = _trained_classifier()
+    features = compute_features(df).values[-1]
+
+    first = classifier.predict_features(features)
+    model = classifier._model
+    # a model without predict methods proves inference was skipped
+    classifier._model = object()
+    assert classifier.predict_features(features * 1.005) == first
+
+    classifier._model = model
+    assert classifier.predict_features(features * 1.5)[0] in VolatilityRegime
+    classifier._reuse_tolerance = 0.0
+    classifier.predict_features(features)
+    classifier._model = object()
+    try:
+        classifier.predict_features(features * 1.005)
+        assert False, "expected the model to be called"
+    except AttributeError:
+        pass
+
+
+def test_predict_batch_matches_predict():
+    df = _make_ohlcv(1000)
+    classifier = _trained_classifier()
+
+    features = compute_feature_matrix(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+    )
+    rows = np.array([0, 150, 400, 999])
+    labels, confidence = classifier.predict_batch(features[rows])
+
+    assert labels[0] == 1 and confidence[0] == 0.0
+    for k, i in enumerate(rows[1:], start=1):
+        regime, conf = classifier.predict(df.iloc[max(0, i - 200):i + 1])
+        assert REGIME_LABELS[labels[k]] == regime
+        assert np.isclose(confidence[k], conf)
+
+
+def test_flattened_forest_matches_sklearn():
+    df = _make_ohlcv(1000)
+    classifier = _trained_classifier()
+
+    X = compute_features(df).values
+    expected = classifier._model.predict_proba(X)
+    proba = forest_predict_proba(
+        X.astype(np.float32), *_flatten_forest(classifier._model)
+    )
+    assert np.allclose(proba, expected, rtol=0, atol=1e-12)
+
+
+def test_float32_thresholds_keep_split_decisions():
+    rng = np.random.default_rng(3)
+    x = rng.normal(0, 1000, 5000).astype(np.float32)
+    threshold = (x.astype(np.float64) + np.nextafter(x, np.float32(np.inf))) / 2
+    t32 = _float32_thresholds(threshold)
+    assert t32.dtype == np.float32
+    for probe in (x, np.nextafter(x, np.float32(np.inf))):
+        assert np.array_equal(probe <= t32, probe.astype(np.float64) <= threshold)
+
+
+def test_predict_batch_without_numba_uses_sklearn():
+    import ai.volatility_classifier as vc
+
+    df = _make_ohlcv(1000)
+    classifier = _trained_classifier()
+    features = compute_feature_matrix(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+    )[200:]
+
+    expected = classifier.predict_batch(features)
+    saved = vc.NUMBA_AVAILABLE
+    vc.NUMBA_AVAILABLE = not saved
+    try:
+        labels, confidence = classifier.predict_batch(features)
+    finally:
+        vc.NUMBA_AVAILABLE = saved
+    assert np.array_equal(labels, expected[0])
+    assert np.allclose(confidence, expected[1])
+
 
 def test_predict_without_model():
     classifier = VolatilityClassifier(model_path="/tmp/nonexistent_model.joblib")
@@ -80,3 +187,15 @@ def test_to_dict():
 def test_load_nonexistent_model():
     classifier = VolatilityClassifier(model_path="/tmp/does_not_exist.joblib")
     assert not classifier.load_model()
+
+
+def test_predict_features_matches_sklearn():
+    df = _make_ohlcv(1000)
+    classifier = _trained_classifier()
+    classifier._reuse_tolerance = -1.0
+    for row in compute_features(df).values[::50]:
+        regime, confidence = classifier.predict_features(row)
+        proba = classifier._model.predict_proba(row.reshape(1, -1))[0]
+        pred = classifier._model.predict(row.reshape(1, -1))[0]
+        assert regime == REGIME_LABELS[pred]
+        assert np.isclose(confidence, proba[pred])